@@ -0,0 +1,195 @@
+"""
+Shared helpers for the ESG & Finance AI Research Assistant benchmarks.
+"""
+
+import json
+import math
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def percentile(samples, pct):
+    """Return the nearest-rank percentile of a list of samples.
+
+    Args:
+        samples (list): Sample values
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value, or 0.0 for an empty list
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def summarize_timings(timings):
+    """Summarize a list of durations in seconds.
+
+    Args:
+        timings (list): Durations in seconds
+
+    Returns:
+        dict: Sample count and latency statistics in milliseconds
+    """
+    millis = [t * 1000 for t in timings]
+    return {
+        'samples': len(millis),
+        'p50_ms': round(percentile(millis, 50), 3),
+        'p95_ms': round(percentile(millis, 95), 3),
+        'mean_ms': round(sum(millis) / len(millis), 3) if millis else 0.0,
+        'max_ms': round(max(millis), 3) if millis else 0.0,
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+
+
+def time_calls(func, args_list):
+    """Call a function once per argument tuple and time each call.
+
+    Args:
+        func (callable): Function to call
+        args_list (list): List of argument tuples
+
+    Returns:
+        list: Durations in seconds
+    """
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_metadata():
+    """Describe the environment a benchmark ran in."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': commit or None,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform()
+    }
+
+
+def write_results(results, output_path):
+    """Write benchmark results as JSON.
+
+    Args:
+        results (dict): Benchmark results
+        output_path (str): File to write to
+    """
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to: {output_path}")
+
+
+def compare_results(current, baseline, threshold=0.2, metric='p95_ms'):
+    """Compare two benchmark result files and report regressions.
+
+    Both results must have a ``results`` list of entries with a ``name`` and
+    an ``operations`` mapping of operation name to statistics.
+
+    Args:
+        current (dict): Results of this run
+        baseline (dict): Results of a previous run
+        threshold (float): Allowed relative slowdown before flagging
+        metric (str): Statistic to compare
+
+    Returns:
+        list: Regressions as dictionaries
+    """
+    baseline_by_name = {entry['name']: entry for entry in baseline.get('results', [])}
+    regressions = []
+
+    print(f"\nComparison against baseline ({metric}, threshold {threshold:.0%}):")
+    for entry in current.get('results', []):
+        base_entry = baseline_by_name.get(entry['name'])
+        if not base_entry:
+            continue
+        for op_name, stats in entry['operations'].items():
+            base_stats = base_entry['operations'].get(op_name)
+            if not base_stats or not base_stats.get(metric):
+                continue
+            change = (stats[metric] - base_stats[metric]) / base_stats[metric]
+            flag = "REGRESSION" if change > threshold else "ok"
+            print(f"  {entry['name']:>12} {op_name:<32} "
+                  f"{base_stats[metric]:>10.3f} -> {stats[metric]:>10.3f} ({change:+.1%}) {flag}")
+            if change > threshold:
+                regressions.append({
+                    'name': entry['name'],
+                    'operation': op_name,
+                    'baseline': base_stats[metric],
+                    'current': stats[metric],
+                    'change': change
+                })
+
+    return regressions
+
+
+class _ChatRunner:
+    """Stand-in for an openai-agents agent: run() is one chat completions call."""
+
+    def __init__(self, client, model, instructions):
+        self.client = client
+        self.model = model
+        self.instructions = instructions
+
+    def run(self, prompt):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.instructions},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.choices[0].message.content
+
+
+def install_stand_in_agent():
+    """Make get_agent() return a client-only agent.
+
+    PaperProcessingAgent builds its agents with openai-agents APIs that the
+    installed version may not have. The stand-in sends the same prompts as
+    plain chat completions calls, so benchmarks against the stand-in OpenAI
+    server run with any version; they leave out the agent framework's own
+    overhead. Call it after OPENAI_BASE_URL and OPENAI_API_KEY are set.
+    """
+    from config.config import AGENT_CONFIG
+    from src.backend import ai_processing
+
+    class BenchmarkAgent(ai_processing.PaperProcessingAgent):
+        def __init__(self):
+            self.client = ai_processing.get_openai_client()
+            self.esg_finance_context = "You are an expert in ESG and Finance research."
+            self.agent = _ChatRunner(self.client, AGENT_CONFIG["model"], self.esg_finance_context)
+            self.computer = _ChatRunner(self.client, AGENT_CONFIG["model"], self.esg_finance_context)
+
+    ai_processing._agent = BenchmarkAgent()
@@ -0,0 +1,294 @@
+"""
+Offline benchmark for the database layer of the ESG & Finance AI Research Assistant.
+
+Generates a synthetic corpus of papers, summaries and embeddings into a
+temporary database for each requested size and times the main read and
+write paths in src/backend/database.py.
+
+Usage:
+    python benchmarks/db_benchmark.py --sizes 10000,100000 --output db_bench.json
+    python benchmarks/db_benchmark.py --sizes 10000 --compare db_bench.json
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_utils import (
+    summarize_timings, time_calls, run_metadata, write_results, compare_results,
+    peak_rss_mb
+)
+
+CATEGORIES = [
+    "q-fin.GN", "q-fin.PM", "q-fin.RM", "q-fin.ST", "q-fin.CP",
+    "econ.GN", "econ.EM", "stat.AP"
+]
+
+TITLE_WORDS = [
+    "ESG", "Climate", "Risk", "Green", "Bonds", "Carbon", "Governance", "Portfolio",
+    "Transition", "Stranded", "Assets", "Sustainable", "Finance", "Disclosure",
+    "TCFD", "SASB", "Pricing", "Returns", "Volatility", "Impact", "Investing",
+    "Emissions", "Net", "Zero", "Banking", "Insurance", "Markets", "Evidence"
+]
+
+SEARCH_TERMS = ["Climate", "Green Bonds", "TCFD", "Stranded Assets", "Governance"]
+
+BATCH_SIZE = 1000
+
+
+def _synthetic_paper(rng, index, base_date):
+    """Build one synthetic paper row."""
+    title = " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(5, 12)))
+    abstract = " ".join(rng.choice(TITLE_WORDS).lower() for _ in range(rng.randint(120, 220)))
+    published = base_date - timedelta(minutes=rng.randint(0, 5 * 365 * 24 * 60))
+    categories = rng.sample(CATEGORIES, rng.randint(1, 3))
+    authors = [f"Author {rng.randint(1, 50000)}" for _ in range(rng.randint(1, 6))]
+
+    return (
+        f"bench.{index:08d}",
+        title,
+        abstract,
+        json.dumps(authors),
+        f"http://arxiv.org/abs/bench.{index:08d}",
+        f"http://arxiv.org/pdf/bench.{index:08d}.pdf",
+        published.isoformat(),
+        "arxiv",
+        json.dumps(categories),
+        datetime.now().isoformat(),
+        None
+    )
+
+
+def _synthetic_summary(rng, paper_id):
+    """Build one synthetic summary row."""
+    return (
+        paper_id,
+        " ".join(rng.choice(TITLE_WORDS).lower() for _ in range(80)),
+        rng.uniform(0, 100),
+        rng.uniform(0, 100),
+        json.dumps([" ".join(rng.sample(TITLE_WORDS, 8)) for _ in range(4)]),
+        json.dumps(rng.sample(TITLE_WORDS, 6)),
+        datetime.now().isoformat()
+    )
+
+
+def populate(db_path, size, dim, summary_fraction, embedding_fraction, seed):
+    """Fill a fresh database with a synthetic corpus.
+
+    Rows are written with the same encodings as the add_* functions in
+    database.py, but in large batches so that corpus generation does not
+    dominate the run.
+
+    Args:
+        db_path (Path): Database file to fill
+        size (int): Number of papers
+        dim (int): Embedding dimensionality
+        summary_fraction (float): Fraction of papers that get a summary
+        embedding_fraction (float): Fraction of papers that get an embedding
+        seed (int): Random seed
+
+    Returns:
+        list: IDs of the generated papers
+    """
+    import numpy as np
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    base_date = datetime.now()
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    paper_ids = []
+
+    for start in range(0, size, BATCH_SIZE):
+        stop = min(start + BATCH_SIZE, size)
+        papers = [_synthetic_paper(rng, i, base_date) for i in range(start, stop)]
+        cursor.executemany('''
+        INSERT INTO papers (
+            id, title, abstract, authors, url, pdf_url, published_date,
+            source, categories, retrieved_date, embedding_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', papers)
+        batch_ids = [paper[0] for paper in papers]
+        paper_ids.extend(batch_ids)
+
+        summaries = [
+            _synthetic_summary(rng, paper_id)
+            for paper_id in batch_ids if rng.random() < summary_fraction
+        ]
+        cursor.executemany('''
+        INSERT INTO summaries (
+            paper_id, summary, esg_relevance_score, finance_relevance_score,
+            key_findings, keywords, created_date
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', summaries)
+
+        embedded_ids = [paper_id for paper_id in batch_ids if rng.random() < embedding_fraction]
+        if embedded_ids:
+            vectors = np_rng.standard_normal((len(embedded_ids), dim), dtype=np.float32)
+            created = datetime.now().isoformat()
+            for paper_id, vector in zip(embedded_ids, vectors):
+                cursor.execute('''
+                INSERT INTO embeddings (paper_id, embedding, model, created_date)
+                VALUES (?, ?, ?, ?)
+                ''', (paper_id, json.dumps(vector.tolist()), "synthetic", created))
+                cursor.execute("UPDATE papers SET embedding_id = ? WHERE id = ?",
+                               (cursor.lastrowid, paper_id))
+
+        conn.commit()
+        print(f"  populated {stop}/{size} papers", end="\r", flush=True)
+
+    print()
+    conn.close()
+    return paper_ids
+
+
+def run_size(size, args):
+    """Populate a database of one size and time every operation.
+
+    Runs in a fresh process so that peak RSS is attributable to this size.
+
+    Args:
+        size (int): Number of papers
+        args (argparse.Namespace): Benchmark options
+
+    Returns:
+        dict: Results for this size
+    """
+    import numpy as np
+    from src.backend import database
+
+    rng = random.Random(args.seed + 1)
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp_dir:
+        database.DB_PATH = Path(tmp_dir) / "bench.db"
+        database.init_db()
+
+        print(f"Populating {size} papers (dim={args.dim})...")
+        start = time.perf_counter()
+        paper_ids = populate(database.DB_PATH, size, args.dim, args.summary_fraction,
+                             args.embedding_fraction, args.seed)
+        populate_seconds = time.perf_counter() - start
+        populate_rss = peak_rss_mb()
+
+        operations = {}
+        samples = args.samples
+
+        print("Timing add_paper...")
+        base_date = datetime.now()
+        new_papers = []
+        for i in range(samples):
+            row = _synthetic_paper(rng, size + i, base_date)
+            new_papers.append(({
+                'id': row[0], 'title': row[1], 'abstract': row[2],
+                'authors': json.loads(row[3]), 'url': row[4], 'pdf_url': row[5],
+                'published_date': row[6], 'source': row[7],
+                'categories': json.loads(row[8])
+            },))
+        operations['add_paper'] = summarize_timings(time_calls(database.add_paper, new_papers))
+
+        print("Timing get_papers...")
+        operations['get_papers.first_page'] = summarize_timings(
+            time_calls(lambda: database.get_papers(limit=10), [()] * samples))
+        operations['get_papers.category'] = summarize_timings(time_calls(
+            lambda c: database.get_papers(limit=10, category=c),
+            [(rng.choice(CATEGORIES),) for _ in range(samples)]))
+        operations['get_papers.query'] = summarize_timings(time_calls(
+            lambda q: database.get_papers(limit=10, query=q),
+            [(rng.choice(SEARCH_TERMS),) for _ in range(samples)]))
+        operations['get_papers.deep_offset'] = summarize_timings(time_calls(
+            lambda o: database.get_papers(limit=10, offset=o),
+            [(rng.randint(size // 2, max(size // 2, size - 10)),) for _ in range(samples)]))
+
+        print("Timing get_paper_with_summary...")
+        operations['get_paper_with_summary'] = summarize_timings(time_calls(
+            database.get_paper_with_summary,
+            [(rng.choice(paper_ids),) for _ in range(samples)]))
+
+        print("Timing search_by_embedding...")
+        np_rng = np.random.default_rng(args.seed + 2)
+        queries = [
+            (np_rng.standard_normal(args.dim, dtype=np.float32).tolist(), 5)
+            for _ in range(args.search_samples)
+        ]
+        operations['search_by_embedding'] = summarize_timings(
+            time_calls(database.search_by_embedding, queries))
+
+        db_bytes = database.DB_PATH.stat().st_size
+
+    return {
+        'name': f"{size}",
+        'size': size,
+        'dim': args.dim,
+        'populate_seconds': round(populate_seconds, 2),
+        'populate_peak_rss_mb': round(populate_rss, 1),
+        'db_bytes': db_bytes,
+        'operations': operations
+    }
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark the database layer')
+    parser.add_argument('--sizes', type=str, default='10000,100000,1000000',
+                        help='Comma-separated corpus sizes')
+    parser.add_argument('--dim', type=int, default=3072, help='Embedding dimensionality')
+    parser.add_argument('--summary-fraction', type=float, default=0.8,
+                        help='Fraction of papers with a summary')
+    parser.add_argument('--embedding-fraction', type=float, default=1.0,
+                        help='Fraction of papers with an embedding')
+    parser.add_argument('--samples', type=int, default=200,
+                        help='Timed calls per operation')
+    parser.add_argument('--search-samples', type=int, default=5,
+                        help='Timed calls to search_by_embedding (full scans are slow)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--tmp-dir', type=str, default=None,
+                        help='Directory for the temporary databases')
+    parser.add_argument('--output', type=str, default='db_benchmark.json',
+                        help='File to write JSON results to')
+    parser.add_argument('--compare', type=str, help='Baseline results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative p95 slowdown before a regression is reported')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = {'benchmark': 'database', 'meta': run_metadata(), 'results': []}
+
+    for size in sizes:
+        # One fresh process per size keeps peak RSS figures independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            entry = executor.submit(run_size, size, args).result()
+        results['results'].append(entry)
+
+        print(f"\n{size} papers ({entry['db_bytes'] / 1e6:.1f} MB on disk, "
+              f"populated in {entry['populate_seconds']}s):")
+        for op_name, stats in entry['operations'].items():
+            print(f"  {op_name:<28} p50 {stats['p50_ms']:>10.3f} ms  "
+                  f"p95 {stats['p95_ms']:>10.3f} ms  peak RSS {stats['peak_rss_mb']:>8.1f} MB")
+
+    write_results(results, args.output)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, threshold=args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) found")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
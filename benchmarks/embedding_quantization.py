@@ -0,0 +1,191 @@
+"""
+Memory and recall report for reduced and quantized embedding scans.
+
+Builds the embedding store (src/backend/embedding_store.py) of a database
+once per scan configuration in a temporary directory and compares its top-k
+results with an exact float32 search over the full vectors. For each
+configuration it reports recall@k, the bytes scanned per query (the part of
+the store that has to stay in RAM) and the search latency.
+
+Queries come from the user_queries log, embedded with the configured model,
+when OPENAI_API_KEY is set. Otherwise, or with --synthetic, they are stored
+embeddings of random papers with added noise, which stands in for queries
+that are close to, but not exactly, a paper in the corpus.
+
+Shortened embeddings from the model (EMBEDDING_DIMENSIONS) are the leading
+dimensions of the full vector re-normalized, so the scan_dims rows also show
+what storing shortened embeddings would keep.
+
+Usage:
+    python benchmarks/embedding_quantization.py --output quantization.json
+    ESG_DB_PATH=/path/to/copy.db python benchmarks/embedding_quantization.py --synthetic
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_utils import summarize_timings, run_metadata, write_results
+from config.config import OPENAI_API_KEY
+from src.backend import database
+from src.backend.embedding_store import EmbeddingStore
+
+
+def load_queries(args, dim):
+    """Get the query vectors to evaluate with.
+
+    Args:
+        args (argparse.Namespace): Benchmark options
+        dim (int): Dimension of the stored embeddings
+
+    Returns:
+        tuple: (list of query vectors, description of their source)
+    """
+    if OPENAI_API_KEY and not args.synthetic:
+        import sqlite3
+        from src.backend.ai_processing import get_agent
+
+        conn = sqlite3.connect(database.DB_PATH)
+        try:
+            rows = conn.execute('''
+            SELECT query FROM user_queries
+            GROUP BY query ORDER BY MAX(timestamp) DESC LIMIT ?
+            ''', (args.queries,)).fetchall()
+        finally:
+            conn.close()
+
+        agent = get_agent()
+        vectors = [agent.embed_query(row[0]) for row in rows]
+        vectors = [vector for vector in vectors if len(vector) == dim]
+        if vectors:
+            return vectors, 'user_queries'
+        print("No usable logged queries, falling back to synthetic queries")
+
+    rng = np.random.default_rng(args.seed)
+    sample = random.Random(args.seed)
+    stored = [vector for _, _, vector in database.iter_embeddings(current_only=True)
+              if len(vector) == dim]
+    vectors = []
+    for vector in sample.sample(stored, min(args.queries, len(stored))):
+        vector = np.asarray(vector, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        noise = rng.standard_normal(dim).astype(np.float32)
+        vectors.append((vector + args.noise * noise / np.linalg.norm(noise)).tolist())
+    return vectors, 'synthetic'
+
+
+def run_configuration(name, store, queries, truth, k):
+    """Build a store configuration and measure it.
+
+    Args:
+        name (str): Configuration name
+        store (EmbeddingStore): Store to build and search
+        queries (list): Query vectors
+        truth (list): Exact top-k paper id sets, one per query
+        k (int): Results per query
+
+    Returns:
+        dict: Results for this configuration
+    """
+    stats = store.sync(rebuild=True)
+    store.search(queries[0], k)  # Map the files before timing
+
+    timings = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results, _ = store.search(query, k)
+        timings.append(time.perf_counter() - start)
+        hits += len(expected & {paper_id for paper_id, _ in results})
+
+    return {
+        'name': name,
+        'scan_dimensions': store.scan_dimensions or None,
+        'quantization': store.quantization,
+        'rerank_candidates': store.rerank_candidates,
+        'rows': stats['rows'],
+        'scan_bytes': stats['scan_bytes'],
+        'full_bytes': stats['full_bytes'],
+        f'recall_at_{k}': round(hits / (len(queries) * k), 4),
+        'operations': {'search': summarize_timings(timings)}
+    }
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Report memory and recall of embedding scan configurations')
+    parser.add_argument('--dims', type=str, default='full,1024,512,256',
+                        help='Comma-separated scan dimensions ("full" for all)')
+    parser.add_argument('--rerank', type=int, default=100,
+                        help='Candidates re-ranked with full vectors in the rerank runs')
+    parser.add_argument('--k', type=int, default=10, help='Results per query')
+    parser.add_argument('--queries', type=int, default=200, help='Maximum number of queries')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='Use noisy stored embeddings as queries even if an API key is set')
+    parser.add_argument('--noise', type=float, default=0.5,
+                        help='Relative noise norm of synthetic queries')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', type=str, default='embedding_quantization.json',
+                        help='File to write JSON results to')
+    args = parser.parse_args()
+
+    dim = database.get_embedding_dimension()
+    if not dim:
+        print(f"No embeddings in {database.DB_PATH}")
+        return 1
+
+    queries, source = load_queries(args, dim)
+    if not queries:
+        print("No queries to evaluate")
+        return 1
+    print(f"{len(queries)} {source} queries against {database.DB_PATH} (dim={dim})")
+
+    dims = [None if value.strip() == 'full' else int(value) for value in args.dims.split(',') if value.strip()]
+    configurations = []
+    for scan_dim in dims:
+        if scan_dim is not None and scan_dim >= dim:
+            continue
+        label = 'full' if scan_dim is None else str(scan_dim)
+        for quantization in ('none', 'int8'):
+            if scan_dim is None and quantization == 'none':
+                continue  # The baseline itself
+            configurations.append((f"{label}/{quantization}", scan_dim, quantization, 0))
+            configurations.append((f"{label}/{quantization}/rerank", scan_dim, quantization, args.rerank))
+
+    results = {'benchmark': 'embedding_quantization', 'meta': run_metadata(),
+               'queries': len(queries), 'query_source': source, 'dim': dim, 'results': []}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        exact = EmbeddingStore(Path(tmp_dir) / "exact", scan_dimensions=0, quantization='none',
+                               rerank_candidates=0)
+        exact.sync(rebuild=True)
+        truth = [{paper_id for paper_id, _ in exact.search(query, args.k)[0]} for query in queries]
+        results['results'].append(run_configuration('full/none', exact, queries, truth, args.k))
+
+        for name, scan_dim, quantization, rerank in configurations:
+            store = EmbeddingStore(Path(tmp_dir) / name.replace('/', '_'), scan_dimensions=scan_dim or 0,
+                                   quantization=quantization, rerank_candidates=rerank)
+            results['results'].append(run_configuration(name, store, queries, truth, args.k))
+
+    baseline_bytes = results['results'][0]['scan_bytes']
+    print(f"\n{'configuration':<24} {'recall@' + str(args.k):>10} {'scan MB':>10} {'saved':>8} {'p50 ms':>10}")
+    for entry in results['results']:
+        saved = 1 - entry['scan_bytes'] / baseline_bytes if baseline_bytes else 0.0
+        entry['memory_saved'] = round(saved, 4)
+        print(f"{entry['name']:<24} {entry[f'recall_at_{args.k}']:>10.4f} "
+              f"{entry['scan_bytes'] / 1e6:>10.1f} {saved:>8.1%} {entry['operations']['search']['p50_ms']:>10.3f}")
+
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""
+Local stand-in servers for arXiv and OpenAI used by the benchmarks.
+
+Both servers run in background threads on 127.0.0.1 and count every call
+they receive. The OpenAI stand-in answers chat, responses and embedding
+calls with configurable latency, jitter and rate-limit (429) behaviour.
+"""
+
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+
+WORDS = [
+    "ESG", "climate", "risk", "green", "bonds", "carbon", "governance", "portfolio",
+    "transition", "stranded", "assets", "sustainable", "finance", "disclosure",
+    "pricing", "returns", "volatility", "impact", "emissions", "banking", "markets"
+]
+
+FAKE_SUMMARY = {
+    "summary": "This paper studies how climate risk disclosure affects asset prices.",
+    "esg_relevance_score": 82,
+    "finance_relevance_score": 76,
+    "key_findings": [
+        "Disclosure reduces the cost of capital",
+        "Transition risk is priced in equity returns",
+        "Effects are stronger after the Paris Agreement"
+    ],
+    "keywords": ["ESG", "climate risk", "disclosure", "asset pricing", "TCFD"]
+}
+
+
+class _StandInServer:
+    """Base class running a ThreadingHTTPServer in a daemon thread."""
+
+    def __init__(self):
+        """Initialize the server state."""
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        """Increment a call counter."""
+        with self._lock:
+            self.calls[key] += 1
+
+    def stats(self):
+        """Return a copy of the call counters."""
+        with self._lock:
+            return dict(self.calls)
+
+    def start(self, port=0):
+        """Start serving on 127.0.0.1.
+
+        Args:
+            port (int): Port to bind, 0 for any free port
+
+        Returns:
+            _StandInServer: self
+        """
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                owner.handle(self, "GET")
+
+            def do_POST(self):
+                owner.handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle(self, request, method):
+        """Handle one request. Implemented by subclasses."""
+        raise NotImplementedError
+
+    @staticmethod
+    def send(request, status, body, content_type="application/json", headers=None):
+        """Write a complete response."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+
+class FakeArxivServer(_StandInServer):
+    """Replays Atom feeds for arXiv API queries.
+
+    Feeds are read from ``feeds_dir`` (one ``<category>.xml`` file per
+    category) when given, otherwise synthetic entries published within the
+    last few days are generated for every requested category.
+    """
+
+    def __init__(self, papers_per_category=50, feeds_dir=None, seed=42):
+        """Initialize the fake arXiv server.
+
+        Args:
+            papers_per_category (int): Synthetic entries per category feed
+            feeds_dir (str): Optional directory of recorded Atom feeds
+            seed (int): Random seed for synthetic entries
+        """
+        super().__init__()
+        self.papers_per_category = papers_per_category
+        self.feeds_dir = Path(feeds_dir) if feeds_dir else None
+        self.seed = seed
+
+    def handle(self, request, method):
+        """Answer /api/query with an Atom feed."""
+        parsed = urlparse(request.path)
+        if parsed.path != "/api/query":
+            self.send(request, 404, "{}")
+            return
+
+        params = parse_qs(parsed.query)
+        query = params.get("search_query", [""])[0]
+        category = query.split("cat:")[-1].split()[0] if "cat:" in query else "q-fin"
+        max_results = int(params.get("max_results", [self.papers_per_category])[0])
+        self.count("query")
+
+        feed = None
+        if self.feeds_dir:
+            feed_file = self.feeds_dir / f"{category}.xml"
+            if feed_file.exists():
+                feed = feed_file.read_bytes()
+        if feed is None:
+            feed = self.build_feed(category, min(max_results, self.papers_per_category))
+
+        self.send(request, 200, feed, content_type="application/atom+xml")
+
+    def build_feed(self, category, count):
+        """Build a synthetic Atom feed for a category.
+
+        Args:
+            category (str): arXiv category
+            count (int): Number of entries
+
+        Returns:
+            str: Atom XML document
+        """
+        rng = random.Random(f"{self.seed}:{category}")
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        entries = []
+        for i in range(count):
+            paper_id = f"{2400 + zlib.crc32(category.encode()) % 100}.{rng.randint(10000, 99999)}v1"
+            published = now - timedelta(hours=rng.randint(1, 24 * 5))
+            title = " ".join(rng.choice(WORDS) for _ in range(8)).title()
+            abstract = " ".join(rng.choice(WORDS) for _ in range(150))
+            authors = "".join(
+                f"<author><name>Author {rng.randint(1, 999)}</name></author>"
+                for _ in range(rng.randint(1, 4))
+            )
+            entries.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/{paper_id}</id>
+    <published>{published.strftime("%Y-%m-%dT%H:%M:%SZ")}</published>
+    <title>{escape(title)}</title>
+    <summary>{escape(abstract)}</summary>
+    {authors}
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="{category}"/>
+  </entry>""")
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom">'
+            + "".join(entries) +
+            "\n</feed>\n"
+        )
+
+
+class FakeOpenAIServer(_StandInServer):
+    """Answers OpenAI chat, responses and embedding calls.
+
+    Every call waits ``latency + uniform(0, jitter)`` seconds and is answered
+    with HTTP 429 with probability ``rate_limit_rate``.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, rate_limit_rate=0.0,
+                 embedding_dim=3072, seed=42):
+        """Initialize the fake OpenAI server.
+
+        Args:
+            latency (float): Base latency per call in seconds
+            jitter (float): Maximum extra random latency in seconds
+            rate_limit_rate (float): Probability of answering with 429
+            embedding_dim (int): Default embedding dimensionality
+            seed (int): Random seed
+        """
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.embedding_dim = embedding_dim
+        self._rng = random.Random(seed)
+
+    def handle(self, request, method):
+        """Dispatch an OpenAI API call."""
+        path = urlparse(request.path).path
+        length = int(request.headers.get("Content-Length") or 0)
+        payload = json.loads(request.rfile.read(length) or b"{}") if length else {}
+
+        if method == "GET" and "/models" in path:
+            self.count("models")
+            model = path.rsplit("/", 1)[-1]
+            self.send(request, 200, json.dumps({
+                "id": model, "object": "model", "created": 0, "owned_by": "benchmark"
+            }))
+            return
+
+        if path.endswith("/embeddings"):
+            operation = "embeddings"
+        elif path.endswith("/chat/completions"):
+            operation = "chat"
+        elif path.endswith("/responses"):
+            operation = "responses"
+        else:
+            self.count("unknown")
+            self.send(request, 404, json.dumps({"error": {"message": "not found"}}))
+            return
+
+        self.count(operation)
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            limited = self._rng.random() < self.rate_limit_rate
+        time.sleep(delay)
+
+        if limited:
+            self.count(f"{operation}_429")
+            self.send(request, 429, json.dumps({
+                "error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}
+            }), headers={"Retry-After": "1"})
+            return
+
+        if operation == "embeddings":
+            body = self._embeddings(payload)
+        elif operation == "chat":
+            body = self._chat(payload)
+        else:
+            body = self._responses(payload)
+        self.send(request, 200, json.dumps(body))
+
+    def _embeddings(self, payload):
+        """Build an embeddings response."""
+        inputs = payload.get("input", "")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dim = payload.get("dimensions") or self.embedding_dim
+        data = []
+        for index, text in enumerate(inputs):
+            rng = random.Random(str(text))
+            data.append({
+                "object": "embedding",
+                "index": index,
+                "embedding": [rng.uniform(-1, 1) for _ in range(dim)]
+            })
+        tokens = sum(len(str(text).split()) for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": payload.get("model", "text-embedding-3-large"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    def _reply_text(self, payload):
+        """Pick the reply text for a chat or responses call."""
+        prompt = json.dumps(payload.get("messages") or payload.get("input") or "")
+        if "Research Brief" in prompt:
+            return "# Executive Summary\nClimate finance research is growing quickly."
+        return json.dumps(FAKE_SUMMARY)
+
+    def _chat(self, payload):
+        """Build a chat completions response."""
+        text = self._reply_text(payload)
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 500, "completion_tokens": 150, "total_tokens": 650}
+        }
+
+    def _responses(self, payload):
+        """Build a responses API response."""
+        text = self._reply_text(payload)
+        return {
+            "id": "resp-bench",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": payload.get("model", "gpt-4o"),
+            "output": [{
+                "type": "message",
+                "id": "msg-bench",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}]
+            }],
+            "usage": {"input_tokens": 500, "output_tokens": 150, "total_tokens": 650}
+        }
@@ -0,0 +1,230 @@
+"""
+Concurrent load test for the REST API in Flask and ASGI serving modes.
+
+Starts the stand-in OpenAI server, a temporary database with synthetic
+papers and embeddings, then each API serving mode in a subprocess, and
+fires concurrent /api/brief or /api/search requests at it. The servers use
+a client-only stand-in agent (see bench_utils.install_stand_in_agent).
+
+Usage:
+    python benchmarks/load_test.py --endpoint brief --concurrency 50 --requests 200 --latency 3
+    python benchmarks/load_test.py --modes flask,asgi --endpoint search
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+
+from benchmarks.bench_utils import ROOT_DIR, summarize_timings, run_metadata, write_results
+from benchmarks.fake_servers import FakeOpenAIServer
+
+QUERIES = [
+    "climate risk pricing in equity markets",
+    "green bond premium",
+    "TCFD disclosure quality",
+    "stranded assets and bank lending",
+    "ESG ratings disagreement"
+]
+
+
+def _free_port():
+    """Find a free local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, env, asgi_workers):
+    """Start the API in a subprocess.
+
+    Args:
+        mode (str): 'flask' or 'asgi'
+        port (int): Port to bind
+        env (dict): Environment for the subprocess
+        asgi_workers (int): Worker processes in ASGI mode
+
+    Returns:
+        subprocess.Popen: Server process
+    """
+    # The servers use the client-only stand-in agent (see install_stand_in_agent).
+    # Uvicorn serves a single worker in this process; extra workers import the
+    # app afresh and would build the real agent.
+    stand_in = "from benchmarks.bench_utils import install_stand_in_agent; install_stand_in_agent(); "
+    if mode == 'flask':
+        command = [sys.executable, "-c",
+                   stand_in + f"from src.backend.api import start_api; start_api(host='127.0.0.1', port={port})"]
+    else:
+        command = [sys.executable, "-c",
+                   stand_in + "from src.backend.asgi import start_asgi; "
+                   f"start_asgi(host='127.0.0.1', port={port}, workers={asgi_workers})"]
+    return subprocess.Popen(command, cwd=ROOT_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _thread_count(pid):
+    """Threads of a process and its children (Linux only, else None)."""
+    total = 0
+    try:
+        pids = [pid] + [
+            int(child) for child in
+            Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+        ]
+        for proc_id in pids:
+            for line in Path(f"/proc/{proc_id}/status").read_text().splitlines():
+                if line.startswith("Threads:"):
+                    total += int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return total
+
+
+def wait_ready(base_url, timeout=60):
+    """Wait until /api/ready answers 200."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/ready", timeout=2).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+async def run_load(base_url, endpoint, concurrency, total, server_pid):
+    """Send requests with a fixed number in flight.
+
+    Args:
+        base_url (str): API base URL
+        endpoint (str): 'brief' or 'search'
+        concurrency (int): Requests in flight at once
+        total (int): Total requests
+        server_pid (int): Server process, sampled for its thread count
+
+    Returns:
+        dict: Latencies, error count, wall time and peak server threads
+    """
+    peak_threads = 0
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            for index in counter:
+                payload = {'query': QUERIES[index % len(QUERIES)]}
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"/api/{endpoint}", json=payload)
+                    ok = response.status_code == 200 and 'error' not in response.json()
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                if not ok:
+                    errors += 1
+
+        async def sample_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, _thread_count(server_pid) or 0)
+                await asyncio.sleep(0.2)
+
+        sampler = asyncio.ensure_future(sample_threads())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+        sampler.cancel()
+
+    return {'latencies': latencies, 'errors': errors, 'wall': wall, 'peak_threads': peak_threads}
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Load test the API serving modes')
+    parser.add_argument('--modes', type=str, default='flask,asgi', help='Comma-separated serving modes')
+    parser.add_argument('--endpoint', choices=['brief', 'search'], default='brief')
+    parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight')
+    parser.add_argument('--requests', type=int, default=200, help='Total requests per mode')
+    parser.add_argument('--latency', type=float, default=2.0, help='Stand-in OpenAI latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.5, help='Stand-in OpenAI jitter in seconds')
+    parser.add_argument('--papers', type=int, default=2000, help='Papers in the temporary database')
+    parser.add_argument('--dim', type=int, default=256, help='Embedding dimensionality')
+    parser.add_argument('--asgi-workers', type=int, default=1, help='Worker processes in ASGI mode (the stand-in agent only reaches a single worker)')
+    parser.add_argument('--output', type=str, default='load_test.json', help='File to write JSON results to')
+    args = parser.parse_args()
+
+    from benchmarks.db_benchmark import populate
+    from src.backend import database
+
+    openai_server = FakeOpenAIServer(latency=args.latency, jitter=args.jitter,
+                                     embedding_dim=args.dim).start()
+    results = {'benchmark': 'load', 'meta': run_metadata(), 'config': vars(args), 'results': []}
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database.DB_PATH = Path(tmp_dir) / "load.db"
+            database.init_db()
+            print(f"Populating {args.papers} papers...")
+            populate(database.DB_PATH, args.papers, args.dim, 1.0, 1.0, seed=42)
+
+            env = dict(
+                os.environ,
+                ESG_DB_PATH=str(database.DB_PATH),
+                OPENAI_BASE_URL=f"{openai_server.url}/v1",
+                OPENAI_API_KEY="load-test",
+                API_IO_THREADS=str(max(args.concurrency, 8)),
+                OPENAI_MAX_CONNECTIONS=str(max(args.concurrency * 2, 100))
+            )
+
+            for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+                port = _free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                server = start_server(mode, port, env, args.asgi_workers)
+                try:
+                    if not wait_ready(base_url):
+                        print(f"{mode}: server did not become ready")
+                        continue
+                    print(f"{mode}: {args.requests} x /api/{args.endpoint} "
+                          f"with {args.concurrency} in flight...")
+                    run = asyncio.run(run_load(base_url, args.endpoint, args.concurrency,
+                                               args.requests, server.pid))
+                finally:
+                    server.terminate()
+                    server.wait(timeout=10)
+
+                stats = summarize_timings(run['latencies'])
+                stats['errors'] = run['errors']
+                stats['wall_seconds'] = round(run['wall'], 2)
+                stats['requests_per_second'] = round(args.requests / run['wall'], 2)
+                stats['peak_server_threads'] = run['peak_threads']
+                results['results'].append({'name': mode, 'operations': {args.endpoint: stats}})
+    finally:
+        openai_server.stop()
+
+    print(f"\n/api/{args.endpoint}, {args.concurrency} in flight, "
+          f"OpenAI latency {args.latency}s +/- {args.jitter}s:")
+    for entry in results['results']:
+        stats = entry['operations'][args.endpoint]
+        print(f"  {entry['name']:<6} {stats['requests_per_second']:>8.2f} req/s  "
+              f"p50 {stats['p50_ms']:>9.1f} ms  p95 {stats['p95_ms']:>9.1f} ms  "
+              f"peak threads {stats['peak_server_threads']:>4}  errors {stats['errors']}")
+
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+End-to-end pipeline throughput benchmark for the ESG & Finance AI Research Assistant.
+
+Runs collect_new_papers and then process_new_papers against local stand-in
+arXiv and OpenAI servers (see fake_servers.py), using a temporary database.
+No network access or API spend is needed.
+
+The shared paper processing agent is replaced by a client-only stand-in
+that sends its prompts as plain chat completions calls, so the benchmark
+runs with any installed openai-agents version. Processing times therefore
+cover the prompts, OpenAI round trips and database writes, not the agent
+framework's own overhead.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py --latency 0.8 --jitter 0.4 --rate-limit 0.05
+    python benchmarks/pipeline_benchmark.py --output pipeline.json --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_utils import run_metadata, write_results, compare_results, peak_rss_mb, install_stand_in_agent
+from benchmarks.fake_servers import FakeArxivServer, FakeOpenAIServer
+
+
+def _rate(count, seconds):
+    """Items per minute, guarding against zero durations."""
+    return round(count / seconds * 60, 2) if seconds > 0 else 0.0
+
+
+def run_pipeline(args):
+    """Run collection and processing against the stand-in servers.
+
+    Args:
+        args (argparse.Namespace): Benchmark options
+
+    Returns:
+        dict: Benchmark results
+    """
+    # Everything runs against a temporary database: ESG_DB_PATH is read when
+    # the configuration is first imported, so the tracked database is never opened
+    tmp_dir = tempfile.TemporaryDirectory()
+    os.environ["ESG_DB_PATH"] = str(Path(tmp_dir.name) / "bench.db")
+
+    arxiv_server = FakeArxivServer(
+        papers_per_category=args.papers_per_category,
+        feeds_dir=args.feeds_dir,
+        seed=args.seed
+    ).start()
+    openai_server = FakeOpenAIServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit_rate=args.rate_limit,
+        embedding_dim=args.dim,
+        seed=args.seed
+    ).start()
+
+    # The OpenAI client and agents read these when they are first created
+    os.environ["OPENAI_BASE_URL"] = f"{openai_server.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+
+    try:
+        from config.config import SOURCES, PROCESSING_CONFIG
+        from src.backend import database
+        from src.backend.data_collectors import ArxivCollector, collect_new_papers
+        from src.backend.ai_processing import process_new_papers
+
+        install_stand_in_agent()
+        ArxivCollector.BASE_URL = f"{arxiv_server.url}/api/query"
+        SOURCES["arxiv"]["request_delay"] = args.arxiv_delay
+        PROCESSING_CONFIG["request_delay"] = args.processing_delay
+
+        database.init_db()
+
+        print("Running collection...")
+        start = time.perf_counter()
+        collection_stats = collect_new_papers()
+        collect_seconds = time.perf_counter() - start
+        collected = collection_stats['total']
+        print(f"  collected {collected} papers in {collect_seconds:.2f}s")
+
+        limit = args.process_limit or collected
+        print(f"Running processing (limit: {limit})...")
+        start = time.perf_counter()
+        processing_stats = process_new_papers(limit=limit)
+        process_seconds = time.perf_counter() - start
+        processed = processing_stats['summarized']
+        print(f"  processed {processed} papers in {process_seconds:.2f}s")
+    finally:
+        arxiv_server.stop()
+        openai_server.stop()
+        tmp_dir.cleanup()
+
+    total_seconds = collect_seconds + process_seconds
+    api_calls = openai_server.stats()
+
+    return {
+        'benchmark': 'pipeline',
+        'meta': run_metadata(),
+        'config': {
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'rate_limit': args.rate_limit,
+            'papers_per_category': args.papers_per_category,
+            'categories': SOURCES["arxiv"]["categories"],
+            'arxiv_delay': args.arxiv_delay,
+            'processing_delay': args.processing_delay,
+            'dim': args.dim,
+            'agent': 'chat completions stand-in'
+        },
+        'results': [{
+            'name': 'pipeline',
+            'operations': {
+                'collect': {
+                    'seconds': round(collect_seconds, 3),
+                    'papers': collected,
+                    'papers_per_min': _rate(collected, collect_seconds)
+                },
+                'process': {
+                    'seconds': round(process_seconds, 3),
+                    'papers': processed,
+                    'embedded': processing_stats['embedded'],
+                    'errors': processing_stats['errors'],
+                    'papers_per_min': _rate(processed, process_seconds)
+                },
+                'end_to_end': {
+                    'seconds': round(total_seconds, 3),
+                    'papers': processed,
+                    'papers_per_min': _rate(processed, total_seconds)
+                }
+            },
+            'api_calls': {
+                'arxiv': arxiv_server.stats(),
+                'openai': api_calls
+            },
+            'peak_rss_mb': round(peak_rss_mb(), 1)
+        }]
+    }
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark collection and processing throughput')
+    parser.add_argument('--papers-per-category', type=int, default=50,
+                        help='Entries served per arXiv category feed')
+    parser.add_argument('--feeds-dir', type=str,
+                        help='Directory of recorded Atom feeds (<category>.xml) to replay')
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help='Base latency of each OpenAI call in seconds')
+    parser.add_argument('--jitter', type=float, default=0.2,
+                        help='Maximum extra random latency of each OpenAI call in seconds')
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='Probability that an OpenAI call is answered with 429')
+    parser.add_argument('--dim', type=int, default=3072, help='Embedding dimensionality')
+    parser.add_argument('--arxiv-delay', type=float, default=0.0,
+                        help='Override SOURCES["arxiv"]["request_delay"]')
+    parser.add_argument('--processing-delay', type=float, default=0.0,
+                        help='Override PROCESSING_CONFIG["request_delay"]')
+    parser.add_argument('--process-limit', type=int, default=0,
+                        help='Maximum papers to process (default: all collected)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', type=str, default='pipeline_benchmark.json',
+                        help='File to write JSON results to')
+    parser.add_argument('--compare', type=str, help='Baseline results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative slowdown before a regression is reported')
+    args = parser.parse_args()
+
+    results = run_pipeline(args)
+    entry = results['results'][0]
+
+    print("\nPipeline throughput:")
+    for stage, stats in entry['operations'].items():
+        print(f"  {stage:<12} {stats['seconds']:>9.2f}s  {stats['papers']:>6} papers  "
+              f"{stats['papers_per_min']:>9.2f} papers/min")
+    print(f"  arXiv calls:  {entry['api_calls']['arxiv']}")
+    print(f"  OpenAI calls: {entry['api_calls']['openai']}")
+
+    write_results(results, args.output)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, threshold=args.threshold, metric='seconds')
+        if regressions:
+            print(f"{len(regressions)} regression(s) found")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
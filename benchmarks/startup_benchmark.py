@@ -0,0 +1,143 @@
+"""
+Startup time benchmark for the CLI and the API module.
+
+Runs each command in a fresh interpreter several times, checks the median
+wall time against a budget and verifies with -X importtime that light
+commands do not import the OpenAI, agents or numpy stacks.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 10 --output startup.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_utils import ROOT_DIR, summarize_timings, run_metadata, write_results, compare_results
+
+HEAVY_MODULES = {'openai', 'agents', 'numpy', 'requests'}
+
+# name: (command arguments, startup budget in ms, modules that must not be imported)
+COMMANDS = {
+    'main.py --help': (['src/main.py', '--help'], 300, HEAVY_MODULES),
+    'main.py list': (['src/main.py', 'list', '--limit', '1'], 400, HEAVY_MODULES),
+    'main.py status': (['src/main.py', 'status'], 400, HEAVY_MODULES),
+    'main.py profile': (['src/main.py', 'profile', '--limit', '1'], 400, HEAVY_MODULES),
+    'import api': (['-c', 'import src.backend.api'], 1000, {'openai', 'agents'}),
+}
+
+
+def _run(args):
+    """Run the interpreter with arguments from the project root."""
+    return subprocess.run(
+        [sys.executable] + args, cwd=ROOT_DIR,
+        capture_output=True, text=True
+    )
+
+
+def imported_modules(args):
+    """Run a command once with -X importtime.
+
+    Args:
+        args (list): Interpreter arguments
+
+    Returns:
+        tuple: (set of top-level module names, list of (cumulative_us, module) slowest imports)
+    """
+    result = _run(['-X', 'importtime'] + args)
+    modules = set()
+    costs = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if not parts[1].isdigit():
+            continue
+        name = parts[2]
+        modules.add(name.split('.')[0])
+        costs.append((int(parts[1]), name))
+    costs.sort(reverse=True)
+    return modules, costs[:5]
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Measure CLI and API startup time')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per command')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='Multiply every budget, e.g. 2.0 on slow machines')
+    parser.add_argument('--output', type=str, default='startup_benchmark.json',
+                        help='File to write JSON results to')
+    parser.add_argument('--compare', type=str, help='Baseline results file to compare against')
+    args = parser.parse_args()
+
+    operations = {}
+    failures = []
+
+    for name, (command, budget_ms, forbidden) in COMMANDS.items():
+        # Warm the bytecode cache before timing
+        _run(command)
+
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            _run(command)
+            timings.append(time.perf_counter() - start)
+
+        stats = summarize_timings(timings)
+        modules, slowest = imported_modules(command)
+        heavy = sorted(forbidden & modules)
+        budget = budget_ms * args.budget_scale
+
+        stats['budget_ms'] = budget
+        stats['heavy_imports'] = heavy
+        stats['slowest_imports'] = [{'module': module, 'cumulative_ms': us / 1000} for us, module in slowest]
+        operations[name] = stats
+
+        status = "ok"
+        if stats['p50_ms'] > budget:
+            status = "OVER BUDGET"
+            failures.append(f"{name}: {stats['p50_ms']:.0f} ms > {budget:.0f} ms")
+        if heavy:
+            status = "HEAVY IMPORTS"
+            failures.append(f"{name}: imports {', '.join(heavy)}")
+
+        print(f"{name:<18} p50 {stats['p50_ms']:>8.1f} ms  p95 {stats['p95_ms']:>8.1f} ms  "
+              f"budget {budget:>6.0f} ms  {status}")
+        for entry in stats['slowest_imports']:
+            print(f"    {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+
+    results = {
+        'benchmark': 'startup',
+        'meta': run_metadata(),
+        'results': [{'name': 'startup', 'operations': operations}]
+    }
+    write_results(results, args.output)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        failures.extend(
+            f"{r['operation']}: regressed {r['change']:+.0%}"
+            for r in compare_results(results, baseline, metric='p50_ms')
+        )
+
+    if failures:
+        print("\nStartup budget check failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+
+    print("\nAll commands are within their startup budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,14 +10,22 @@ ROOT_DIR = Path(__file__).parent.parent
 DATA_DIR = ROOT_DIR / "data"
 SRC_DIR = ROOT_DIR / "src"
 
-# Create directories if they don't exist
-DATA_DIR.mkdir(exist_ok=True)
-(DATA_DIR / "papers").mkdir(exist_ok=True)
-(DATA_DIR / "embeddings").mkdir(exist_ok=True)
-(DATA_DIR / "db").mkdir(exist_ok=True)
 
-# Database configuration
-DB_PATH = DATA_DIR / "db" / "research.db"
+def ensure_data_dirs():
+    """Create the data directories if they don't exist.
+
+    Called by the entry points rather than at import time, so that importing
+    the configuration has no filesystem side effects.
+    """
+    DATA_DIR.mkdir(exist_ok=True)
+    (DATA_DIR / "papers").mkdir(exist_ok=True)
+    (DATA_DIR / "embeddings").mkdir(exist_ok=True)
+    (DATA_DIR / "db").mkdir(exist_ok=True)
+
+
+# Database configuration (ESG_DB_PATH overrides the location, e.g. for benchmarks)
+DEFAULT_DB_PATH = DATA_DIR / "db" / "research.db"
+DB_PATH = Path(os.environ.get("ESG_DB_PATH", DEFAULT_DB_PATH))
 
 # API Keys (preferably load from environment variables)
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
@@ -28,7 +36,8 @@ SOURCES = {
         "categories": ["q-fin", "econ", "stat.AP"],  # Finance, Economics, Applied Statistics
         "max_results": 50,
         "sort_by": "submittedDate",
-        "sort_order": "descending"
+        "sort_order": "descending",
+        "request_delay": 3  # Seconds to wait between category requests
     },
     "ssrn": {
         "topics": ["ESG", "Environmental Finance", "Social Finance", "Governance", 
@@ -43,13 +52,243 @@ AGENT_CONFIG = {
     "max_tokens": 4000
 }
 
+# Summary history: re-processing a paper adds a summary, and only the newest
+# keep_versions summaries per paper are kept (0 keeps all)
+SUMMARY_CONFIG = {
+    "keep_versions": int(os.environ.get("SUMMARY_KEEP_VERSIONS", "3"))
+}
+
+# Prompt assembly (see src/backend/prompts.py)
+PROMPT_CONFIG = {
+    # Maximum prompt tokens (excluding the system instructions) per call
+    "summary_budget": int(os.environ.get("PROMPT_SUMMARY_BUDGET", "1500")),
+    "brief_budget": int(os.environ.get("PROMPT_BRIEF_BUDGET", "6000")),
+    # tiktoken encoding used to count tokens, if tiktoken is installed
+    "encoding": "o200k_base",
+    # Compaction of the paper context
+    "max_authors": 5,
+    "max_key_findings": 5,
+    # Smallest shortened paper entry worth adding to a brief
+    "min_paper_tokens": 80
+}
+
+# Shared OpenAI HTTP client configuration (connection pool kept alive between calls)
+OPENAI_CLIENT_CONFIG = {
+    "max_connections": int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100")),
+    "max_keepalive_connections": int(os.environ.get("OPENAI_MAX_KEEPALIVE", "20")),
+    "keepalive_expiry": 120,  # Seconds an idle connection is kept open
+    "timeout": 120,
+    "max_retries": 2,
+    "warm_up_request": True  # Open a connection at startup with a cheap API call
+}
+
+# Processing configuration
+PROCESSING_CONFIG = {
+    "request_delay": 2  # Seconds to wait between papers to be nice to the API
+}
+
 # Embedding configuration
 EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_CONFIG = {
+    # Ask the model for shortened embeddings (its `dimensions` option); None keeps
+    # the full 3072. Changing this re-embeds nothing: papers keep their old
+    # vectors until they are processed again.
+    "dimensions": int(os.environ.get("EMBEDDING_DIMENSIONS", "0")) or None
+}
+
+# Search configuration
+SEARCH_CONFIG = {
+    # "vector", "keyword" or "hybrid" when a request doesn't choose a mode
+    "default_mode": os.environ.get("SEARCH_MODE", "vector"),
+    # Candidates taken from each ranking before they are fused
+    "candidates": 50,
+    # Reciprocal rank fusion constant: score = sum of 1 / (rrf_k + rank)
+    "rrf_k": 60,
+    # Threads running keyword searches while the query is being embedded
+    "keyword_threads": 8,
+    # Only scan the papers of the topics nearest to the query (0 scans all papers)
+    "topic_probes": int(os.environ.get("SEARCH_TOPIC_PROBES", "0"))
+}
 
 # Schedule configuration (in minutes)
 SCHEDULE = {
     "data_collection": 1440,  # Daily
     "data_processing": 360,   # Every 6 hours
+    "topic_clustering": 360,  # Every 6 hours
+    "feed_generation": 1440,  # Daily
+    "storage_compaction": 1440,  # Daily
+}
+
+# Scheduler execution (see src/backend/scheduler.py)
+SCHEDULER_CONFIG = {
+    # Threads running scheduled jobs, so a long job doesn't delay the others
+    "workers": 2,
+    # What a run does when the same job is already running: "skip" it, or
+    # "queue" it to start when the running one finishes (at most one waits)
+    "overlap_policy": {
+        "data_collection": "skip",
+        "data_processing": "queue",
+        "topic_clustering": "skip",
+        "feed_generation": "skip",
+        "storage_compaction": "skip"
+    },
+    # Seconds after which a running job is reported as stuck
+    "stuck_after": {
+        "data_collection": 3600,
+        "data_processing": 3 * 3600,
+        "topic_clustering": 3600,
+        "feed_generation": 3600,
+        "storage_compaction": 3 * 3600
+    }
+}
+
+# Near-duplicate detection of collected papers (see src/backend/dedup.py)
+DEDUP_CONFIG = {
+    # Words per shingle of the normalized title and abstract
+    "shingle_size": 3,
+    # MinHash permutations, split into LSH bands of num_perm / bands rows
+    "num_perm": 128,
+    "bands": 32,
+    # Estimated Jaccard similarity from which papers count as duplicates
+    "threshold": 0.8,
+    "seed": 1
+}
+
+# Event-driven processing of newly collected papers (see src/backend/events.py)
+EVENTS_CONFIG = {
+    # Start processing collected papers right away instead of waiting for the next poll
+    "enabled": os.environ.get("PAPER_EVENTS", "1") != "0",
+    # "memory" (in-process) or "sqlite" (survives restarts, shared between processes)
+    "backend": os.environ.get("PAPER_EVENTS_BACKEND", "memory"),
+    # Papers processed per micro-batch, and seconds to wait for a batch to fill
+    "batch_size": 10,
+    "max_wait": 5,
+    # Seconds between checks of the SQLite queue for events from other processes
+    "poll_interval": 10
+}
+
+# Processing workers sharing the database through work leases (see src/backend/worker.py)
+WORKER_CONFIG = {
+    # Seconds a claimed paper stays reserved without a heartbeat
+    "lease_seconds": int(os.environ.get("WORKER_LEASE_SECONDS", "300")),
+    "heartbeat_interval": 60,
+    # Papers claimed per stage and batch
+    "batch_size": int(os.environ.get("WORKER_BATCH_SIZE", "10")),
+    # Seconds to wait before claiming again when there is no work
+    "poll_interval": 30,
+    # Failed claims after which a paper is given up on, and the wait between them
+    "max_attempts": 3,
+    "retry_delay": 600
+}
+
+# API server configuration
+API_CONFIG = {
+    "host": os.environ.get("API_HOST", "0.0.0.0"),
+    "port": int(os.environ.get("API_PORT", "5001")),
+    # ASGI worker processes (see src/backend/asgi.py)
+    "workers": int(os.environ.get("API_WORKERS", "1")),
+    # Threads per worker for SQLite calls and the routes served through Flask
+    "io_threads": int(os.environ.get("API_IO_THREADS", "64")),
+    # Threads per worker writing research briefs with the agent in ASGI mode,
+    # kept apart from io_threads so long briefs can't starve the other routes
+    "brief_threads": int(os.environ.get("API_BRIEF_THREADS", "16"))
+}
+
+# Memory-mapped embedding matrix used by search (see src/backend/embedding_store.py)
+EMBEDDING_STORE_CONFIG = {
+    "enabled": os.environ.get("EMBEDDING_STORE", "1") != "0",
+    # Store of the default database; databases elsewhere keep theirs next to the file
+    "dir": DATA_DIR / "embeddings",
+    # Rebuild instead of appending once this share of rows has been superseded
+    "rebuild_stale_fraction": 0.25,
+    # First-pass scan on the leading dimensions only (None scans all of them)
+    "scan_dimensions": int(os.environ.get("EMBEDDING_SCAN_DIMENSIONS", "0")) or None,
+    # First-pass precision: "none" (float32) or "int8" (one scale per row)
+    "quantization": os.environ.get("EMBEDDING_QUANTIZATION", "none"),
+    # Candidates re-scored with the full float32 vectors after a reduced scan (0 disables)
+    "rerank_candidates": int(os.environ.get("EMBEDDING_RERANK_CANDIDATES", "100")),
+    # Megabytes of rows scored per matrix product, bounds temporary memory during search
+    "chunk_mb": 64
+}
+
+# Precomputed related papers (see src/backend/related.py)
+RELATED_CONFIG = {
+    # Neighbours kept per paper
+    "k": int(os.environ.get("RELATED_K", "10")),
+    # Papers scored per matrix product, in full rebuilds and incremental updates
+    "chunk_rows": 1024
+}
+
+# Topic clustering of the embeddings (see src/backend/topics.py)
+TOPICS_CONFIG = {
+    "num_topics": int(os.environ.get("TOPICS_COUNT", "50")),
+    # Papers per mini-batch k-means update
+    "batch_size": 1024,
+    # Passes over all papers when the topics are rebuilt
+    "rebuild_passes": 5,
+    # Summary keywords kept per topic; the first three form its label
+    "label_keywords": 8,
+    "seed": 0
+}
+
+# Personalized paper feed built from the logged queries (see src/backend/feed.py)
+FEED_CONFIG = {
+    # Queries of this many days shape the interest profiles, recent ones weigh more
+    "query_days": int(os.environ.get("FEED_QUERY_DAYS", "30")),
+    "half_life_days": 7,
+    # Distinct queries embedded, by weight
+    "max_queries": 200,
+    # Queries at least this similar are merged into one interest profile
+    "merge_similarity": 0.85,
+    "max_profiles": 20,
+    # Papers published within this many days are candidates for the feed
+    "paper_days": int(os.environ.get("FEED_PAPER_DAYS", "14")),
+    "size": 100,
+    # Papers less similar than this to every profile are left out
+    "min_similarity": 0.3
+}
+
+# Storage compaction of the database (see src/backend/maintenance.py)
+COMPACTION_CONFIG = {
+    # Rows deleted per write transaction, and seconds to pause between them
+    # so the API and the processing jobs get the database in between
+    "batch_size": 500,
+    "pause": 0.05,
+    # Free pages returned to the file system per incremental vacuum step
+    "vacuum_pages": 2048,
+    # Rows ANALYZE samples per index (0 reads every row)
+    "analysis_limit": 1000
+}
+
+# Response caching for the paper endpoints (see src/backend/response_cache.py)
+RESPONSE_CACHE_CONFIG = {
+    "max_entries": int(os.environ.get("RESPONSE_CACHE_ENTRIES", "512")),
+    "max_bytes": 64 * 1024 * 1024,
+    # Seconds a read of the database generation counter is reused. Writes made
+    # by this process are seen at once, writes by other processes within this.
+    "generation_ttl": float(os.environ.get("RESPONSE_CACHE_GENERATION_TTL", "1.0"))
+}
+
+# API response compression (see src/backend/serialization.py)
+COMPRESSION_CONFIG = {
+    # Bodies smaller than this are sent uncompressed
+    "min_size": int(os.environ.get("API_COMPRESS_MIN_SIZE", "1024")),
+    "gzip_level": 6,
+    "brotli_quality": 5
+}
+
+# Request profiling configuration (see src/backend/profiling.py)
+PROFILING_CONFIG = {
+    # Profile matching routes for every request (sampled) when API_PROFILE=1
+    "enabled": os.environ.get("API_PROFILE", "") == "1",
+    "routes": [r for r in os.environ.get("API_PROFILE_ROUTES", "/api/search,/api/papers").split(",") if r],
+    "sample_rate": float(os.environ.get("API_PROFILE_SAMPLE_RATE", "1.0")),
+    # Any single request sending X-Profile-Token with this value is profiled
+    "token": os.environ.get("API_PROFILE_TOKEN", ""),
+    # Only keep profiles of requests at least this slow
+    "min_duration_ms": float(os.environ.get("API_PROFILE_MIN_MS", "0")),
+    "tracemalloc_top": 25,
+    "dir": DATA_DIR / "profiles"
 }
 
 # ESG & Finance specific terms for improved model context
@@ -4,34 +4,176 @@ This module uses OpenAI agents to process papers, including summarization,
 categorization, keyword extraction, and recommendation.
 """
 import sys
+import asyncio
+import functools
 import json
 from pathlib import Path
 from datetime import datetime
-import numpy as np
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the project root to Python path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from agents import Agent, Computer
 from agents.agent_output import AgentOutputSchema
 
-from config.config import OPENAI_API_KEY, AGENT_CONFIG, EMBEDDING_MODEL, ESG_FINANCE_TERMS
+from config.config import (
+    OPENAI_API_KEY, AGENT_CONFIG, EMBEDDING_MODEL, EMBEDDING_CONFIG, ESG_FINANCE_TERMS,
+    PROCESSING_CONFIG, OPENAI_CLIENT_CONFIG, SEARCH_CONFIG, WORKER_CONFIG, API_CONFIG
+)
 from src.backend.database import (
-    get_papers, get_paper_with_summary, add_summary, add_embedding,
-    search_by_embedding
+    get_paper_with_summary, add_summary, add_embedding, claim_work, release_lease,
+    search_by_embedding, search_by_keywords, search_hybrid, search_keyword_papers,
+    SEARCH_MODES
 )
+from src.backend.metrics import track_openai_call, track_openai_call_async
+from src.backend.prompts import build_summary_prompt, build_brief_prompt
+
+# OpenAI clients and shared agent, created on first use
+_client = None
+_async_client = None
+_agent = None
+_agent_error = None
+_warm_up_error = None
+_client_lock = threading.Lock()
+_agent_lock = threading.Lock()
+
+# Runs keyword searches while the query embedding is being computed
+_keyword_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_CONFIG["keyword_threads"], thread_name_prefix="keyword-search"
+)
+
+# Runs the blocking agent calls of async research briefs, apart from the
+# event loop's default pool that serves the SQLite calls
+_brief_executor = ThreadPoolExecutor(
+    max_workers=API_CONFIG["brief_threads"], thread_name_prefix="research-brief"
+)
+
+# Extra arguments for embedding requests (shortened embeddings if configured)
+EMBEDDING_OPTIONS = {"dimensions": EMBEDDING_CONFIG["dimensions"]} if EMBEDDING_CONFIG["dimensions"] else {}
+
+def get_openai_client():
+    """Get the shared OpenAI client, creating it on first use.
+    
+    The client keeps a pool of HTTP connections alive between calls, so
+    repeated requests reuse the same TLS connections to the API.
+    
+    Returns:
+        OpenAI: OpenAI client
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_CLIENT_CONFIG["max_connections"],
+                        max_keepalive_connections=OPENAI_CLIENT_CONFIG["max_keepalive_connections"],
+                        keepalive_expiry=OPENAI_CLIENT_CONFIG["keepalive_expiry"]
+                    ),
+                    timeout=OPENAI_CLIENT_CONFIG["timeout"]
+                )
+                _client = OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    http_client=http_client,
+                    max_retries=OPENAI_CLIENT_CONFIG["max_retries"]
+                )
+    return _client
+
+def get_async_openai_client():
+    """Get the shared async OpenAI client used by the ASGI server.
+    
+    Returns:
+        AsyncOpenAI: Async OpenAI client
+    """
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_CLIENT_CONFIG["max_connections"],
+                        max_keepalive_connections=OPENAI_CLIENT_CONFIG["max_keepalive_connections"],
+                        keepalive_expiry=OPENAI_CLIENT_CONFIG["keepalive_expiry"]
+                    ),
+                    timeout=OPENAI_CLIENT_CONFIG["timeout"]
+                )
+                _async_client = AsyncOpenAI(
+                    api_key=OPENAI_API_KEY,
+                    http_client=http_client,
+                    max_retries=OPENAI_CLIENT_CONFIG["max_retries"]
+                )
+    return _async_client
+
+def get_agent():
+    """Get the shared paper processing agent, creating it on first use.
+    
+    The agent holds no per-request state, so one instance is shared by the
+    API routes, the CLI and the processing jobs across threads.
+    
+    Returns:
+        PaperProcessingAgent: Agent instance
+    """
+    global _agent, _agent_error
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                try:
+                    _agent = PaperProcessingAgent()
+                    _agent_error = None
+                except Exception as e:
+                    _agent_error = str(e)
+                    raise
+    return _agent
+
+def warm_up_agent():
+    """Create the shared agent and open a connection to the OpenAI API.
+    
+    Returns:
+        bool: True if the agent is ready
+    """
+    global _warm_up_error
+    try:
+        agent = get_agent()
+    except Exception as e:
+        print(f"Error creating paper processing agent: {e}")
+        return False
+    
+    if OPENAI_CLIENT_CONFIG["warm_up_request"]:
+        try:
+            # A cheap call that leaves a kept-alive TLS connection in the pool
+            agent.client.models.retrieve(EMBEDDING_MODEL)
+            _warm_up_error = None
+        except Exception as e:
+            # Not fatal: the first real call will open the connection instead
+            _warm_up_error = str(e)
+            print(f"Warning: OpenAI warm-up request failed: {e}")
+    
+    print("Paper processing agent is ready")
+    return True
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+def agent_status():
+    """Get the readiness of the shared agent.
+    
+    Returns:
+        dict: 'ready' flag, the agent creation error and the warm-up error, if any
+    """
+    return {
+        'ready': _agent is not None,
+        'error': _agent_error,
+        'warm_up_error': _warm_up_error
+    }
 
 class PaperProcessingAgent:
     """Agent for processing papers using OpenAI."""
     
     def __init__(self):
         """Initialize the paper processing agent."""
-        self.client = client
+        self.client = get_openai_client()
         
         # Set up the agent with the ESG & Finance context
         self.esg_finance_context = (
@@ -67,46 +209,13 @@ class PaperProcessingAgent:
         """
         print(f"Summarizing paper: {paper['title']}")
 
-        # Prepare the prompt
-        prompt = f"""
-        # Paper Analysis Task
-        
-        ## Paper Information
-        Title: {paper['title']}
-        Authors: {", ".join(paper['authors']) if isinstance(paper['authors'], list) else paper['authors']}
-        Abstract: {paper['abstract']}
-        
-        ## Analysis Instructions
-        Analyze this academic paper from an ESG and Finance perspective.
-        
-        Please provide:
-        1. A concise summary (3-5 sentences)
-        2. ESG relevance score (0-100)
-        3. Finance relevance score (0-100) 
-        4. 3-5 key findings or contributions
-        5. 5-8 relevant keywords
-        
-        Format your response as a JSON object with these keys:
-        - summary: string
-        - esg_relevance_score: number
-        - finance_relevance_score: number  
-        - key_findings: list of strings
-        - keywords: list of strings
-        
-        Consider these ESG focus areas:
-        - Environmental: Climate change, resource use, pollution, biodiversity
-        - Social: Human capital, product liability, stakeholder opposition
-        - Governance: Corporate governance, corporate behavior
-        
-        And these Finance focus areas:
-        - Asset pricing, portfolio management, risk management
-        - Corporate finance, sustainable investing, green bonds
-        - Financial markets, ESG investing, impact measurement
-        """
+        # Prepare the prompt, instructions first so they stay in the cached prefix
+        prompt, prompt_stats = build_summary_prompt(paper)
+        print(f"Summary prompt: {prompt_stats['tokens']} tokens ({prompt_stats['saved_tokens']} saved)")
 
         # Execute the agent task
         try:
-            result = self.agent.run(prompt)
+            result = track_openai_call("summarize", self.agent.run, prompt)
             
             # Parse the output and extract JSON
             json_output = self._extract_json_from_response(result)
@@ -145,9 +254,12 @@ class PaperProcessingAgent:
             text_to_embed = f"{paper['title']} {paper['abstract']}"
             
             # Get embedding
-            response = self.client.embeddings.create(
+            response = track_openai_call(
+                "embed",
+                self.client.embeddings.create,
                 input=text_to_embed,
-                model=EMBEDDING_MODEL
+                model=EMBEDDING_MODEL,
+                **EMBEDDING_OPTIONS
             )
             
             # Extract the embedding vector
@@ -166,83 +278,228 @@ class PaperProcessingAgent:
             print(f"Error computing embedding for paper {paper['id']}: {e}")
             return None
     
-    def generate_research_brief(self, query, num_results=5):
+    def embed_query(self, query):
+        """Compute the embedding of a search query.
+        
+        Args:
+            query (str): Query text
+            
+        Returns:
+            list: Embedding vector
+        """
+        response = track_openai_call(
+            "embed_query",
+            self.client.embeddings.create,
+            input=query,
+            model=EMBEDDING_MODEL,
+            **EMBEDDING_OPTIONS
+        )
+        return response.data[0].embedding
+    
+    def embed_queries(self, queries):
+        """Compute the embeddings of several queries in one request.
+        
+        Args:
+            queries (list): Query texts
+            
+        Returns:
+            list: Embedding vectors, in the order of the queries
+        """
+        response = track_openai_call(
+            "embed_query",
+            self.client.embeddings.create,
+            input=list(queries),
+            model=EMBEDDING_MODEL,
+            **EMBEDDING_OPTIONS
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    
+    async def aembed_query(self, query):
+        """Compute the embedding of a search query without blocking the event loop.
+        
+        Args:
+            query (str): Query text
+            
+        Returns:
+            list: Embedding vector
+        """
+        response = await track_openai_call_async(
+            "embed_query",
+            get_async_openai_client().embeddings.create,
+            input=query,
+            model=EMBEDDING_MODEL,
+            **EMBEDDING_OPTIONS
+        )
+        return response.data[0].embedding
+    
+    def search(self, query, limit=5, mode=None, filters=None):
+        """Search for papers relevant to a query.
+        
+        In hybrid mode the keyword search runs in a background thread while
+        the query is embedded, so it adds nothing to the latency of the
+        vector search; the two rankings are then fused with reciprocal rank
+        fusion.
+        
+        Args:
+            query (str): Query text
+            limit (int): Maximum number of results
+            mode (str): 'vector', 'keyword' or 'hybrid', defaults to SEARCH_CONFIG
+            filters (dict): Normalized search filters (see database.normalize_filters)
+            
+        Returns:
+            list: Papers with their scores
+        """
+        mode = mode or SEARCH_CONFIG["default_mode"]
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        if mode == 'keyword':
+            return search_keyword_papers(query, limit=limit, filters=filters)
+        if mode == 'vector':
+            return search_by_embedding(self.embed_query(query), limit=limit, filters=filters)
+        
+        keyword_future = _keyword_executor.submit(
+            search_by_keywords, query, SEARCH_CONFIG["candidates"], filters=filters
+        )
+        try:
+            query_embedding = self.embed_query(query)
+        except Exception:
+            keyword_future.cancel()
+            raise
+        return search_hybrid(query_embedding, keyword_future.result(), limit=limit, filters=filters)
+    
+    async def asearch(self, query, limit=5, mode=None, filters=None):
+        """Search for papers relevant to a query without blocking the event loop.
+        
+        Args:
+            query (str): Query text
+            limit (int): Maximum number of results
+            mode (str): 'vector', 'keyword' or 'hybrid', defaults to SEARCH_CONFIG
+            filters (dict): Normalized search filters (see database.normalize_filters)
+            
+        Returns:
+            list: Papers with their scores
+        """
+        mode = mode or SEARCH_CONFIG["default_mode"]
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        loop = asyncio.get_running_loop()
+        if mode == 'keyword':
+            return await loop.run_in_executor(
+                None, functools.partial(search_keyword_papers, query, limit=limit, filters=filters)
+            )
+        
+        if mode == 'vector':
+            query_embedding = await self.aembed_query(query)
+            return await loop.run_in_executor(
+                None, functools.partial(search_by_embedding, query_embedding, limit=limit, filters=filters)
+            )
+        
+        keyword_future = loop.run_in_executor(
+            None, functools.partial(search_by_keywords, query, SEARCH_CONFIG["candidates"], filters=filters)
+        )
+        try:
+            query_embedding = await self.aembed_query(query)
+        except BaseException:
+            # Also on cancellation: drop the keyword query if it hasn't started
+            # and retrieve its outcome so no exception goes unobserved
+            keyword_future.cancel()
+            await asyncio.gather(keyword_future, return_exceptions=True)
+            raise
+        keyword_results = await keyword_future
+        return await loop.run_in_executor(
+            None, functools.partial(search_hybrid, query_embedding, keyword_results, limit=limit, filters=filters)
+        )
+    
+    def generate_research_brief(self, query, num_results=5, mode=None, filters=None):
         """Generate a research brief based on a user query.
         
         Args:
             query (str): User's research query
             num_results (int): Number of papers to include
+            mode (str): Search mode used to find the papers (see search)
+            filters (dict): Normalized search filters restricting the papers
             
         Returns:
             dict: Research brief data
         """
         print(f"Generating research brief for query: {query}")
         
-        # First, generate an embedding for the query
         try:
-            query_embedding_response = self.client.embeddings.create(
-                input=query,
-                model=EMBEDDING_MODEL
-            )
-            query_embedding = query_embedding_response.data[0].embedding
-            
-            # Search for similar papers
-            similar_papers = search_by_embedding(query_embedding, limit=num_results)
+            # Search for relevant papers
+            similar_papers = self.search(query, limit=num_results, mode=mode, filters=filters)
             
             if not similar_papers:
-                return {
-                    'query': query,
-                    'timestamp': datetime.now().isoformat(),
-                    'message': "No relevant papers found for your query."
-                }
-                
-            # Prepare paper information for the research brief
-            paper_info = []
-            for paper in similar_papers:
-                paper_info.append({
-                    'title': paper['title'],
-                    'authors': paper['authors'],
-                    'summary': paper.get('summary', {}).get('summary', 'No summary available'),
-                    'key_findings': paper.get('summary', {}).get('key_findings', []),
-                    'url': paper['url']
-                })
-                
-            # Prepare the prompt for the research brief
-            prompt = f"""
-            # Research Brief Generation Task
-            
-            ## Query
-            "{query}"
+                return self._no_papers_brief(query)
             
-            ## Relevant Papers
-            {json.dumps(paper_info, indent=2)}
+            return self._write_brief(query, similar_papers)
             
-            ## Instructions
-            Generate a comprehensive research brief based on the user's query and the relevant papers provided.
-            
-            Your brief should include:
-            1. An executive summary (2-3 paragraphs)
-            2. Key themes and findings across the papers
-            3. Research gaps or opportunities
-            4. Practical implications for ESG and Finance professionals
-            5. Recommended next steps or areas for further research
+        except Exception as e:
+            print(f"Error generating research brief: {e}")
+            return {
+                'query': query,
+                'timestamp': datetime.now().isoformat(),
+                'error': str(e)
+            }
+    
+    def _write_brief(self, query, papers):
+        """Write the research brief of the papers found for a query.
+        
+        Both serving modes generate the brief here, with the computer agent.
+        
+        Args:
+            query (str): User's research query
+            papers (list): Papers with summaries
             
-            Format your response as a well-structured research brief with these sections clearly labeled.
-            Keep the focus on ESG and Finance implications.
-            """
+        Returns:
+            dict: Research brief data
+        """
+        # Prepare paper information and the prompt for the research brief
+        paper_info = self._brief_paper_info(papers)
+        prompt, prompt_stats = build_brief_prompt(query, paper_info)
+        
+        # Execute the computer task for detailed analysis
+        result = track_openai_call("brief", self.computer.run, prompt)
+        
+        return {
+            'query': query,
+            'papers': paper_info,
+            'brief': result,
+            'prompt_tokens': prompt_stats,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    async def agenerate_research_brief(self, query, num_results=5, mode=None, filters=None):
+        """Generate a research brief without blocking the event loop.
+        
+        Used by the ASGI server. The search embeds the query with the async
+        client; the brief is written by the same agent call as in
+        generate_research_brief, so both serving modes produce it the same
+        way. That call blocks, so it runs in its own pool of
+        API_CONFIG['brief_threads'] threads: briefs beyond that wait without
+        holding a thread, and never take the threads the other routes use
+        for SQLite.
+        
+        Args:
+            query (str): User's research query
+            num_results (int): Number of papers to include
+            mode (str): Search mode used to find the papers (see search)
+            filters (dict): Normalized search filters restricting the papers
             
-            # Execute the computer task for detailed analysis
-            result = self.computer.run(prompt)
+        Returns:
+            dict: Research brief data
+        """
+        print(f"Generating research brief for query: {query}")
+        
+        try:
+            similar_papers = await self.asearch(query, limit=num_results, mode=mode, filters=filters)
             
-            # Create research brief data
-            research_brief = {
-                'query': query,
-                'papers': paper_info,
-                'brief': result,
-                'timestamp': datetime.now().isoformat()
-            }
+            if not similar_papers:
+                return self._no_papers_brief(query)
             
-            return research_brief
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_brief_executor, self._write_brief, query, similar_papers)
             
         except Exception as e:
             print(f"Error generating research brief: {e}")
@@ -252,6 +509,34 @@ class PaperProcessingAgent:
                 'error': str(e)
             }
     
+    def _no_papers_brief(self, query):
+        """Build the response for a query without relevant papers."""
+        return {
+            'query': query,
+            'timestamp': datetime.now().isoformat(),
+            'message': "No relevant papers found for your query."
+        }
+    
+    def _brief_paper_info(self, papers):
+        """Extract the paper information included in a research brief.
+        
+        Args:
+            papers (list): Papers with summaries
+            
+        Returns:
+            list: Paper information dictionaries
+        """
+        paper_info = []
+        for paper in papers:
+            paper_info.append({
+                'title': paper['title'],
+                'authors': paper['authors'],
+                'summary': paper.get('summary', {}).get('summary', 'No summary available'),
+                'key_findings': paper.get('summary', {}).get('key_findings', []),
+                'url': paper['url']
+            })
+        return paper_info
+    
     def _extract_json_from_response(self, response):
         """Extract JSON from agent response.
         
@@ -288,74 +573,104 @@ class PaperProcessingAgent:
             return None
 
 
-def process_new_papers(limit=10):
-    """Process newly added papers that don't have summaries or embeddings.
+def process_new_papers(limit=10, worker_id=None, paper_ids=None):
+    """Process papers that don't have summaries or embeddings yet.
+    
+    Papers are claimed per stage through work leases, so several workers
+    (or a worker and the scheduler) can run this at the same time without
+    processing the same paper twice.
     
     Args:
-        limit (int): Maximum number of papers to process
+        limit (int): Maximum number of papers to claim per stage
+        worker_id (str): Id of the calling worker, generated if None
+        paper_ids (list): Only process these papers (published by collection), if given
         
     Returns:
         dict: Statistics about processed papers
     """
+    from src.backend.worker import LeaseHeartbeat, make_worker_id
+    
     results = {
+        'claimed': 0,
         'summarized': 0,
         'embedded': 0,
         'errors': 0,
         'timestamp': datetime.now().isoformat()
     }
     
-    # Get papers that need processing
-    papers = get_papers(limit=limit)
-    if not papers:
+    # Claim papers that need processing
+    worker_id = worker_id or make_worker_id()
+    lease_options = {
+        'lease_seconds': WORKER_CONFIG["lease_seconds"],
+        'max_attempts': WORKER_CONFIG["max_attempts"],
+        'paper_ids': paper_ids
+    }
+    claims = {
+        'summarize': claim_work('summarize', worker_id, limit=limit, **lease_options),
+        'embed': claim_work('embed', worker_id, limit=limit, **lease_options)
+    }
+    results['claimed'] = len(set(claims['summarize']) | set(claims['embed']))
+    if not results['claimed']:
         print("No papers to process")
         return results
         
-    # Initialize the agent
-    agent = PaperProcessingAgent()
+    # Use the shared agent
+    agent = get_agent()
     
-    # Process each paper
-    for paper in papers:
-        try:
-            # Check if this paper already has a summary and embedding
-            paper_with_data = get_paper_with_summary(paper['id'])
+    with LeaseHeartbeat(worker_id, lease_seconds=WORKER_CONFIG["lease_seconds"]):
+        # Process each paper, summary first, then embedding
+        for paper_id in dict.fromkeys(claims['summarize'] + claims['embed']):
+            paper = get_paper_with_summary(paper_id)
             
-            if paper_with_data and 'summary' in paper_with_data:
-                # Summary exists, skip
-                print(f"Paper {paper['id']} already has a summary, skipping...")
-                continue
+            for stage in ('summarize', 'embed'):
+                if paper_id not in claims[stage]:
+                    continue
                 
-            # Generate summary
-            summary_data = agent.summarize_paper(paper)
-            if summary_data:
-                # Save the summary to the database
-                if add_summary(summary_data):
-                    results['summarized'] += 1
-                    print(f"Added summary for paper {paper['id']}")
+                failed = True
+                try:
+                    if paper is None:
+                        # Deleted since it was claimed
+                        failed = False
+                    elif stage == 'summarize':
+                        # Generate summary
+                        summary_data = agent.summarize_paper(paper)
+                        if summary_data and add_summary(summary_data):
+                            results['summarized'] += 1
+                            failed = False
+                            print(f"Added summary for paper {paper_id}")
+                    else:
+                        # Generate embedding
+                        embedding_data = agent.compute_embedding(paper)
+                        if embedding_data and add_embedding(embedding_data):
+                            results['embedded'] += 1
+                            failed = False
+                            print(f"Added embedding for paper {paper_id}")
+                except Exception as e:
+                    print(f"Error processing paper {paper_id}: {e}")
                 
-            # Generate embedding
-            embedding_data = agent.compute_embedding(paper)
-            if embedding_data:
-                # Save the embedding to the database
-                if add_embedding(embedding_data):
-                    results['embedded'] += 1
-                    print(f"Added embedding for paper {paper['id']}")
+                if failed:
+                    results['errors'] += 1
+                release_lease(stage, paper_id, worker_id, failed=failed, retry_delay=WORKER_CONFIG["retry_delay"])
             
             # Be nice to the API
-            time.sleep(2)
-            
-        except Exception as e:
-            print(f"Error processing paper {paper['id']}: {e}")
-            results['errors'] += 1
+            time.sleep(PROCESSING_CONFIG["request_delay"])
+    
+    # Append the new embeddings to the memory-mapped store used by search,
+    # then fold them into the related papers of their neighbourhoods
+    if results['embedded']:
+        from src.backend.embedding_store import sync_embedding_store
+        from src.backend.related import update_related_papers
+        sync_embedding_store()
+        update_related_papers()
     
     return results
 
-
 if __name__ == "__main__":
     # Test paper processing
     stats = process_new_papers(limit=5)
     print(f"Processed papers statistics: {stats}")
     
     # Test research brief generation
-    agent = PaperProcessingAgent()
+    agent = get_agent()
     brief = agent.generate_research_brief("climate finance impact on corporate governance")
     print(f"Generated research brief: {brief['brief'][:200]}...")
\ No newline at end of file
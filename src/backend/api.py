@@ -1,26 +1,180 @@
 """
 REST API for the ESG & Finance AI Research Assistant.
 """
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, make_response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
+import re
 import sys
+import time
+from functools import wraps
 from pathlib import Path
 # Add the project root to Python path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.backend.scheduler import get_scheduler
-from src.backend.data_collectors import collect_new_papers
-from src.backend.ai_processing import process_new_papers, PaperProcessingAgent
 from src.backend.database import (
-    get_papers, get_paper_with_summary, log_user_query,
-    search_by_embedding
+    get_papers, get_paper_with_summary, get_related_papers, get_topics, get_topic_papers,
+    get_paper_feed, get_analytics, log_user_query, count_unprocessed_papers, get_generation, normalize_filters,
+    SEARCH_MODES
 )
-from config.config import OPENAI_API_KEY
+from src.backend.metrics import (
+    HTTP_REQUEST_SECONDS, RESPONSE_CACHE_REQUESTS, UNPROCESSED_PAPERS, render_metrics
+)
+from src.backend.profiling import RequestProfiler, should_profile
+from src.backend.response_cache import RESPONSE_CACHE, make_etag
+from src.backend.serialization import (
+    dumps, parse_fields, project_fields, negotiate_encoding, accepts_encoding,
+    should_compress, compress, gzip_stream
+)
+from config.config import OPENAI_API_KEY, API_CONFIG, ensure_data_dirs
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson when it is installed."""
+    
+    def dumps(self, obj, **kwargs):
+        """Serialize an object to a JSON string."""
+        return dumps(obj).decode('utf-8')
+    
+    def response(self, *args, **kwargs):
+        """Build a JSON response without the intermediate str round trip."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 # Enable CORS for all routes and origins
 CORS(app)
 
+# The collector and OpenAI processing modules are imported by the routes
+# that need them, so that worker restarts don't pay for them up front.
+
+# Queue depth is only computed when /api/metrics is scraped
+UNPROCESSED_PAPERS.set_function(count_unprocessed_papers)
+
+@app.before_request
+def _start_request_timer():
+    """Remember when the request started and start profiling if requested."""
+    g.request_start = time.perf_counter()
+    
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if should_profile(route, request.headers):
+        profiler = RequestProfiler()
+        if profiler.start():
+            g.profiler = profiler
+
+@app.after_request
+def _record_request_latency(response):
+    """Record request latency per route and save the profile if one was taken."""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        memory_diff = profiler.stop()
+        profiler.save(route, request.method, request.full_path, response.status_code, memory_diff)
+    
+    start = g.pop('request_start', None)
+    if start is not None:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route, status=response.status_code
+        )
+    return response
+
+@app.after_request
+def _compress_response(response):
+    """Compress large JSON and text responses if the client accepts it.
+    
+    Registered after the latency hook so it runs first and its time is
+    included in the request latency.
+    """
+    cache_entry = g.pop('cache_entry', None)
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    
+    body = response.get_data()
+    if not should_compress(len(body), response.mimetype, response.status_code):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    
+    # Cached responses keep their compressed bodies next to the original
+    compressed = cache_entry.encoded.get(encoding) if cache_entry is not None else None
+    if compressed is None:
+        compressed = compress(body, encoding)
+        if cache_entry is not None:
+            cache_entry.encoded[encoding] = compressed
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.teardown_request
+def _release_profiler(exc):
+    """Stop a profiler left running by a request that raised."""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+def cached_get(view):
+    """Serve a GET route from the response cache, with ETag/Last-Modified revalidation.
+    
+    Responses are keyed by path and query string and tagged with the database
+    generation, which changes on every write to the paper tables. Clients that
+    still hold the current version get a 304 Not Modified, and other requests
+    are answered from the cache without querying SQLite.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        state = get_generation()
+        if state is None:
+            return view(*args, **kwargs)
+        
+        generation, updated = state
+        key = request.full_path
+        route = request.url_rule.rule
+        etag = make_etag(generation, key)
+        
+        # If-Modified-Since only counts when the client sent no ETag
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        else:
+            not_modified = (request.if_modified_since is not None
+                            and updated.replace(microsecond=0) <= request.if_modified_since)
+        
+        if not_modified:
+            RESPONSE_CACHE_REQUESTS.inc(route=route, result='not_modified')
+            response = Response(status=304)
+        else:
+            cached = RESPONSE_CACHE.get(key, generation)
+            if cached is not None:
+                RESPONSE_CACHE_REQUESTS.inc(route=route, result='hit')
+                response = Response(cached.body, status=cached.status, mimetype=cached.mimetype)
+            else:
+                RESPONSE_CACHE_REQUESTS.inc(route=route, result='miss')
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                cached = RESPONSE_CACHE.put(key, generation, response.get_data(),
+                                            response.status_code, response.mimetype)
+            g.cache_entry = cached
+        
+        # Weak, because the same tag is sent for every content encoding
+        response.set_etag(etag, weak=True)
+        response.last_modified = updated
+        # Let browsers keep the body but revalidate before reusing it
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    """Expose metrics in the Prometheus text format."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/status', methods=['GET'])
 def api_status():
     """Get the status of the ESG & Finance AI Research Assistant."""
@@ -28,18 +182,29 @@ def api_status():
     status = scheduler.get_status()
     return jsonify(status)
 
+@app.route('/api/ready', methods=['GET'])
+def api_ready():
+    """Readiness check: 200 once the shared agent is initialized, 503 otherwise."""
+    from src.backend.ai_processing import agent_status
+    
+    status = agent_status()
+    return jsonify(status), (200 if status['ready'] else 503)
+
 @app.route('/api/papers', methods=['GET'])
+@cached_get
 def api_papers():
     """Get a list of papers."""
     limit = int(request.args.get('limit', 10))
     offset = int(request.args.get('offset', 0))
     category = request.args.get('category')
     query = request.args.get('query')
+    fields = parse_fields(request.args.get('fields'))
     
-    papers = get_papers(limit=limit, offset=offset, category=category, query=query)
+    papers = get_papers(limit=limit, offset=offset, category=category, query=query, fields=fields)
     return jsonify(papers)
 
 @app.route('/api/paper/<paper_id>', methods=['GET'])
+@cached_get
 def api_paper(paper_id):
     """Get details of a specific paper."""
     paper = get_paper_with_summary(paper_id)
@@ -48,30 +213,110 @@ def api_paper(paper_id):
     else:
         return jsonify({'error': 'Paper not found'}), 404
 
+@app.route('/api/paper/<paper_id>/related', methods=['GET'])
+@cached_get
+def api_related_papers(paper_id):
+    """Get the precomputed related papers of a paper, most similar first."""
+    limit = int(request.args.get('limit', 10))
+    fields = parse_fields(request.args.get('fields'))
+    
+    related = get_related_papers(paper_id, limit=limit)
+    return jsonify(project_fields(related, fields, always=('id', 'similarity')))
+
+@app.route('/api/topics', methods=['GET'])
+@cached_get
+def api_topics():
+    """Get the topic clusters, largest first."""
+    return jsonify(get_topics())
+
+@app.route('/api/topics/<int:topic_id>/papers', methods=['GET'])
+@cached_get
+def api_topic_papers(topic_id):
+    """Get the papers of a topic, most central first."""
+    limit = int(request.args.get('limit', 20))
+    offset = int(request.args.get('offset', 0))
+    fields = parse_fields(request.args.get('fields'))
+    
+    papers = get_topic_papers(topic_id, limit=limit, offset=offset)
+    return jsonify(project_fields(papers, fields, always=('id', 'similarity')))
+
+@app.route('/api/feed', methods=['GET'])
+@cached_get
+def api_feed():
+    """Get the precomputed feed of new papers matching the logged queries."""
+    limit = int(request.args.get('limit', 20))
+    offset = int(request.args.get('offset', 0))
+    fields = parse_fields(request.args.get('fields'))
+    
+    papers = get_paper_feed(limit=limit, offset=offset)
+    return jsonify(project_fields(papers, fields, always=('id', 'score')))
+
+@app.route('/api/analytics', methods=['GET'])
+@cached_get
+def api_analytics():
+    """Get score distributions and processing counts by category, source and month.
+    
+    Optional month_from and month_to (YYYY-MM) limit the publication months.
+    """
+    months = {key: request.args.get(key) for key in ('month_from', 'month_to')}
+    for key, value in months.items():
+        if value and not re.fullmatch(r'\d{4}-\d{2}', value):
+            return jsonify({'error': f"{key} must be a month (YYYY-MM)"}), 400
+    
+    analytics = get_analytics(**months)
+    if analytics is None:
+        return jsonify({'error': 'Analytics unavailable'}), 500
+    return jsonify(analytics)
+
+@app.route('/api/export', methods=['GET'])
+def api_export():
+    """Stream the whole corpus as NDJSON (one paper with summary and embedding per line)."""
+    from src.backend.corpus_io import iter_ndjson
+    
+    include_embeddings = request.args.get('embeddings', '1') != '0'
+    body = iter_ndjson(include_embeddings=include_embeddings)
+    headers = {'Content-Disposition': 'attachment; filename=esg_corpus.ndjson'}
+    
+    # Streamed bodies skip _compress_response, so gzip them here
+    if accepts_encoding(request.headers.get('Accept-Encoding'), 'gzip'):
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    
+    return Response(stream_with_context(body), mimetype='application/x-ndjson', headers=headers)
+
 @app.route('/api/collect', methods=['POST'])
 def api_collect():
-    """Collect papers immediately."""
-    stats = collect_new_papers()
+    """Collect papers immediately (skipped if a collection is already running)."""
+    stats = get_scheduler().run_collection_now()
     return jsonify(stats)
 
 @app.route('/api/process', methods=['POST'])
 def api_process():
-    """Process papers immediately."""
+    """Process papers immediately, after any processing run already in progress."""
     limit = int(request.json.get('limit', 10))
-    stats = process_new_papers(limit=limit)
+    stats = get_scheduler().run_processing_now(limit=limit)
     return jsonify(stats)
 
 @app.route('/api/brief', methods=['POST'])
 def api_brief():
     """Generate a research brief."""
+    from src.backend.ai_processing import get_agent
+    
     if not request.json or 'query' not in request.json:
         return jsonify({'error': 'No query provided'}), 400
     
     query = request.json['query']
+    mode = request.json.get('mode')
+    if mode is not None and mode not in SEARCH_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(SEARCH_MODES)}"}), 400
+    try:
+        filters = normalize_filters(request.json.get('filters'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     log_user_query(query)
     
-    agent = PaperProcessingAgent()
-    brief = agent.generate_research_brief(query)
+    agent = get_agent()
+    brief = agent.generate_research_brief(query, mode=mode, filters=filters)
     return jsonify(brief)
 
 @app.route('/api/scheduler/start', methods=['POST'])
@@ -88,41 +333,59 @@ def api_scheduler_stop():
     success = scheduler.stop()
     return jsonify({'success': success})
 
+# Fields of search results that are returned whatever fields= asks for
+SCORE_FIELDS = ('id', 'similarity', 'score', 'keyword_score')
+
 @app.route('/api/search', methods=['POST'])
 def api_search():
-    """Search by query embedding."""
+    """Search by query embedding, keywords or both (mode=vector|keyword|hybrid).
+    
+    An optional filters object restricts the papers searched (see
+    database.normalize_filters).
+    """
+    from src.backend.ai_processing import get_agent
+    
     if not request.json or 'query' not in request.json:
         return jsonify({'error': 'No query provided'}), 400
     
     query = request.json['query']
     limit = int(request.json.get('limit', 5))
+    fields = parse_fields(request.json.get('fields'))
+    mode = request.json.get('mode')
+    if mode is not None and mode not in SEARCH_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(SEARCH_MODES)}"}), 400
+    try:
+        filters = normalize_filters(request.json.get('filters'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Log the query
     log_user_query(query)
     
-    # Generate embedding and search
-    agent = PaperProcessingAgent()
     try:
-        query_embedding_response = agent.client.embeddings.create(
-            input=query,
-            model="text-embedding-3-large"
-        )
-        query_embedding = query_embedding_response.data[0].embedding
-        
-        # Search for similar papers
-        similar_papers = search_by_embedding(query_embedding, limit=limit)
-        return jsonify(similar_papers)
+        similar_papers = get_agent().search(query, limit=limit, mode=mode, filters=filters)
+        return jsonify(project_fields(similar_papers, fields, always=SCORE_FIELDS))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def start_api(host='0.0.0.0', port=5001, debug=False):
-    """Start the API server."""
+def start_api(host=None, port=None, debug=False):
+    """Start the API server.
+    
+    This is Flask's development server. For serving many concurrent
+    search/brief requests use the ASGI mode in asgi.py instead.
+    """
+    ensure_data_dirs()
+    
     # Check for OpenAI API key
     if not OPENAI_API_KEY:
         print("Warning: OPENAI_API_KEY environment variable is not set")
         print("Set it with: export OPENAI_API_KEY=your-api-key")
+    else:
+        # Create the shared agent and its connection pool before serving
+        from src.backend.ai_processing import warm_up_agent
+        warm_up_agent()
     
-    app.run(host=host, port=port, debug=debug)
+    app.run(host=host or API_CONFIG["host"], port=port or API_CONFIG["port"], debug=debug)
 
 if __name__ == '__main__':
     start_api(debug=True)
\ No newline at end of file
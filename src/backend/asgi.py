@@ -0,0 +1,219 @@
+"""
+ASGI serving mode for the ESG & Finance AI Research Assistant REST API.
+
+Exposes the same routes as api.py. The OpenAI-bound routes (/api/search
+and /api/brief) run as native async handlers: while they wait on OpenAI
+for query embeddings they hold only an event-loop task, not a thread or a
+worker, so one process can keep many of them in flight. SQLite calls run
+in a bounded thread pool (API_IO_THREADS). The brief itself is written by
+the same blocking agent call as in the Flask app, in a separate pool
+(API_BRIEF_THREADS), so slow briefs never starve the other routes. Every other route is served by the Flask app through a WSGI
+adapter, so routes added to api.py are available here as well.
+
+Usage:
+    python src/backend/asgi.py --workers 4 --port 5001
+    uvicorn src.backend.asgi:app --workers 4 --port 5001
+"""
+
+import argparse
+import asyncio
+import functools
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from config.config import API_CONFIG, OPENAI_API_KEY, ensure_data_dirs
+from src.backend.api import app as flask_app, SCORE_FIELDS
+from src.backend.database import log_user_query, normalize_filters, SEARCH_MODES
+from src.backend.metrics import HTTP_REQUEST_SECONDS
+from src.backend.serialization import (
+    dumps, loads, parse_fields, project_fields, negotiate_encoding, should_compress, compress
+)
+
+
+async def run_sync(func, *args, **kwargs):
+    """Run a blocking function in the event loop's thread pool.
+
+    Args:
+        func (callable): Blocking function, e.g. a database call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The return value of func
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def instrumented(route):
+    """Decorator recording request latency for a native async route."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            finally:
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - start,
+                    method=request.method, route=route, status=status
+                )
+        return wrapper
+    return decorator
+
+
+async def _json_body(request):
+    """Parse the request body as JSON, returning None if it is not JSON."""
+    try:
+        return loads(await request.body())
+    except Exception:
+        return None
+
+
+def json_response(request, obj, status_code=200):
+    """Serialize a JSON response, compressing it if the client accepts it.
+
+    Args:
+        request (Request): The request being answered
+        obj: JSON-serializable response content
+        status_code (int): Response status code
+
+    Returns:
+        Response: The response
+    """
+    body = dumps(obj)
+    headers = {}
+    if should_compress(len(body), 'application/json', status_code):
+        headers['Vary'] = 'Accept-Encoding'
+        encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+    return Response(body, status_code=status_code, headers=headers, media_type='application/json')
+
+
+@instrumented('/api/search')
+async def api_search(request):
+    """Search by query embedding, keywords or both (mode=vector|keyword|hybrid)."""
+    from src.backend.ai_processing import get_agent
+
+    payload = await _json_body(request)
+    if not payload or 'query' not in payload:
+        return json_response(request, {'error': 'No query provided'}, status_code=400)
+
+    query = payload['query']
+    limit = int(payload.get('limit', 5))
+    fields = parse_fields(payload.get('fields'))
+    mode = payload.get('mode')
+    if mode is not None and mode not in SEARCH_MODES:
+        return json_response(request, {'error': f"mode must be one of {', '.join(SEARCH_MODES)}"}, status_code=400)
+    try:
+        filters = normalize_filters(payload.get('filters'))
+    except ValueError as e:
+        return json_response(request, {'error': str(e)}, status_code=400)
+
+    # Log the query
+    await run_sync(log_user_query, query)
+
+    try:
+        similar_papers = await get_agent().asearch(query, limit=limit, mode=mode, filters=filters)
+        return json_response(request, project_fields(similar_papers, fields, always=SCORE_FIELDS))
+    except Exception as e:
+        return json_response(request, {'error': str(e)}, status_code=500)
+
+
+@instrumented('/api/brief')
+async def api_brief(request):
+    """Generate a research brief."""
+    from src.backend.ai_processing import get_agent
+
+    payload = await _json_body(request)
+    if not payload or 'query' not in payload:
+        return json_response(request, {'error': 'No query provided'}, status_code=400)
+
+    query = payload['query']
+    mode = payload.get('mode')
+    if mode is not None and mode not in SEARCH_MODES:
+        return json_response(request, {'error': f"mode must be one of {', '.join(SEARCH_MODES)}"}, status_code=400)
+    try:
+        filters = normalize_filters(payload.get('filters'))
+    except ValueError as e:
+        return json_response(request, {'error': str(e)}, status_code=400)
+    await run_sync(log_user_query, query)
+
+    brief = await get_agent().agenerate_research_brief(query, mode=mode, filters=filters)
+    return json_response(request, brief)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Size the thread pool and warm up the shared agent before serving."""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=API_CONFIG["io_threads"], thread_name_prefix="api-io")
+    loop.set_default_executor(executor)
+
+    ensure_data_dirs()
+    if not OPENAI_API_KEY:
+        print("Warning: OPENAI_API_KEY environment variable is not set")
+        print("Set it with: export OPENAI_API_KEY=your-api-key")
+    else:
+        from src.backend.ai_processing import warm_up_agent
+        await run_sync(warm_up_agent)
+
+    yield
+
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/search', api_search, methods=['POST']),
+        Route('/api/brief', api_brief, methods=['POST']),
+        # Everything else is served by the Flask app
+        Mount('/', app=WSGIMiddleware(flask_app, workers=API_CONFIG["io_threads"]))
+    ],
+    lifespan=lifespan
+)
+
+
+def start_asgi(host=None, port=None, workers=None):
+    """Start the ASGI server.
+
+    Args:
+        host (str): Interface to bind, defaults to API_CONFIG['host']
+        port (int): Port to bind, defaults to API_CONFIG['port']
+        workers (int): Worker processes, defaults to API_CONFIG['workers']
+    """
+    import uvicorn
+
+    uvicorn.run(
+        "src.backend.asgi:app",
+        host=host or API_CONFIG["host"],
+        port=port or API_CONFIG["port"],
+        workers=workers or API_CONFIG["workers"],
+        log_level="warning"
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the REST API over ASGI')
+    parser.add_argument('--host', type=str, default=None, help='Interface to bind')
+    parser.add_argument('--port', type=int, default=None, help='Port to bind')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes')
+    args = parser.parse_args()
+
+    start_asgi(host=args.host, port=args.port, workers=args.workers)
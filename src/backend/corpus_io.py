@@ -0,0 +1,333 @@
+"""
+Bulk export and import of the research corpus.
+
+The corpus is one flat record per paper: the paper fields, its latest
+summary (summary_* fields) and its current embedding. Three formats are
+supported, chosen by file suffix or explicitly:
+
+- ndjson: one JSON record per line (.ndjson, .jsonl, optionally .gz)
+- parquet: columnar Parquet file (.parquet)
+- arrow: Arrow IPC file (.arrow, .feather)
+
+Parquet and Arrow need the optional pyarrow package; embeddings are stored
+there as fixed-size float32 lists. Exports stream from a single database
+cursor and imports write in batches, so neither holds the corpus in memory.
+"""
+
+import gzip
+from pathlib import Path
+import sys
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.backend.database import (
+    iter_corpus, get_embedding_dimension,
+    add_papers_batch, add_summaries_batch, add_embeddings_batch
+)
+from src.backend.serialization import dumps, loads
+
+FORMATS = ('ndjson', 'parquet', 'arrow')
+
+PAPER_FIELDS = (
+    'id', 'title', 'abstract', 'authors', 'url', 'pdf_url', 'published_date',
+    'source', 'categories', 'retrieved_date'
+)
+
+LIST_FIELDS = ('authors', 'categories', 'key_findings', 'keywords')
+
+
+def _require_pyarrow():
+    """Import pyarrow, with a helpful error if it is not installed."""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow files need pyarrow: pip install pyarrow")
+
+
+def detect_format(path):
+    """Infer the corpus format from a file name.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: 'ndjson', 'parquet' or 'arrow'
+    """
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if suffixes and suffixes[-1] == '.gz':
+        suffixes = suffixes[:-1]
+    suffix = suffixes[-1] if suffixes else ''
+
+    if suffix in ('.ndjson', '.jsonl', '.json'):
+        return 'ndjson'
+    if suffix == '.parquet':
+        return 'parquet'
+    if suffix in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    raise ValueError(f"Cannot infer corpus format from {path}; use one of {', '.join(FORMATS)}")
+
+
+def iter_ndjson(batch_size=1000, include_embeddings=True):
+    """Stream the corpus as NDJSON lines.
+
+    Args:
+        batch_size (int): Rows fetched from SQLite at a time
+        include_embeddings (bool): Whether to include embeddings
+
+    Yields:
+        bytes: One JSON record followed by a newline
+    """
+    for record in iter_corpus(batch_size=batch_size, include_embeddings=include_embeddings):
+        yield dumps(record) + b'\n'
+
+
+def _as_list(value):
+    """Coerce a list field to a list of strings (or None)."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return [str(value)]
+
+
+def _as_float(value):
+    """Coerce a score to a float (or None)."""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _arrow_schema(pa, dimension):
+    """Build the Arrow schema of the corpus.
+
+    Args:
+        pa (module): pyarrow
+        dimension (int): Embedding dimensionality, or None if there are no embeddings
+
+    Returns:
+        pyarrow.Schema: Corpus schema
+    """
+    string_list = pa.list_(pa.string())
+    embedding_type = pa.list_(pa.float32(), dimension) if dimension else pa.null()
+    return pa.schema([
+        ('id', pa.string()),
+        ('title', pa.string()),
+        ('abstract', pa.string()),
+        ('authors', string_list),
+        ('url', pa.string()),
+        ('pdf_url', pa.string()),
+        ('published_date', pa.string()),
+        ('source', pa.string()),
+        ('categories', string_list),
+        ('retrieved_date', pa.string()),
+        ('summary', pa.string()),
+        ('esg_relevance_score', pa.float64()),
+        ('finance_relevance_score', pa.float64()),
+        ('key_findings', string_list),
+        ('keywords', string_list),
+        ('summary_created_date', pa.string()),
+        ('embedding', embedding_type),
+        ('embedding_model', pa.string()),
+        ('embedding_created_date', pa.string())
+    ])
+
+
+def _export_arrow(path, fmt, batch_size, include_embeddings, stats):
+    """Write the corpus to a Parquet or Arrow IPC file, one record batch at a time."""
+    pa = _require_pyarrow()
+
+    dimension = get_embedding_dimension() if include_embeddings else None
+    schema = _arrow_schema(pa, dimension)
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(str(path), schema, compression='zstd')
+        write = writer.write_batch
+    else:
+        sink = pa.OSFile(str(path), 'wb')
+        writer = pa.ipc.new_file(sink, schema)
+        write = writer.write_batch
+
+    def flush(records):
+        write(pa.RecordBatch.from_pylist(records, schema=schema))
+
+    try:
+        records = []
+        for record in iter_corpus(batch_size=batch_size, include_embeddings=include_embeddings):
+            for field in LIST_FIELDS:
+                record[field] = _as_list(record[field])
+            record['esg_relevance_score'] = _as_float(record['esg_relevance_score'])
+            record['finance_relevance_score'] = _as_float(record['finance_relevance_score'])
+
+            embedding = record['embedding']
+            if embedding is not None and (not isinstance(embedding, list) or len(embedding) != dimension):
+                # Embeddings from an older model with another size don't fit the column
+                record['embedding'] = None
+                stats['skipped_embeddings'] += 1
+
+            _count(record, stats)
+            records.append(record)
+            if len(records) >= batch_size:
+                flush(records)
+                records = []
+
+        if records:
+            flush(records)
+    finally:
+        writer.close()
+        if fmt == 'arrow':
+            sink.close()
+
+
+def _count(record, stats):
+    """Update export counters for a record."""
+    stats['papers'] += 1
+    if record.get('summary') is not None:
+        stats['summaries'] += 1
+    if record.get('embedding') is not None:
+        stats['embeddings'] += 1
+
+
+def export_corpus(path, fmt=None, batch_size=1000, include_embeddings=True):
+    """Export the corpus to a file.
+
+    Args:
+        path (str): Output file; NDJSON is gzip-compressed if it ends in .gz
+        fmt (str): 'ndjson', 'parquet' or 'arrow'; inferred from path if None
+        batch_size (int): Rows read and written at a time
+        include_embeddings (bool): Whether to include embeddings
+
+    Returns:
+        dict: Export statistics
+    """
+    path = Path(path)
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown corpus format: {fmt}")
+
+    stats = {
+        'path': str(path),
+        'format': fmt,
+        'papers': 0,
+        'summaries': 0,
+        'embeddings': 0,
+        'skipped_embeddings': 0
+    }
+
+    if fmt == 'ndjson':
+        opener = gzip.open if path.suffix.lower() == '.gz' else open
+        with opener(path, 'wb') as f:
+            for record in iter_corpus(batch_size=batch_size, include_embeddings=include_embeddings):
+                _count(record, stats)
+                f.write(dumps(record) + b'\n')
+    else:
+        _export_arrow(path, fmt, batch_size, include_embeddings, stats)
+
+    stats['bytes'] = path.stat().st_size
+    return stats
+
+
+def iter_corpus_file(path, fmt=None, batch_size=1000):
+    """Read corpus records from a file in batches.
+
+    Args:
+        path (str): Input file
+        fmt (str): 'ndjson', 'parquet' or 'arrow'; inferred from path if None
+        batch_size (int): Records per batch
+
+    Yields:
+        list: Batch of record dictionaries
+    """
+    path = Path(path)
+    fmt = fmt or detect_format(path)
+
+    if fmt == 'ndjson':
+        opener = gzip.open if path.suffix.lower() == '.gz' else open
+        batch = []
+        with opener(path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                batch.append(loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    elif fmt == 'parquet':
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        for record_batch in pq.ParquetFile(str(path)).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pylist()
+    elif fmt == 'arrow':
+        pa = _require_pyarrow()
+        with pa.memory_map(str(path), 'r') as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                record_batch = reader.get_batch(index)
+                for offset in range(0, record_batch.num_rows, batch_size):
+                    yield record_batch.slice(offset, batch_size).to_pylist()
+    else:
+        raise ValueError(f"Unknown corpus format: {fmt}")
+
+
+def import_corpus(path, fmt=None, batch_size=1000):
+    """Import a corpus file through the batched write path.
+
+    Papers are added or updated; summaries and embeddings that already exist
+    (same paper and created date) are not duplicated.
+
+    Args:
+        path (str): Input file
+        fmt (str): 'ndjson', 'parquet' or 'arrow'; inferred from path if None
+        batch_size (int): Records written per transaction
+
+    Returns:
+        dict: Import statistics
+    """
+    stats = {'papers': 0, 'summaries': 0, 'embeddings': 0, 'errors': 0}
+
+    for batch in iter_corpus_file(path, fmt=fmt, batch_size=batch_size):
+        papers = []
+        summaries = []
+        embeddings = []
+
+        for record in batch:
+            if not record.get('id') or not record.get('title'):
+                stats['errors'] += 1
+                continue
+
+            papers.append({field: record.get(field) for field in PAPER_FIELDS})
+
+            if record.get('summary') is not None:
+                summaries.append({
+                    'paper_id': record['id'],
+                    'summary': record.get('summary'),
+                    'esg_relevance_score': record.get('esg_relevance_score'),
+                    'finance_relevance_score': record.get('finance_relevance_score'),
+                    'key_findings': record.get('key_findings') or [],
+                    'keywords': record.get('keywords') or [],
+                    'created_date': record.get('summary_created_date')
+                })
+
+            if record.get('embedding') is not None:
+                embeddings.append({
+                    'paper_id': record['id'],
+                    'embedding': list(record['embedding']),
+                    'model': record.get('embedding_model'),
+                    'created_date': record.get('embedding_created_date')
+                })
+
+        written = add_papers_batch(papers)
+        if papers and not written:
+            stats['errors'] += len(papers)
+            continue
+        stats['papers'] += written
+        stats['summaries'] += add_summaries_batch(summaries) if summaries else 0
+        stats['embeddings'] += add_embeddings_batch(embeddings) if embeddings else 0
+
+    return stats
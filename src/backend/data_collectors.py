@@ -16,7 +16,9 @@ from urllib.parse import quote_plus
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from config.config import SOURCES
-from src.backend.database import add_paper
+from src.backend.database import add_paper, add_paper_versions, find_changed_papers
+from src.backend.dedup import canonical_arxiv_id, merge_versions, carry_over_embeddings, register_papers
+from src.backend.metrics import COLLECTOR_SECONDS, COLLECTED_PAPERS
 
 class ArxivCollector:
     """Collector for papers from the arXiv repository."""
@@ -61,61 +63,31 @@ class ArxivCollector:
             # params["start"] = 0
             
             try:
+                fetch_start = time.perf_counter()
                 response = requests.get(self.BASE_URL, params=params)
                 response.raise_for_status()
+                COLLECTOR_SECONDS.observe(time.perf_counter() - fetch_start, source="arxiv", phase="fetch")
                 
                 # Parse the XML response
+                parse_start = time.perf_counter()
+                parsed_before = len(papers)
                 root = ET.fromstring(response.content)
                 
                 # Handle entries
                 for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-                    # Extract paper details
-                    paper_id = entry.find('{http://www.w3.org/2005/Atom}id').text
-                    paper_id = paper_id.split('/')[-1]  # Extract the arXiv ID
-                    
-                    title = entry.find('{http://www.w3.org/2005/Atom}title').text.strip()
-                    abstract = entry.find('{http://www.w3.org/2005/Atom}summary').text.strip()
-                    
-                    # Extract published date
-                    published = entry.find('{http://www.w3.org/2005/Atom}published').text
-                    published_date = datetime.strptime(published, "%Y-%m-%dT%H:%M:%SZ")
+                    paper_data = self._parse_entry(entry)
                     
                     # Skip if the paper is older than the cutoff
-                    if published_date < date_cutoff:
+                    if datetime.fromisoformat(paper_data['published_date']) < date_cutoff:
                         continue
                     
-                    # Extract authors
-                    authors = []
-                    for author in entry.findall('{http://www.w3.org/2005/Atom}author'):
-                        name = author.find('{http://www.w3.org/2005/Atom}name').text
-                        authors.append(name)
-                    
-                    # Extract URL and PDF URL
-                    url = entry.find('{http://www.w3.org/2005/Atom}id').text
-                    pdf_url = url.replace('abs', 'pdf') + '.pdf'
-                    
-                    # Extract categories
-                    primary_category = entry.find('{http://arxiv.org/schemas/atom}primary_category')
-                    categories = [primary_category.attrib['term']]
-                    
-                    # Prepare paper data
-                    paper_data = {
-                        'id': paper_id,
-                        'title': title,
-                        'abstract': abstract,
-                        'authors': authors,
-                        'url': url,
-                        'pdf_url': pdf_url,
-                        'published_date': published_date.isoformat(),
-                        'source': 'arxiv',
-                        'categories': categories,
-                        'retrieved_date': datetime.now().isoformat()
-                    }
-                    
                     papers.append(paper_data)
                 
+                COLLECTOR_SECONDS.observe(time.perf_counter() - parse_start, source="arxiv", phase="parse")
+                COLLECTED_PAPERS.inc(len(papers) - parsed_before, source="arxiv")
+                
                 # Be nice to the API
-                time.sleep(3)
+                time.sleep(SOURCES["arxiv"]["request_delay"])
                 
             except Exception as e:
                 print(f"Error fetching papers from arXiv for category {category}: {e}")
@@ -148,62 +120,88 @@ class ArxivCollector:
         
         papers = []
         try:
+            fetch_start = time.perf_counter()
             response = requests.get(self.BASE_URL, params=params)
             response.raise_for_status()
+            COLLECTOR_SECONDS.observe(time.perf_counter() - fetch_start, source="arxiv", phase="fetch")
             
             # Parse the XML response
+            parse_start = time.perf_counter()
             root = ET.fromstring(response.content)
             
             # Handle entries
             for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-                # Extract paper details
-                paper_id = entry.find('{http://www.w3.org/2005/Atom}id').text
-                paper_id = paper_id.split('/')[-1]  # Extract the arXiv ID
-                
-                title = entry.find('{http://www.w3.org/2005/Atom}title').text.strip()
-                abstract = entry.find('{http://www.w3.org/2005/Atom}summary').text.strip()
-                
-                # Extract published date
-                published = entry.find('{http://www.w3.org/2005/Atom}published').text
-                published_date = datetime.strptime(published, "%Y-%m-%dT%H:%M:%SZ")
-                
-                # Extract authors
-                authors = []
-                for author in entry.findall('{http://www.w3.org/2005/Atom}author'):
-                    name = author.find('{http://www.w3.org/2005/Atom}name').text
-                    authors.append(name)
-                
-                # Extract URL and PDF URL
-                url = entry.find('{http://www.w3.org/2005/Atom}id').text
-                pdf_url = url.replace('abs', 'pdf') + '.pdf'
-                
-                # Extract categories
-                primary_category = entry.find('{http://arxiv.org/schemas/atom}primary_category')
-                categories = [primary_category.attrib['term']]
-                
-                # Prepare paper data
-                paper_data = {
-                    'id': paper_id,
-                    'title': title,
-                    'abstract': abstract,
-                    'authors': authors,
-                    'url': url,
-                    'pdf_url': pdf_url,
-                    'published_date': published_date.isoformat(),
-                    'source': 'arxiv',
-                    'categories': categories,
-                    'retrieved_date': datetime.now().isoformat()
-                }
-                
-                papers.append(paper_data)
+                papers.append(self._parse_entry(entry))
+            
+            COLLECTOR_SECONDS.observe(time.perf_counter() - parse_start, source="arxiv", phase="parse")
+            COLLECTED_PAPERS.inc(len(papers), source="arxiv")
             
         except Exception as e:
             print(f"Error fetching papers from arXiv for keyword {keyword}: {e}")
             
         return papers
     
+    def _parse_entry(self, entry):
+        """Parse an Atom entry into a paper dictionary.
+        
+        The paper id is the canonical arXiv id without its version suffix;
+        the version is kept in 'version' and its date in 'updated_date'.
+        
+        Args:
+            entry (xml.etree.ElementTree.Element): Atom entry
+            
+        Returns:
+            dict: Paper data
+        """
+        # Extract paper details
+        paper_id, version = canonical_arxiv_id(entry.find('{http://www.w3.org/2005/Atom}id').text)
+        
+        title = entry.find('{http://www.w3.org/2005/Atom}title').text.strip()
+        abstract = entry.find('{http://www.w3.org/2005/Atom}summary').text.strip()
+        
+        # Extract published date (of the first version) and the date of this version
+        published = entry.find('{http://www.w3.org/2005/Atom}published').text
+        published_date = datetime.strptime(published, "%Y-%m-%dT%H:%M:%SZ")
+        updated = entry.find('{http://www.w3.org/2005/Atom}updated')
+        
+        # Extract authors
+        authors = []
+        for author in entry.findall('{http://www.w3.org/2005/Atom}author'):
+            name = author.find('{http://www.w3.org/2005/Atom}name').text
+            authors.append(name)
+        
+        # Extract URL and PDF URL (without version, so they point to the latest one)
+        url = f"http://arxiv.org/abs/{paper_id}"
+        pdf_url = f"http://arxiv.org/pdf/{paper_id}.pdf"
+        
+        # Extract categories
+        primary_category = entry.find('{http://arxiv.org/schemas/atom}primary_category')
+        categories = [primary_category.attrib['term']]
+        
+        # Prepare paper data
+        return {
+            'id': paper_id,
+            'version': version,
+            'title': title,
+            'abstract': abstract,
+            'authors': authors,
+            'url': url,
+            'pdf_url': pdf_url,
+            'published_date': published_date.isoformat(),
+            'updated_date': updated.text if updated is not None else published,
+            'source': 'arxiv',
+            'categories': categories,
+            'retrieved_date': datetime.now().isoformat()
+        }
+    
     def save_papers(self, papers):
-        """Save papers to the database.
+        """Save new and changed papers to the database.
+        
+        Papers collected more than once are merged by canonical id, and
+        papers already stored unchanged are skipped, so they keep their
+        embeddings; so do new versions whose text barely changed. Saved
+        papers are checked for near-duplicates, and the ids of the others
+        are published for event-driven processing.
         
         Args:
             papers (list): List of paper data dictionaries
@@ -211,12 +209,19 @@ class ArxivCollector:
         Returns:
             int: Number of papers saved
         """
-        saved_count = 0
-        for paper in papers:
-            if add_paper(paper):
-                saved_count += 1
+        from src.backend.events import publish_papers
+        
+        papers = merge_versions(papers)
+        add_paper_versions(papers)
+        
+        changed = find_changed_papers(papers)
+        carry_over_embeddings(changed)
+        
+        saved = [paper for paper in changed if add_paper(paper)]
+        duplicates = register_papers(saved)
         
-        return saved_count
+        publish_papers([paper['id'] for paper in saved if paper['id'] not in duplicates])
+        return len(saved)
 
 
 class SSRNCollector:
@@ -2,24 +2,68 @@
 Database models and operations for the ESG & Finance AI Research Assistant.
 """
 
+import re
 import sqlite3
 import json
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from pathlib import Path
 import sys
 
 # Add the project root to Python path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from config.config import DB_PATH
+from config.config import DB_PATH, RESPONSE_CACHE_CONFIG, SEARCH_CONFIG, SUMMARY_CONFIG
+from src.backend.metrics import DB_QUERY_SECONDS, timed
+
+# Columns of the papers table, in table order
+PAPER_COLUMNS = (
+    'id', 'title', 'abstract', 'authors', 'url', 'pdf_url', 'published_date',
+    'source', 'categories', 'retrieved_date', 'embedding_id'
+)
+
+# Retrieval modes of PaperProcessingAgent.search
+SEARCH_MODES = ('vector', 'keyword', 'hybrid')
+
+# Filters accepted by the search functions (see normalize_filters)
+SEARCH_FILTERS = ('category', 'source', 'date_from', 'date_to', 'min_esg_score', 'min_finance_score', 'topic')
+
+# Processing stages of claim_work, with the condition on papers (aliased p)
+# that selects the papers still needing the stage
+WORK_STAGES = {
+    'summarize': "NOT EXISTS (SELECT 1 FROM summaries s WHERE s.paper_id = p.id)",
+    'embed': "p.embedding_id IS NULL"
+}
+
+# Papers linked to a near-duplicate (see src/backend/dedup.py) share its
+# summary and embedding and are never claimed for processing
+NOT_DUPLICATE = "NOT EXISTS (SELECT 1 FROM paper_duplicates d WHERE d.paper_id = p.id)"
+
+# Tables whose writes change what the paper endpoints return
+GENERATION_TABLES = ('papers', 'summaries', 'embeddings', 'paper_duplicates')
+
+# Last generation read by this process (see get_generation)
+_generation_lock = threading.Lock()
+_generation_cache = {'db_path': None, 'value': None, 'checked': float('-inf'), 'invalidations': 0}
+
+# Paper ids of recent search filters, keyed by database and generation (see filter_paper_ids)
+FILTER_CACHE_SIZE = 64
+_filter_lock = threading.Lock()
+_filter_cache = OrderedDict()
 
 def init_db():
     """Initialize the database with required tables."""
-    DB_PATH.parent.mkdir(exist_ok=True)
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
+    # New database files return the pages freed by deletes to the OS in
+    # steps (see vacuum_database); existing files switch on their next full VACUUM
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
     # Create papers table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS papers (
@@ -74,9 +118,573 @@ def init_db():
     )
     ''')
     
+    # Create db_meta table holding the generation counter. Triggers bump it
+    # on every write to the paper tables, so API responses can be cached and
+    # revalidated without querying the tables themselves.
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS db_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL,
+        updated_date TEXT NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    INSERT OR IGNORE INTO db_meta (id, generation, updated_date)
+    VALUES (1, 0, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+    ''')
+    
+    # Per-paper lookups of summaries and embeddings (paper details, corpus import/export)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_summaries_paper_id
+    ON summaries (paper_id, created_date)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_embeddings_paper_id
+    ON embeddings (paper_id, created_date)
+    ''')
+    
+    _create_keyword_index(cursor)
+    
+    # Work leases let several processing workers share the database: a
+    # worker claims papers for a stage and holds them until it releases
+    # them or its lease expires (see claim_work)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS work_leases (
+        stage TEXT NOT NULL,
+        paper_id TEXT NOT NULL,
+        worker_id TEXT,
+        claimed_at REAL,
+        expires_at REAL NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (stage, paper_id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_work_leases_worker
+    ON work_leases (worker_id)
+    ''')
+    
+    # Papers waiting for event-driven processing when the queue is
+    # SQLite-backed (see src/backend/events.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paper_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        paper_id TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    ''')
+    
+    # arXiv version history of papers stored under their canonical id
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paper_versions (
+        paper_id TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        title TEXT,
+        abstract TEXT,
+        updated_date TEXT,
+        retrieved_date TEXT,
+        PRIMARY KEY (paper_id, version)
+    )
+    ''')
+    
+    # MinHash signatures and their LSH band keys for near-duplicate
+    # detection, and the papers found to duplicate an earlier one
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paper_signatures (
+        paper_id TEXT PRIMARY KEY,
+        signature BLOB NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paper_lsh (
+        band INTEGER NOT NULL,
+        bucket BLOB NOT NULL,
+        paper_id TEXT NOT NULL,
+        PRIMARY KEY (band, bucket, paper_id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_paper_lsh_paper_id
+    ON paper_lsh (paper_id)
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paper_duplicates (
+        paper_id TEXT PRIMARY KEY,
+        duplicate_of TEXT NOT NULL,
+        similarity REAL,
+        detected_date TEXT
+    )
+    ''')
+    
+    for table in GENERATION_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_generation
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE db_meta
+                SET generation = generation + 1,
+                    updated_date = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+                WHERE id = 1;
+            END
+            ''')
+    
     conn.commit()
+    
+    _migrate(conn)
     conn.close()
 
+def _latest_summary_refresh(row):
+    """SQL recomputing the latest summary of the paper of a trigger row (NEW or OLD)."""
+    return f'''
+        DELETE FROM latest_summaries WHERE paper_id = {row}.paper_id;
+        INSERT INTO latest_summaries (paper_id, summary_id)
+        SELECT paper_id, id FROM summaries WHERE paper_id = {row}.paper_id
+        ORDER BY created_date DESC, id DESC LIMIT 1;
+    '''
+
+def _migration_latest_summaries(cursor):
+    """Schema 1: latest summary of each paper, kept current by triggers.
+    
+    Detail lookups and summary joins read the latest summary through
+    latest_summaries instead of sorting a paper's summary history. The
+    triggers only seek the (paper_id, created_date) index of the changed
+    paper, so they stay cheap however long the history grows. Being a
+    separate table, the pointer survives papers being replaced on
+    re-collection.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS latest_summaries (
+        paper_id TEXT PRIMARY KEY,
+        summary_id INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS summaries_latest_insert
+    AFTER INSERT ON summaries
+    BEGIN
+        {_latest_summary_refresh('NEW')}
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS summaries_latest_delete
+    AFTER DELETE ON summaries
+    BEGIN
+        {_latest_summary_refresh('OLD')}
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS summaries_latest_update
+    AFTER UPDATE OF paper_id, created_date ON summaries
+    BEGIN
+        {_latest_summary_refresh('OLD')}
+        {_latest_summary_refresh('NEW')}
+    END
+    ''')
+    
+    # Backfill from the existing history
+    cursor.execute('''
+    INSERT OR REPLACE INTO latest_summaries (paper_id, summary_id)
+    SELECT paper_id, id FROM (
+        SELECT paper_id, id, ROW_NUMBER() OVER (
+            PARTITION BY paper_id ORDER BY created_date DESC, id DESC
+        ) AS position
+        FROM summaries
+    )
+    WHERE position = 1
+    ''')
+    
+    # Paper listings, claims and date filters order or range over published_date
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_papers_published_date
+    ON papers (published_date)
+    ''')
+
+def _migration_related_papers(cursor):
+    """Schema 2: precomputed related papers and the state of background jobs.
+    
+    related_papers holds the nearest neighbours of each paper by rank
+    (see src/backend/related.py); clustered on (paper_id, rank), a paper's
+    list is a single range read. job_state keeps what incremental jobs have
+    processed so far.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS related_papers (
+        paper_id TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        related_id TEXT NOT NULL,
+        similarity REAL NOT NULL,
+        PRIMARY KEY (paper_id, rank)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS job_state (
+        job TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        updated_date TEXT NOT NULL
+    )
+    ''')
+
+def _migration_topics(cursor):
+    """Schema 3: topic clusters of the embeddings and the topic of each paper.
+    
+    Centroids are stored as float32 bytes with the number of papers that
+    have been averaged into them, so that clustering can continue from them
+    (see src/backend/topics.py).
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS topics (
+        id INTEGER PRIMARY KEY,
+        label TEXT,
+        keywords TEXT,
+        size INTEGER NOT NULL DEFAULT 0,
+        weight INTEGER NOT NULL DEFAULT 0,
+        centroid BLOB NOT NULL,
+        updated_date TEXT NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paper_topics (
+        paper_id TEXT PRIMARY KEY,
+        topic_id INTEGER NOT NULL,
+        similarity REAL NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_paper_topics_topic ON paper_topics(topic_id, similarity DESC)
+    ''')
+
+def _migration_paper_feed(cursor):
+    """Schema 4: the personalized paper feed and cached query embeddings.
+    
+    paper_feed is keyed by rank, so a page of the feed is a range of its
+    rowids (see src/backend/feed.py).
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS query_embeddings (
+        query TEXT NOT NULL,
+        model TEXT NOT NULL,
+        embedding TEXT NOT NULL,
+        created_date TEXT NOT NULL,
+        PRIMARY KEY (query, model)
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paper_feed (
+        rank INTEGER PRIMARY KEY,
+        paper_id TEXT NOT NULL,
+        score REAL NOT NULL,
+        matched_query TEXT,
+        generated_date TEXT NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_user_queries_timestamp ON user_queries(timestamp)
+    ''')
+
+def _score_bucket(column):
+    """SQL of the histogram bucket (lower bound, 0-90) of a relevance score column."""
+    return f"MAX(MIN(CAST({column} / 10 AS INTEGER), 9), 0) * 10"
+
+def _analytics_state_insert(condition):
+    """SQL statements writing the rollup keys of the papers matching a condition on papers (aliased p).
+    
+    Every paper counts once for 'all', once for its source and once for
+    each of its categories, in the month it was published.
+    """
+    sources = '''
+        LEFT JOIN latest_summaries l ON l.paper_id = p.id
+        LEFT JOIN summaries s ON s.id = l.summary_id
+    '''
+    columns = '''
+        COALESCE(substr(p.published_date, 1, 7), 'unknown'), l.summary_id IS NOT NULL,
+        p.embedding_id IS NOT NULL, s.esg_relevance_score, s.finance_relevance_score
+    '''
+    insert = '''
+        INSERT INTO analytics_paper_state (
+            paper_id, dimension, value, month, summarized, embedded, esg, finance
+        )
+    '''
+    return [
+        f'''{insert}
+        SELECT p.id, 'all', '', {columns} FROM papers p {sources}
+        WHERE {condition} AND {NOT_DUPLICATE}
+        ''',
+        f'''{insert}
+        SELECT p.id, 'source', COALESCE(p.source, 'unknown'), {columns} FROM papers p {sources}
+        WHERE {condition} AND {NOT_DUPLICATE}
+        ''',
+        f'''{insert}
+        SELECT DISTINCT p.id, 'category', j.value, {columns}
+        FROM papers p
+        JOIN json_each(CASE WHEN json_valid(p.categories) THEN p.categories ELSE '[]' END) j
+        {sources}
+        WHERE {condition} AND {NOT_DUPLICATE} AND j.type = 'text'
+        '''
+    ]
+
+def _analytics_apply(paper_id, sign):
+    """SQL adding (sign 1) or removing (sign -1) a paper's rollup keys to the rollups."""
+    histograms = "".join(f'''
+        INSERT INTO analytics_scores (dimension, value, month, metric, bucket, papers)
+        SELECT dimension, value, month, '{metric}', {_score_bucket(metric)}, {sign}
+        FROM analytics_paper_state WHERE paper_id = {paper_id} AND {metric} IS NOT NULL
+        ON CONFLICT (dimension, value, month, metric, bucket) DO UPDATE SET
+            papers = papers + excluded.papers;
+    ''' for metric in ('esg', 'finance'))
+    return f'''
+        INSERT INTO analytics_rollup (
+            dimension, value, month, papers, summarized, embedded,
+            esg_count, esg_sum, finance_count, finance_sum
+        )
+        SELECT dimension, value, month, {sign}, {sign} * summarized, {sign} * embedded,
+               {sign} * (esg IS NOT NULL), {sign} * COALESCE(esg, 0),
+               {sign} * (finance IS NOT NULL), {sign} * COALESCE(finance, 0)
+        FROM analytics_paper_state WHERE paper_id = {paper_id}
+        ON CONFLICT (dimension, value, month) DO UPDATE SET
+            papers = papers + excluded.papers,
+            summarized = summarized + excluded.summarized,
+            embedded = embedded + excluded.embedded,
+            esg_count = esg_count + excluded.esg_count,
+            esg_sum = esg_sum + excluded.esg_sum,
+            finance_count = finance_count + excluded.finance_count,
+            finance_sum = finance_sum + excluded.finance_sum;
+        {histograms}
+    '''
+
+def _analytics_refresh(paper_id):
+    """SQL replacing the contribution of a paper to the rollups with its current one."""
+    return f'''
+        {_analytics_apply(paper_id, -1)}
+        DELETE FROM analytics_paper_state WHERE paper_id = {paper_id};
+        {"".join(statement + ";" for statement in _analytics_state_insert(f"p.id = {paper_id}"))}
+        {_analytics_apply(paper_id, 1)}
+    '''
+
+def _analytics_backfill(cursor):
+    """Recompute all rollups from the papers and their latest summaries."""
+    cursor.execute("DELETE FROM analytics_paper_state")
+    cursor.execute("DELETE FROM analytics_rollup")
+    cursor.execute("DELETE FROM analytics_scores")
+    for statement in _analytics_state_insert("1"):
+        cursor.execute(statement)
+    cursor.execute('''
+    INSERT INTO analytics_rollup (
+        dimension, value, month, papers, summarized, embedded,
+        esg_count, esg_sum, finance_count, finance_sum
+    )
+    SELECT dimension, value, month, COUNT(*), SUM(summarized), SUM(embedded),
+           COUNT(esg), TOTAL(esg), COUNT(finance), TOTAL(finance)
+    FROM analytics_paper_state
+    GROUP BY dimension, value, month
+    ''')
+    for metric in ('esg', 'finance'):
+        cursor.execute(f'''
+        INSERT INTO analytics_scores (dimension, value, month, metric, bucket, papers)
+        SELECT dimension, value, month, '{metric}', {_score_bucket(metric)} AS bucket, COUNT(*)
+        FROM analytics_paper_state WHERE {metric} IS NOT NULL
+        GROUP BY dimension, value, month, bucket
+        ''')
+
+def _migration_analytics(cursor):
+    """Schema 5: score and processing rollups by category, source and month.
+    
+    analytics_paper_state holds the rollup keys and scores each paper
+    currently contributes. Triggers on papers, latest_summaries and
+    paper_duplicates subtract a changed paper's old contribution from the
+    rollups and add its new one, so the rollups stay exact under every
+    writer without parsing the JSON categories at read time.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analytics_paper_state (
+        paper_id TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        month TEXT NOT NULL,
+        summarized INTEGER NOT NULL,
+        embedded INTEGER NOT NULL,
+        esg REAL,
+        finance REAL,
+        PRIMARY KEY (paper_id, dimension, value)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analytics_rollup (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        month TEXT NOT NULL,
+        papers INTEGER NOT NULL,
+        summarized INTEGER NOT NULL,
+        embedded INTEGER NOT NULL,
+        esg_count INTEGER NOT NULL,
+        esg_sum REAL NOT NULL,
+        finance_count INTEGER NOT NULL,
+        finance_sum REAL NOT NULL,
+        PRIMARY KEY (dimension, value, month)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analytics_scores (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        month TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        papers INTEGER NOT NULL,
+        PRIMARY KEY (dimension, value, month, metric, bucket)
+    ) WITHOUT ROWID
+    ''')
+    
+    _analytics_backfill(cursor)
+    
+    for table, event, row_ids in (
+        ('papers', 'INSERT', ('NEW.id',)),
+        ('papers', 'UPDATE OF id, source, categories, published_date, embedding_id', ('OLD.id', 'NEW.id')),
+        ('papers', 'DELETE', ('OLD.id',)),
+        ('latest_summaries', 'INSERT', ('NEW.paper_id',)),
+        ('latest_summaries', 'UPDATE', ('OLD.paper_id', 'NEW.paper_id')),
+        ('latest_summaries', 'DELETE', ('OLD.paper_id',)),
+        ('paper_duplicates', 'INSERT', ('NEW.paper_id',)),
+        ('paper_duplicates', 'DELETE', ('OLD.paper_id',)),
+    ):
+        name = f"{table}_analytics_{event.split()[0].lower()}"
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {name}
+        AFTER {event} ON {table}
+        BEGIN
+            {"".join(_analytics_refresh(row_id) for row_id in row_ids)}
+        END
+        ''')
+
+def _migration_embedding_references(cursor):
+    """Schema 6: index of the embedding each paper points to.
+    
+    Storage compaction checks that no paper points to an embedding before
+    deleting it (see delete_orphaned_embeddings).
+    """
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_papers_embedding_id
+    ON papers (embedding_id)
+    ''')
+
+# Schema migrations, applied in order to databases whose user_version is lower
+MIGRATIONS = [
+    (1, _migration_latest_summaries),
+    (2, _migration_related_papers),
+    (3, _migration_topics),
+    (4, _migration_paper_feed),
+    (5, _migration_analytics),
+    (6, _migration_embedding_references),
+]
+
+def _migrate(conn):
+    """Apply the schema migrations a database hasn't seen yet.
+    
+    The schema version is kept in PRAGMA user_version. Each migration runs
+    in its own immediate transaction, so processes starting at the same
+    time apply it once.
+    
+    Args:
+        conn (sqlite3.Connection): Open connection without a pending transaction
+    """
+    cursor = conn.cursor()
+    for version, migration in MIGRATIONS:
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= version:
+            continue
+        
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if cursor.execute("PRAGMA user_version").fetchone()[0] < version:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def _create_keyword_index(cursor):
+    """Create the full-text index of paper titles and abstracts.
+    
+    papers_fts is an FTS5 table whose rowids are the rowids of papers.
+    Triggers keep it in step with every way papers are written: the BEFORE
+    INSERT trigger drops the entry of a row that INSERT OR REPLACE or an
+    upsert is about to overwrite, since REPLACE deletes without firing
+    DELETE triggers. A full VACUUM may renumber the rowids of papers, so
+    the index must be rebuilt after one (see rebuild_keyword_index).
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the database being initialized
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'papers_fts'")
+    exists = cursor.fetchone() is not None
+    
+    try:
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts
+        USING fts5(title, abstract, tokenize = 'porter unicode61')
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"Keyword search unavailable, SQLite was built without FTS5: {e}")
+        return
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS papers_fts_before_insert
+    BEFORE INSERT ON papers
+    BEGIN
+        DELETE FROM papers_fts WHERE rowid = (SELECT rowid FROM papers WHERE id = new.id);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS papers_fts_insert
+    AFTER INSERT ON papers
+    BEGIN
+        INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS papers_fts_update
+    AFTER UPDATE OF title, abstract ON papers
+    BEGIN
+        DELETE FROM papers_fts WHERE rowid = old.rowid;
+        INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS papers_fts_delete
+    AFTER DELETE ON papers
+    BEGIN
+        DELETE FROM papers_fts WHERE rowid = old.rowid;
+    END
+    ''')
+    
+    if not exists:
+        # Index the papers of an existing database
+        cursor.execute("INSERT INTO papers_fts (rowid, title, abstract) SELECT rowid, title, abstract FROM papers")
+
+@timed(DB_QUERY_SECONDS, operation="rebuild_keyword_index")
+def rebuild_keyword_index():
+    """Re-index every paper in the full-text index.
+    
+    Returns:
+        int: Number of papers indexed, or None on failure
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("DELETE FROM papers_fts")
+        cursor.execute("INSERT INTO papers_fts (rowid, title, abstract) SELECT rowid, title, abstract FROM papers")
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        print(f"Error rebuilding keyword index: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="add_paper")
 def add_paper(paper_data):
     """Add a new paper to the database.
     
@@ -120,6 +728,7 @@ def add_paper(paper_data):
         ))
         
         conn.commit()
+        invalidate_generation()
         return True
     except Exception as e:
         print(f"Error adding paper to database: {e}")
@@ -128,6 +737,25 @@ def add_paper(paper_data):
     finally:
         conn.close()
 
+def _prune_paper_summaries(cursor, paper_ids, keep=None):
+    """Delete superseded summaries of papers beyond the newest keep versions.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the writing transaction
+        paper_ids (iterable): Papers whose history to prune
+        keep (int): Summaries kept per paper, SUMMARY_CONFIG['keep_versions'] if None (0 keeps all)
+    """
+    keep = SUMMARY_CONFIG["keep_versions"] if keep is None else keep
+    if keep <= 0:
+        return
+    cursor.executemany('''
+    DELETE FROM summaries WHERE paper_id = ? AND id NOT IN (
+        SELECT id FROM summaries WHERE paper_id = ?
+        ORDER BY created_date DESC, id DESC LIMIT ?
+    )
+    ''', [(paper_id, paper_id, keep) for paper_id in paper_ids])
+
+@timed(DB_QUERY_SECONDS, operation="add_summary")
 def add_summary(summary_data):
     """Add a summary for a paper.
     
@@ -164,8 +792,10 @@ def add_summary(summary_data):
             summary_data.get('keywords'),
             summary_data.get('created_date')
         ))
+        _prune_paper_summaries(cursor, [summary_data.get('paper_id')])
         
         conn.commit()
+        invalidate_generation()
         return True
     except Exception as e:
         print(f"Error adding summary to database: {e}")
@@ -174,6 +804,7 @@ def add_summary(summary_data):
     finally:
         conn.close()
 
+@timed(DB_QUERY_SECONDS, operation="add_embedding")
 def add_embedding(embedding_data):
     """Add an embedding for a paper.
     
@@ -213,6 +844,7 @@ def add_embedding(embedding_data):
         ''', (embedding_id, embedding_data.get('paper_id')))
         
         conn.commit()
+        invalidate_generation()
         return embedding_id
     except Exception as e:
         print(f"Error adding embedding to database: {e}")
@@ -221,7 +853,191 @@ def add_embedding(embedding_data):
     finally:
         conn.close()
 
-def get_papers(limit=100, offset=0, category=None, query=None):
+def _json_field(value):
+    """Encode a list field as a JSON string, leaving other values as they are."""
+    if isinstance(value, list):
+        return json.dumps(value)
+    return value
+
+@timed(DB_QUERY_SECONDS, operation="add_papers_batch")
+def add_papers_batch(papers):
+    """Add or update many papers in a single transaction.
+    
+    Unlike add_paper, an existing paper keeps its embedding_id unless the
+    new data carries one.
+    
+    Args:
+        papers (list): Paper dictionaries, as accepted by add_paper
+        
+    Returns:
+        int: Number of papers written, 0 on failure
+    """
+    now = datetime.now().isoformat()
+    rows = [
+        (
+            paper.get('id'),
+            paper.get('title'),
+            paper.get('abstract'),
+            _json_field(paper.get('authors')),
+            paper.get('url'),
+            paper.get('pdf_url'),
+            paper.get('published_date'),
+            paper.get('source'),
+            _json_field(paper.get('categories')),
+            paper.get('retrieved_date') or now,
+            paper.get('embedding_id')
+        )
+        for paper in papers
+    ]
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.executemany('''
+        INSERT INTO papers (
+            id, title, abstract, authors, url, pdf_url, published_date,
+            source, categories, retrieved_date, embedding_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            title = excluded.title,
+            abstract = excluded.abstract,
+            authors = excluded.authors,
+            url = excluded.url,
+            pdf_url = excluded.pdf_url,
+            published_date = excluded.published_date,
+            source = excluded.source,
+            categories = excluded.categories,
+            retrieved_date = excluded.retrieved_date,
+            embedding_id = COALESCE(excluded.embedding_id, papers.embedding_id)
+        ''', rows)
+        
+        conn.commit()
+        invalidate_generation()
+        return len(rows)
+    except Exception as e:
+        print(f"Error adding papers to database: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="add_summaries_batch")
+def add_summaries_batch(summaries):
+    """Add many summaries in a single transaction.
+    
+    A summary whose paper already has a summary with the same created_date
+    is skipped, so importing the same corpus twice does not duplicate them.
+    
+    Args:
+        summaries (list): Summary dictionaries, as accepted by add_summary
+        
+    Returns:
+        int: Number of summaries written, 0 on failure
+    """
+    now = datetime.now().isoformat()
+    rows = []
+    for summary in summaries:
+        created_date = summary.get('created_date') or now
+        rows.append((
+            summary.get('paper_id'),
+            summary.get('summary'),
+            summary.get('esg_relevance_score'),
+            summary.get('finance_relevance_score'),
+            _json_field(summary.get('key_findings', [])),
+            _json_field(summary.get('keywords', [])),
+            created_date,
+            summary.get('paper_id'),
+            created_date
+        ))
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.executemany('''
+        INSERT INTO summaries (
+            paper_id, summary, esg_relevance_score, finance_relevance_score,
+            key_findings, keywords, created_date
+        )
+        SELECT ?, ?, ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (
+            SELECT 1 FROM summaries WHERE paper_id = ? AND created_date = ?
+        )
+        ''', rows)
+        written = cursor.rowcount
+        _prune_paper_summaries(cursor, {summary.get('paper_id') for summary in summaries})
+        
+        conn.commit()
+        invalidate_generation()
+        return written
+    except Exception as e:
+        print(f"Error adding summaries to database: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="add_embeddings_batch")
+def add_embeddings_batch(embeddings):
+    """Add many embeddings in a single transaction and point their papers at them.
+    
+    An embedding whose paper already has one with the same created_date is
+    not inserted again (the paper is pointed at the existing one), so
+    importing the same corpus twice does not duplicate them.
+    
+    Args:
+        embeddings (list): Embedding dictionaries, as accepted by add_embedding
+        
+    Returns:
+        int: Number of embeddings written, 0 on failure
+    """
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        written = 0
+        for embedding_data in embeddings:
+            created_date = embedding_data.get('created_date') or now
+            cursor.execute(
+                "SELECT id FROM embeddings WHERE paper_id = ? AND created_date = ?",
+                (embedding_data.get('paper_id'), created_date)
+            )
+            existing = cursor.fetchone()
+            if existing:
+                embedding_id = existing[0]
+            else:
+                cursor.execute('''
+                INSERT INTO embeddings (
+                    paper_id, embedding, model, created_date
+                ) VALUES (?, ?, ?, ?)
+                ''', (
+                    embedding_data.get('paper_id'),
+                    _json_field(embedding_data.get('embedding')),
+                    embedding_data.get('model'),
+                    created_date
+                ))
+                embedding_id = cursor.lastrowid
+                written += 1
+            
+            cursor.execute(
+                "UPDATE papers SET embedding_id = ? WHERE id = ? AND embedding_id IS NOT ?",
+                (embedding_id, embedding_data.get('paper_id'), embedding_id)
+            )
+        
+        conn.commit()
+        invalidate_generation()
+        return written
+    except Exception as e:
+        print(f"Error adding embeddings to database: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_papers")
+def get_papers(limit=100, offset=0, category=None, query=None, fields=None):
     """Get papers from the database with optional filtering.
     
     Args:
@@ -229,6 +1045,7 @@ def get_papers(limit=100, offset=0, category=None, query=None):
         offset (int): Offset for pagination
         category (str): Optional category filter
         query (str): Optional text search query
+        fields (list): Optional paper columns to return (id is always included)
         
     Returns:
         list: List of paper dictionaries
@@ -237,7 +1054,13 @@ def get_papers(limit=100, offset=0, category=None, query=None):
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    sql = "SELECT * FROM papers"
+    columns = "*"
+    if fields:
+        # Only read the requested columns, e.g. to skip abstracts in list views
+        selected = ['id'] + [c for c in PAPER_COLUMNS if c in fields and c != 'id']
+        columns = ", ".join(selected)
+    
+    sql = f"SELECT {columns} FROM papers"
     params = []
     
     # Add filters if provided
@@ -262,12 +1085,12 @@ def get_papers(limit=100, offset=0, category=None, query=None):
         
         # Parse JSON strings back to lists
         for paper in papers:
-            if paper['authors']:
+            if paper.get('authors'):
                 try:
                     paper['authors'] = json.loads(paper['authors'])
                 except:
                     pass
-            if paper['categories']:
+            if paper.get('categories'):
                 try:
                     paper['categories'] = json.loads(paper['categories'])
                 except:
@@ -280,6 +1103,7 @@ def get_papers(limit=100, offset=0, category=None, query=None):
     finally:
         conn.close()
 
+@timed(DB_QUERY_SECONDS, operation="get_paper_with_summary")
 def get_paper_with_summary(paper_id):
     """Get a paper with its summary and embedding.
     
@@ -313,8 +1137,17 @@ def get_paper_with_summary(paper_id):
             except:
                 pass
         
+        # Near-duplicates share the summary of the paper they duplicate
+        cursor.execute("SELECT duplicate_of FROM paper_duplicates WHERE paper_id = ?", (paper_id,))
+        duplicate_row = cursor.fetchone()
+        if duplicate_row:
+            paper['duplicate_of'] = duplicate_row[0]
+        
         # Get the summary
-        cursor.execute("SELECT * FROM summaries WHERE paper_id = ? ORDER BY created_date DESC LIMIT 1", (paper_id,))
+        cursor.execute('''
+        SELECT s.* FROM latest_summaries l JOIN summaries s ON s.id = l.summary_id
+        WHERE l.paper_id = ?
+        ''', (paper.get('duplicate_of', paper_id),))
         summary_row = cursor.fetchone()
         if summary_row:
             summary = dict(summary_row)
@@ -330,6 +1163,15 @@ def get_paper_with_summary(paper_id):
                     pass
             paper['summary'] = summary
         
+        # arXiv version history, newest first
+        cursor.execute('''
+        SELECT version, updated_date FROM paper_versions
+        WHERE paper_id = ? ORDER BY version DESC
+        ''', (paper_id,))
+        versions = [dict(row) for row in cursor.fetchall()]
+        if versions:
+            paper['versions'] = versions
+        
         return paper
     except Exception as e:
         print(f"Error retrieving paper with summary: {e}")
@@ -337,22 +1179,339 @@ def get_paper_with_summary(paper_id):
     finally:
         conn.close()
 
-def search_by_embedding(embedding_vector, limit=5):
-    """Search for papers by embedding similarity.
+@timed(DB_QUERY_SECONDS, operation="get_embedding_dimension")
+def get_embedding_dimension():
+    """Get the dimensionality of the most recently stored embedding.
     
-    Args:
-        embedding_vector (list): Embedding vector to search with
-        limit (int): Maximum number of results
-        
     Returns:
-        list: Similar papers with similarity scores
+        int: Number of dimensions, or None if there are no embeddings
     """
-    # This would be more efficient with a vector database like FAISS or Pinecone
-    # For SQLite, we'll implement a simple but less efficient approach
-    # This would need to be optimized for production use
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT embedding FROM embeddings ORDER BY id DESC LIMIT 1")
+        row = cursor.fetchone()
+        if not row or not row[0]:
+            return None
+        return len(json.loads(row[0]))
+    except Exception as e:
+        print(f"Error reading embedding dimension: {e}")
+        return None
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_max_embedding_id")
+def get_max_embedding_id():
+    """Get the id of the most recently stored embedding.
     
+    Returns:
+        int: Largest embedding id, 0 if there are no embeddings
+    """
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM embeddings")
+        return cursor.fetchone()[0]
+    except Exception as e:
+        print(f"Error reading the latest embedding id: {e}")
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_current_embedding_ids")
+def get_current_embedding_ids():
+    """Get the ids of the embeddings papers currently point to.
+    
+    Returns:
+        list: Embedding ids, or None if they couldn't be read
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT CAST(embedding_id AS INTEGER) FROM papers WHERE embedding_id IS NOT NULL")
+        return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error reading current embedding ids: {e}")
+        return None
+    finally:
+        conn.close()
+
+def iter_corpus(batch_size=1000, include_embeddings=True):
+    """Stream every paper with its latest summary and current embedding.
+    
+    Rows are read in batches from a single cursor, so memory use does not
+    grow with the size of the corpus.
+    
+    Args:
+        batch_size (int): Rows fetched from SQLite at a time
+        include_embeddings (bool): Whether to read and decode embeddings
+        
+    Yields:
+        dict: Flat corpus record (paper fields, summary_* fields, embedding fields)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    embedding_columns = "e.embedding, e.model AS embedding_model, e.created_date AS embedding_created_date"
+    if not include_embeddings:
+        embedding_columns = "NULL AS embedding, NULL AS embedding_model, NULL AS embedding_created_date"
+    
+    try:
+        cursor.execute(f'''
+        SELECT p.id, p.title, p.abstract, p.authors, p.url, p.pdf_url, p.published_date,
+               p.source, p.categories, p.retrieved_date,
+               s.summary, s.esg_relevance_score, s.finance_relevance_score,
+               s.key_findings, s.keywords, s.created_date AS summary_created_date,
+               {embedding_columns}
+        FROM papers p
+        LEFT JOIN latest_summaries l ON l.paper_id = p.id
+        LEFT JOIN summaries s ON s.id = l.summary_id
+        LEFT JOIN embeddings e ON e.id = p.embedding_id
+        ORDER BY p.id
+        ''')
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                record = dict(row)
+                for field in ('authors', 'categories', 'key_findings', 'keywords', 'embedding'):
+                    if record[field]:
+                        try:
+                            record[field] = json.loads(record[field])
+                        except:
+                            pass
+                yield record
+    finally:
+        conn.close()
+
+def iter_embeddings(after_id=0, current_only=False, batch_size=1000):
+    """Stream stored embeddings in id order.
+    
+    Args:
+        after_id (int): Only return embeddings with a larger id
+        current_only (bool): Only return embeddings papers currently point to
+        batch_size (int): Rows fetched from SQLite at a time
+        
+    Yields:
+        tuple: (embedding id, paper id, embedding vector)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    sql = "SELECT e.id, e.paper_id, e.embedding FROM embeddings e"
+    if current_only:
+        sql += " JOIN papers p ON p.embedding_id = CAST(e.id AS TEXT)"
+    sql += " WHERE e.id > ? ORDER BY e.id"
+    
+    try:
+        cursor.execute(sql, (after_id,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for embedding_id, paper_id, embedding in rows:
+                try:
+                    yield embedding_id, paper_id, json.loads(embedding)
+                except (TypeError, ValueError):
+                    continue
+    finally:
+        conn.close()
+
+def normalize_filters(filters):
+    """Validate search filters.
+    
+    Args:
+        filters (dict): Filters from a request, with any of the keys in
+            SEARCH_FILTERS: category (prefix such as 'q-fin' or a full
+            category), source, date_from and date_to (YYYY-MM-DD, inclusive
+            bounds on published_date), min_esg_score and min_finance_score
+            (bounds on the latest summary's scores) and topic (a topic id,
+            see src/backend/topics.py)
+        
+    Returns:
+        dict: Filters with normalized values, or None if nothing is filtered
+        
+    Raises:
+        ValueError: If a filter is unknown or has an invalid value
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    
+    unknown = set(filters) - set(SEARCH_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+    
+    normalized = {}
+    for key, value in filters.items():
+        if value is None or value == '':
+            continue
+        if key in ('category', 'source'):
+            normalized[key] = str(value)
+        elif key in ('date_from', 'date_to'):
+            try:
+                normalized[key] = datetime.strptime(str(value)[:10], '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                raise ValueError(f"{key} must be a date (YYYY-MM-DD)")
+        elif key == 'topic':
+            try:
+                normalized[key] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be a topic id")
+        else:
+            try:
+                normalized[key] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be a number")
+    return normalized or None
+
+def _filter_conditions(filters):
+    """Build SQL conditions on papers (aliased p) for search filters.
+    
+    Args:
+        filters (dict): Normalized filters
+        
+    Returns:
+        tuple: (list of SQL conditions, list of parameters)
+    """
+    conditions = []
+    params = []
+    if not filters:
+        return conditions, params
+    
+    if 'category' in filters:
+        # A full category, or an archive prefix matching its subcategories (q-fin -> q-fin.GN)
+        conditions.append('''
+        EXISTS (SELECT 1 FROM json_each(CASE WHEN json_valid(p.categories) THEN p.categories ELSE '[]' END)
+                WHERE value = ? OR value LIKE ? ESCAPE '\\')
+        ''')
+        escaped = re.sub(r'([\\%_])', r'\\\1', filters['category'])
+        params.extend([filters['category'], f"{escaped}.%"])
+    if 'source' in filters:
+        conditions.append("p.source = ?")
+        params.append(filters['source'])
+    if 'date_from' in filters:
+        conditions.append("p.published_date >= ?")
+        params.append(filters['date_from'])
+    if 'date_to' in filters:
+        conditions.append("p.published_date < date(?, '+1 day')")
+        params.append(filters['date_to'])
+    
+    for key, column in (('min_esg_score', 'esg_relevance_score'), ('min_finance_score', 'finance_relevance_score')):
+        if key in filters:
+            # Scores of the latest summary, as shown with the paper
+            conditions.append(f'''
+            (SELECT s.{column} FROM latest_summaries l JOIN summaries s ON s.id = l.summary_id
+             WHERE l.paper_id = p.id) >= ?
+            ''')
+            params.append(filters[key])
+    
+    if 'topic' in filters:
+        conditions.append("p.id IN (SELECT paper_id FROM paper_topics WHERE topic_id = ?)")
+        params.append(filters['topic'])
+    
+    return conditions, params
+
+@timed(DB_QUERY_SECONDS, operation="filter_paper_ids")
+def filter_paper_ids(filters):
+    """Get the ids of the papers matching search filters.
+    
+    Results are cached per database generation, so repeated searches with
+    the same filters reuse the id set (and the embedding store the rows it
+    maps to) until the papers or summaries change.
+    
+    Args:
+        filters (dict): Normalized filters
+        
+    Returns:
+        tuple: (frozenset of paper ids, cache key of the set or None)
+    """
+    generation = get_generation()
+    key = None
+    if generation is not None:
+        key = (str(DB_PATH), generation, tuple(sorted(filters.items())))
+        with _filter_lock:
+            ids = _filter_cache.get(key)
+            if ids is not None:
+                _filter_cache.move_to_end(key)
+                return ids, key
+    
+    conditions, params = _filter_conditions(filters)
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT p.id FROM papers p WHERE " + " AND ".join(conditions), params)
+        ids = frozenset(row[0] for row in cursor.fetchall())
+    finally:
+        conn.close()
+    
+    if key is not None:
+        with _filter_lock:
+            _filter_cache[key] = ids
+            while len(_filter_cache) > FILTER_CACHE_SIZE:
+                _filter_cache.popitem(last=False)
+    return ids, key
+
+def _search_embedding_store(embedding_vector, limit, paper_ids=None, filter_key=None):
+    """Rank papers with the memory-mapped embedding store.
+    
+    Embeddings added since the store was last synced are scored from SQLite
+    and merged in, so results don't lag behind processing runs.
+    
+    Args:
+        embedding_vector (list): Embedding vector to search with
+        limit (int): Number of candidates to take from the store
+        paper_ids (frozenset): Only rank these papers, None for all
+        filter_key (tuple): Cache key of paper_ids
+        
+    Returns:
+        list: {'paper_id', 'similarity'} dictionaries, best first, or None
+        if the store can't be used
+    """
+    from src.backend.embedding_store import get_embedding_store
+    
+    store = get_embedding_store()
+    if store is None:
+        return None
+    
+    found = store.search(embedding_vector, limit=limit, paper_ids=paper_ids, filter_key=filter_key)
+    if found is None:
+        return None
+    
+    ranked, last_embedding_id = found
+    scores = dict(ranked)
+    for _, paper_id, db_vector in iter_embeddings(after_id=last_embedding_id):
+        if paper_ids is not None and paper_id not in paper_ids:
+            continue
+        try:
+            scores[paper_id] = compute_similarity(embedding_vector, db_vector)
+        except:
+            continue
+    
+    results = [{'paper_id': paper_id, 'similarity': score} for paper_id, score in scores.items()]
+    results.sort(key=lambda x: x['similarity'], reverse=True)
+    return results
+
+def _scan_embeddings(embedding_vector, paper_ids=None):
+    """Rank papers by decoding and scoring every stored embedding.
+    
+    Args:
+        embedding_vector (list): Embedding vector to search with
+        paper_ids (frozenset): Only decode and score these papers, None for all
+        
+    Returns:
+        list: {'paper_id', 'similarity'} dictionaries, best first
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
     try:
@@ -361,9 +1520,10 @@ def search_by_embedding(embedding_vector, limit=5):
         embeddings = [dict(row) for row in cursor.fetchall()]
         
         results = []
-        embedding_vec_json = json.dumps(embedding_vector)
         
         for emb in embeddings:
+            if paper_ids is not None and emb['paper_id'] not in paper_ids:
+                continue
             try:
                 db_vector = json.loads(emb['embedding'])
                 # Compute cosine similarity (simplified)
@@ -378,26 +1538,351 @@ def search_by_embedding(embedding_vector, limit=5):
                 
         # Sort by similarity (descending)
         results.sort(key=lambda x: x['similarity'], reverse=True)
+        return results
+    finally:
+        conn.close()
+
+def _rank_by_embedding(embedding_vector, limit, filters=None):
+    """Rank papers by embedding similarity.
+    
+    Filters are resolved to a set of paper ids first, so only the papers
+    that match them are scored. With SEARCH_CONFIG['topic_probes'] set,
+    only the papers of the topics nearest to the query are scored as well
+    (unless that leaves nothing to score).
+    
+    Args:
+        embedding_vector (list): Embedding vector to search with
+        limit (int): Number of candidates wanted from the embedding store
+        filters (dict): Normalized search filters
+        
+    Returns:
+        list: {'paper_id', 'similarity'} dictionaries, best first
+    """
+    paper_ids, filter_key = filter_paper_ids(filters) if filters else (None, None)
+    if paper_ids is not None and not paper_ids:
+        return []
+    
+    if SEARCH_CONFIG["topic_probes"] and not (filters and 'topic' in filters):
+        from src.backend.topics import probe_topics
         
-        # Get the top papers
-        top_results = results[:limit]
-        paper_ids = [r['paper_id'] for r in top_results]
+        topic_paper_ids, topic_key = probe_topics(embedding_vector, SEARCH_CONFIG["topic_probes"])
+        if topic_paper_ids and paper_ids is None:
+            paper_ids, filter_key = topic_paper_ids, topic_key
+        elif topic_paper_ids and paper_ids & topic_paper_ids:
+            paper_ids = paper_ids & topic_paper_ids
+            filter_key = (filter_key, topic_key) if filter_key and topic_key else None
+    
+    results = _search_embedding_store(embedding_vector, limit, paper_ids=paper_ids, filter_key=filter_key)
+    if results is None:
+        results = _scan_embeddings(embedding_vector, paper_ids=paper_ids)
+    return results
+
+def _hydrate(results, limit):
+    """Load the papers of ranked results, skipping papers that no longer exist.
+    
+    Args:
+        results (list): Ranked dictionaries with a paper_id and score fields
+        limit (int): Maximum number of papers
         
-        # Get the paper data
-        papers = []
-        for i, paper_id in enumerate(paper_ids):
-            paper = get_paper_with_summary(paper_id)
-            if paper:
-                paper['similarity'] = top_results[i]['similarity']
-                papers.append(paper)
-                
-        return papers
+    Returns:
+        list: Papers with summaries and the score fields of their result
+    """
+    papers = []
+    for result in results:
+        if len(papers) >= limit:
+            break
+        paper = get_paper_with_summary(result['paper_id'])
+        if paper:
+            for key, value in result.items():
+                if key != 'paper_id':
+                    paper[key] = value
+            papers.append(paper)
+    return papers
+
+@timed(DB_QUERY_SECONDS, operation="search_by_embedding")
+def search_by_embedding(embedding_vector, limit=5, filters=None):
+    """Search for papers by embedding similarity.
+    
+    Uses the memory-mapped embedding store when it has been built and falls
+    back to scanning the embeddings table otherwise.
+    
+    Args:
+        embedding_vector (list): Embedding vector to search with
+        limit (int): Maximum number of results
+        filters (dict): Normalized search filters (see normalize_filters)
+        
+    Returns:
+        list: Similar papers with similarity scores
+    """
+    try:
+        # A few spare candidates in case a paper has been removed since
+        return _hydrate(_rank_by_embedding(embedding_vector, limit + 5, filters=filters), limit)
     except Exception as e:
         print(f"Error searching by embedding: {e}")
         return []
+
+def _match_expression(query):
+    """Turn free text into an FTS5 query matching any of its terms.
+    
+    Terms are quoted so that FTS5 operators and punctuation in the query are
+    taken literally; bm25 ranks papers matching more (and rarer) terms first.
+    
+    Args:
+        query (str): Search text
+        
+    Returns:
+        str: MATCH expression, or None if the query has no terms
+    """
+    terms = re.findall(r'\w+', query or '')[:32]
+    if not terms:
+        return None
+    return ' OR '.join(f'"{term}"' for term in dict.fromkeys(term.lower() for term in terms))
+
+@timed(DB_QUERY_SECONDS, operation="search_by_keywords")
+def search_by_keywords(query, limit=50, filters=None):
+    """Rank papers by full-text relevance of their title and abstract.
+    
+    Args:
+        query (str): Search text
+        limit (int): Maximum number of results
+        filters (dict): Normalized search filters
+        
+    Returns:
+        list: {'paper_id', 'keyword_score'} dictionaries, best first (the
+        score is the negated bm25 rank, higher is better)
+    """
+    expression = _match_expression(query)
+    if expression is None:
+        return []
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    conditions, params = _filter_conditions(filters)
+    
+    try:
+        # Title matches weigh twice as much as abstract matches
+        cursor.execute('''
+        SELECT p.id, bm25(papers_fts, 2.0, 1.0) AS rank
+        FROM papers_fts
+        JOIN papers p ON p.rowid = papers_fts.rowid
+        WHERE papers_fts MATCH ?
+        ''' + ''.join(f" AND {condition}" for condition in conditions) + '''
+        ORDER BY rank
+        LIMIT ?
+        ''', [expression] + params + [limit])
+        return [{'paper_id': paper_id, 'keyword_score': -rank} for paper_id, rank in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error searching by keywords: {e}")
+        return []
+    finally:
+        conn.close()
+
+def _similarities(embedding_vector, paper_ids):
+    """Score the current embeddings of a few papers against a query vector.
+    
+    Args:
+        embedding_vector (list): Embedding vector to search with
+        paper_ids (list): Papers to score
+        
+    Returns:
+        dict: Paper id -> similarity, for papers that have an embedding
+    """
+    if not paper_ids:
+        return {}
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        placeholders = ','.join('?' * len(paper_ids))
+        cursor.execute(f'''
+        SELECT p.id, e.embedding FROM papers p
+        JOIN embeddings e ON e.id = p.embedding_id
+        WHERE p.id IN ({placeholders})
+        ''', list(paper_ids))
+        
+        scores = {}
+        for paper_id, embedding in cursor.fetchall():
+            try:
+                scores[paper_id] = compute_similarity(embedding_vector, json.loads(embedding))
+            except (TypeError, ValueError):
+                continue
+        return scores
+    finally:
+        conn.close()
+
+def fuse_rankings(rankings, k=60):
+    """Fuse rankings with reciprocal rank fusion.
+    
+    Each paper scores sum(1 / (k + rank)) over the rankings it appears in,
+    so papers ranked well by both retrievers come first without the two
+    retrievers' scores having to be comparable.
+    
+    Args:
+        rankings (list): Lists of paper ids, best first
+        k (int): Fusion constant damping the weight of the top ranks
+        
+    Returns:
+        list: (paper_id, fused score) tuples, best first
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, paper_id in enumerate(dict.fromkeys(ranking), start=1):
+            scores[paper_id] = scores.get(paper_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+@timed(DB_QUERY_SECONDS, operation="search_hybrid")
+def search_hybrid(embedding_vector, keyword_results, limit=5, filters=None):
+    """Search by embedding and fuse the ranking with a keyword ranking.
+    
+    The keyword search is passed in rather than run here, so that callers
+    can run it while the query is still being embedded.
+    
+    Args:
+        embedding_vector (list): Embedding vector to search with
+        keyword_results (list): Result of search_by_keywords for the query,
+            with the same filters
+        limit (int): Maximum number of results
+        filters (dict): Normalized search filters
+        
+    Returns:
+        list: Papers with the fused score, similarity and keyword_score
+        (None for a paper the keyword search did not match)
+    """
+    try:
+        vector_results = _rank_by_embedding(embedding_vector, SEARCH_CONFIG["candidates"], filters=filters)
+        vector_results = vector_results[:SEARCH_CONFIG["candidates"]]
+        
+        similarities = {}
+        for result in vector_results:
+            similarities.setdefault(result['paper_id'], result['similarity'])
+        keyword_scores = {result['paper_id']: result['keyword_score'] for result in keyword_results}
+        
+        fused = fuse_rankings(
+            [[result['paper_id'] for result in vector_results], [result['paper_id'] for result in keyword_results]],
+            k=SEARCH_CONFIG["rrf_k"]
+        )
+        # A few spare candidates in case a paper has been removed since
+        fused = fused[:limit + 5]
+        
+        # Papers found only by keywords still get their similarity
+        missing = [paper_id for paper_id, _ in fused if paper_id not in similarities]
+        similarities.update(_similarities(embedding_vector, missing))
+        
+        return _hydrate([
+            {
+                'paper_id': paper_id,
+                'score': score,
+                'similarity': similarities.get(paper_id),
+                'keyword_score': keyword_scores.get(paper_id)
+            }
+            for paper_id, score in fused
+        ], limit)
+    except Exception as e:
+        print(f"Error in hybrid search: {e}")
+        return []
+
+@timed(DB_QUERY_SECONDS, operation="search_keyword_papers")
+def search_keyword_papers(query, limit=5, filters=None):
+    """Search for papers by keywords only.
+    
+    Args:
+        query (str): Search text
+        limit (int): Maximum number of results
+        filters (dict): Normalized search filters
+        
+    Returns:
+        list: Matching papers with keyword scores
+    """
+    try:
+        return _hydrate(search_by_keywords(query, limit + 5, filters=filters), limit)
+    except Exception as e:
+        print(f"Error searching by keywords: {e}")
+        return []
+
+@timed(DB_QUERY_SECONDS, operation="count_unprocessed_papers")
+def count_unprocessed_papers():
+    """Count papers that do not have a summary yet.
+    
+    Returns:
+        int: Number of unprocessed papers
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f'''
+        SELECT COUNT(*) FROM papers p
+        WHERE NOT EXISTS (SELECT 1 FROM summaries s WHERE s.paper_id = p.id)
+        AND {NOT_DUPLICATE}
+        ''')
+        return cursor.fetchone()[0]
+    except Exception as e:
+        print(f"Error counting unprocessed papers: {e}")
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="read_generation")
+def _read_generation():
+    """Read the generation counter from the database.
+    
+    Returns:
+        tuple: (generation, last write as a UTC datetime), or None if the
+        database has no generation counter yet
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT generation, updated_date FROM db_meta WHERE id = 1")
+        row = cursor.fetchone()
+        if not row:
+            return None
+        updated = datetime.strptime(row[1], '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+        return row[0], updated
+    except sqlite3.OperationalError:
+        # Databases created before the counter existed get it from init_db()
+        return None
+    except Exception as e:
+        print(f"Error reading database generation: {e}")
+        return None
     finally:
         conn.close()
 
+def get_generation():
+    """Get the database generation counter.
+    
+    The counter changes whenever papers, summaries or embeddings are written.
+    Reads are reused for RESPONSE_CACHE_CONFIG['generation_ttl'] seconds, so
+    frequent polling does not have to open the database on every request.
+    
+    Returns:
+        tuple: (generation, last write as a UTC datetime), or None if the
+        database has no generation counter yet
+    """
+    now = time.monotonic()
+    with _generation_lock:
+        if (_generation_cache['db_path'] == DB_PATH
+                and now - _generation_cache['checked'] < RESPONSE_CACHE_CONFIG["generation_ttl"]):
+            return _generation_cache['value']
+        invalidations = _generation_cache['invalidations']
+    
+    value = _read_generation()
+    
+    with _generation_lock:
+        # Don't cache a read that may have raced with a write by this process
+        if _generation_cache['invalidations'] == invalidations:
+            _generation_cache.update(db_path=DB_PATH, value=value, checked=now)
+    return value
+
+def invalidate_generation():
+    """Forget the cached generation so the next read sees this process's writes."""
+    with _generation_lock:
+        _generation_cache['checked'] = float('-inf')
+        _generation_cache['invalidations'] += 1
+
 def compute_similarity(vec1, vec2):
     """Compute cosine similarity between two vectors.
     
@@ -419,6 +1904,7 @@ def compute_similarity(vec1, vec2):
     similarity = dot_product / (norm_v1 * norm_v2)
     return float(similarity)
 
+@timed(DB_QUERY_SECONDS, operation="log_user_query")
 def log_user_query(query):
     """Log a user query to track interests.
     
@@ -446,6 +1932,1599 @@ def log_user_query(query):
     finally:
         conn.close()
 
+@timed(DB_QUERY_SECONDS, operation="claim_work")
+def claim_work(stage, worker_id, limit=10, lease_seconds=300, max_attempts=3, paper_ids=None):
+    """Atomically claim papers that need a processing stage.
+    
+    A paper can be claimed if it still needs the stage and has no lease, or
+    only an expired one (its worker crashed or stopped heartbeating). Papers
+    whose claims have failed max_attempts times are left alone. The claim
+    runs in an immediate transaction, so concurrent workers never get the
+    same paper.
+    
+    Args:
+        stage (str): Processing stage, a key of WORK_STAGES
+        worker_id (str): Claiming worker
+        limit (int): Maximum number of papers to claim
+        lease_seconds (float): Lease duration, renewed by heartbeat_leases
+        max_attempts (int): Claims after which a paper is given up on
+        paper_ids (list): Only claim among these papers, if given
+        
+    Returns:
+        list: Claimed paper ids, newest papers first
+    """
+    needs_stage = WORK_STAGES[stage]
+    now = time.time()
+    
+    params = [stage, now, max_attempts]
+    if paper_ids is not None:
+        if not paper_ids:
+            return []
+        needs_stage += f" AND p.id IN ({', '.join('?' * len(paper_ids))})"
+        params = list(paper_ids) + params
+    
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f'''
+        SELECT p.id FROM papers p
+        WHERE {needs_stage}
+        AND {NOT_DUPLICATE}
+        AND NOT EXISTS (
+            SELECT 1 FROM work_leases l
+            WHERE l.stage = ? AND l.paper_id = p.id
+            AND (l.expires_at > ? OR l.attempts >= ?)
+        )
+        ORDER BY p.published_date DESC
+        LIMIT ?
+        ''', params + [limit])
+        paper_ids = [row[0] for row in cursor.fetchall()]
+        
+        cursor.executemany('''
+        INSERT INTO work_leases (stage, paper_id, worker_id, claimed_at, expires_at, attempts)
+        VALUES (?, ?, ?, ?, ?, 1)
+        ON CONFLICT (stage, paper_id) DO UPDATE SET
+            worker_id = excluded.worker_id,
+            claimed_at = excluded.claimed_at,
+            expires_at = excluded.expires_at,
+            attempts = work_leases.attempts + 1
+        ''', [(stage, paper_id, worker_id, now, now + lease_seconds) for paper_id in paper_ids])
+        
+        cursor.execute("COMMIT")
+        return paper_ids
+    except Exception as e:
+        print(f"Error claiming {stage} work: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="heartbeat_leases")
+def heartbeat_leases(worker_id, lease_seconds=300):
+    """Extend all leases held by a worker.
+    
+    Args:
+        worker_id (str): Worker holding the leases
+        lease_seconds (float): New lease duration from now
+        
+    Returns:
+        int: Number of leases extended
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        UPDATE work_leases SET expires_at = ?
+        WHERE worker_id = ?
+        ''', (time.time() + lease_seconds, worker_id))
+        
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        print(f"Error renewing leases: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="release_lease")
+def release_lease(stage, paper_id, worker_id, failed=False, retry_delay=600):
+    """Release a lease once its work is done or has failed.
+    
+    A successful lease is deleted. A failed one is kept, unowned, so that
+    its attempt count survives and the paper is retried after retry_delay.
+    
+    Args:
+        stage (str): Processing stage
+        paper_id (str): Leased paper
+        worker_id (str): Worker holding the lease
+        failed (bool): Whether the work failed
+        retry_delay (float): Seconds before a failed paper can be claimed again
+        
+    Returns:
+        bool: True if the worker still held the lease
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        if failed:
+            cursor.execute('''
+            UPDATE work_leases SET worker_id = NULL, expires_at = ?
+            WHERE stage = ? AND paper_id = ? AND worker_id = ?
+            ''', (time.time() + retry_delay, stage, paper_id, worker_id))
+        else:
+            cursor.execute('''
+            DELETE FROM work_leases
+            WHERE stage = ? AND paper_id = ? AND worker_id = ?
+            ''', (stage, paper_id, worker_id))
+        
+        conn.commit()
+        return cursor.rowcount > 0
+    except Exception as e:
+        print(f"Error releasing lease: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="release_worker_leases")
+def release_worker_leases(worker_id):
+    """Release every lease of a worker that is shutting down.
+    
+    The papers become claimable at once instead of after their leases expire.
+    
+    Args:
+        worker_id (str): Worker holding the leases
+        
+    Returns:
+        int: Number of leases released
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        # Keep the attempt counts, only give up ownership
+        cursor.execute('''
+        UPDATE work_leases SET worker_id = NULL, expires_at = 0
+        WHERE worker_id = ?
+        ''', (worker_id,))
+        
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        print(f"Error releasing leases: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+# Paper fields compared to decide whether a collected paper changed
+PAPER_CONTENT_FIELDS = ('title', 'abstract', 'authors', 'url', 'pdf_url', 'published_date', 'categories')
+
+@timed(DB_QUERY_SECONDS, operation="find_changed_papers")
+def find_changed_papers(papers):
+    """Select the collected papers that are new or differ from the stored copy.
+    
+    Args:
+        papers (list): Paper dictionaries, as accepted by add_paper
+        
+    Returns:
+        list: The papers that are not stored yet or whose content changed
+    """
+    if not papers:
+        return []
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        stored = {}
+        ids = [paper.get('id') for paper in papers]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            cursor.execute(f'''
+            SELECT id, {', '.join(PAPER_CONTENT_FIELDS)} FROM papers
+            WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            stored.update((row[0], row[1:]) for row in cursor.fetchall())
+        
+        changed = []
+        for paper in papers:
+            values = tuple(
+                json.dumps(paper.get(field)) if isinstance(paper.get(field), list) else paper.get(field)
+                for field in PAPER_CONTENT_FIELDS
+            )
+            if stored.get(paper.get('id')) != values:
+                changed.append(paper)
+        return changed
+    except Exception as e:
+        print(f"Error comparing collected papers: {e}")
+        return list(papers)
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="add_paper_events")
+def add_paper_events(paper_ids):
+    """Queue papers for event-driven processing.
+    
+    Args:
+        paper_ids (list): Ids of new or changed papers
+        
+    Returns:
+        int: Number of events added
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        now = time.time()
+        cursor.executemany('''
+        INSERT INTO paper_events (paper_id, created_at) VALUES (?, ?)
+        ''', [(paper_id, now) for paper_id in paper_ids])
+        
+        conn.commit()
+        return len(paper_ids)
+    except Exception as e:
+        print(f"Error adding paper events: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="take_paper_events")
+def take_paper_events(limit=10):
+    """Remove and return the oldest queued paper events.
+    
+    Events are deleted in the same transaction that reads them, so
+    concurrent consumers never take the same event.
+    
+    Args:
+        limit (int): Maximum number of events to take
+        
+    Returns:
+        list: Paper ids, oldest first
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute('''
+        SELECT id, paper_id FROM paper_events ORDER BY id LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        if rows:
+            cursor.execute('''
+            DELETE FROM paper_events WHERE id <= ?
+            ''', (rows[-1][0],))
+        
+        cursor.execute("COMMIT")
+        return [paper_id for _, paper_id in rows]
+    except Exception as e:
+        print(f"Error taking paper events: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_stored_papers")
+def get_stored_papers(paper_ids):
+    """Get the stored text and processing state of papers.
+    
+    Args:
+        paper_ids (list): Paper ids
+        
+    Returns:
+        dict: Paper id to a dict with title, abstract and embedding_id
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        stored = {}
+        paper_ids = list(paper_ids)
+        for start in range(0, len(paper_ids), 500):
+            chunk = paper_ids[start:start + 500]
+            cursor.execute(f'''
+            SELECT id, title, abstract, embedding_id FROM papers
+            WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            stored.update((row['id'], dict(row)) for row in cursor.fetchall())
+        return stored
+    except Exception as e:
+        print(f"Error retrieving stored papers: {e}")
+        return {}
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="add_paper_versions")
+def add_paper_versions(papers):
+    """Record the arXiv versions of saved papers.
+    
+    Args:
+        papers (list): Paper dictionaries with 'version' (and optionally
+            'updated_date'); papers without a version are ignored
+        
+    Returns:
+        int: Number of versions recorded
+    """
+    rows = [
+        (paper['id'], paper['version'], paper.get('title'), paper.get('abstract'),
+         paper.get('updated_date'), paper.get('retrieved_date') or datetime.now().isoformat())
+        for paper in papers if paper.get('version')
+    ]
+    if not rows:
+        return 0
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.executemany('''
+        INSERT OR IGNORE INTO paper_versions (
+            paper_id, version, title, abstract, updated_date, retrieved_date
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        print(f"Error adding paper versions: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="find_signature_candidates")
+def find_signature_candidates(band_keys, exclude_id=None):
+    """Find papers sharing at least one LSH band with a signature.
+    
+    Papers that are themselves duplicates are left out: the paper they
+    duplicate is a candidate whenever they are.
+    
+    Args:
+        band_keys (list): Bucket key (bytes) of each band
+        exclude_id (str): Paper to leave out, usually the one being checked
+        
+    Returns:
+        list: (paper_id, signature bytes) tuples
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        conditions = ' OR '.join(['(l.band = ? AND l.bucket = ?)'] * len(band_keys))
+        params = [value for band, key in enumerate(band_keys) for value in (band, key)]
+        cursor.execute(f'''
+        SELECT s.paper_id, s.signature FROM paper_signatures s
+        WHERE s.paper_id IN (SELECT l.paper_id FROM paper_lsh l WHERE {conditions})
+        AND s.paper_id != ?
+        AND NOT EXISTS (SELECT 1 FROM paper_duplicates d WHERE d.paper_id = s.paper_id)
+        ''', params + [exclude_id or ''])
+        return cursor.fetchall()
+    except Exception as e:
+        print(f"Error finding duplicate candidates: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="save_signature")
+def save_signature(paper_id, signature, band_keys, duplicate_of=None, similarity=None):
+    """Store a paper's MinHash signature and its duplicate link.
+    
+    Replaces any earlier signature, band keys and link of the paper.
+    
+    Args:
+        paper_id (str): Paper id
+        signature (bytes): MinHash signature
+        band_keys (list): Bucket key (bytes) of each band
+        duplicate_of (str): Paper this one duplicates, if any
+        similarity (float): Estimated Jaccard similarity to duplicate_of
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("DELETE FROM paper_lsh WHERE paper_id = ?", (paper_id,))
+        cursor.execute('''
+        INSERT OR REPLACE INTO paper_signatures (paper_id, signature) VALUES (?, ?)
+        ''', (paper_id, signature))
+        cursor.executemany('''
+        INSERT OR IGNORE INTO paper_lsh (band, bucket, paper_id) VALUES (?, ?, ?)
+        ''', [(band, key, paper_id) for band, key in enumerate(band_keys)])
+        
+        if duplicate_of:
+            cursor.execute('''
+            INSERT OR REPLACE INTO paper_duplicates (paper_id, duplicate_of, similarity, detected_date)
+            VALUES (?, ?, ?, ?)
+            ''', (paper_id, duplicate_of, similarity, datetime.now().isoformat()))
+        else:
+            cursor.execute("DELETE FROM paper_duplicates WHERE paper_id = ?", (paper_id,))
+        
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error saving paper signature: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+def _renumber_ranks(cursor, table, ranks, paper_id=None):
+    """Close the gaps left in ranks 1..n after rows were deleted.
+    
+    Args:
+        cursor: Cursor in the open write transaction
+        table (str): 'related_papers' (one list, by paper_id) or 'paper_feed'
+        ranks (list): Remaining ranks, ascending
+        paper_id (str): Paper whose related list is renumbered
+    """
+    # Ascending, every row moves down into a rank freed before it
+    key = ' AND paper_id = ?' if paper_id is not None else ''
+    cursor.executemany(f'''
+    UPDATE {table} SET rank = ? WHERE rank = ?{key}
+    ''', [(new_rank, rank) + ((paper_id,) if paper_id is not None else ())
+          for new_rank, rank in enumerate(ranks, 1) if new_rank != rank])
+
+def _redirect_paper_references(cursor, old_ids):
+    """Point related lists, the feed and topic sizes at renamed papers.
+    
+    Args:
+        cursor: Cursor in the open write transaction
+        old_ids (list): (old id, canonical id) tuples
+    """
+    cursor.execute("CREATE TEMP TABLE paper_renames (old_id TEXT PRIMARY KEY, new_id TEXT NOT NULL)")
+    cursor.executemany("INSERT OR IGNORE INTO paper_renames (old_id, new_id) VALUES (?, ?)", old_ids)
+    for table, column in (('related_papers', 'related_id'), ('paper_feed', 'paper_id')):
+        cursor.execute(f'''
+        UPDATE {table} SET {column} = (SELECT new_id FROM paper_renames WHERE old_id = {table}.{column})
+        WHERE {column} IN (SELECT old_id FROM paper_renames)
+        ''')
+    
+    # A list may now name two versions of one paper, or the paper itself
+    cursor.execute('''
+    SELECT paper_id, rank, related_id FROM related_papers
+    WHERE related_id IN (SELECT new_id FROM paper_renames)
+    ORDER BY paper_id, rank
+    ''')
+    seen = set()
+    dropped = {}
+    for paper_id, rank, related_id in cursor.fetchall():
+        if related_id == paper_id or (paper_id, related_id) in seen:
+            dropped.setdefault(paper_id, []).append(rank)
+        seen.add((paper_id, related_id))
+    for paper_id, ranks in dropped.items():
+        cursor.executemany("DELETE FROM related_papers WHERE paper_id = ? AND rank = ?",
+                           [(paper_id, rank) for rank in ranks])
+        cursor.execute("SELECT rank FROM related_papers WHERE paper_id = ? ORDER BY rank", (paper_id,))
+        _renumber_ranks(cursor, 'related_papers', [row[0] for row in cursor.fetchall()], paper_id)
+    
+    cursor.execute('''
+    DELETE FROM paper_feed WHERE rank > (SELECT MIN(rank) FROM paper_feed f WHERE f.paper_id = paper_feed.paper_id)
+    ''')
+    if cursor.rowcount:
+        cursor.execute("SELECT rank FROM paper_feed ORDER BY rank")
+        _renumber_ranks(cursor, 'paper_feed', [row[0] for row in cursor.fetchall()])
+    
+    cursor.execute("UPDATE topics SET size = (SELECT COUNT(*) FROM paper_topics WHERE topic_id = topics.id)")
+    cursor.execute("DROP TABLE temp.paper_renames")
+
+@timed(DB_QUERY_SECONDS, operation="rename_paper_ids")
+def rename_paper_ids(renames):
+    """Move papers stored under versioned ids to their canonical ids.
+    
+    When several stored versions map to the same canonical id, the row of
+    the highest version is kept (taking over an embedding from the others
+    if it has none) and the other rows are removed. Summaries, embeddings
+    and recorded versions of every version are moved to the canonical id;
+    signatures of the old ids are dropped, so the papers need to be indexed
+    again. The kept row's related list and topic move with it, and related
+    lists and the feed point to the canonical id, keeping the best rank
+    where two versions of a paper were listed.
+    
+    Args:
+        renames (dict): Canonical id to a list of (stored id, version)
+            tuples; the canonical id may itself be stored already (as
+            version 0)
+        
+    Returns:
+        int: Number of stored ids that were renamed or merged
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        moved = 0
+        old_ids = []
+        for canonical_id, versions in renames.items():
+            versions = sorted(versions, key=lambda item: item[1])
+            keep_id = versions[-1][0]
+            stored_ids = [paper_id for paper_id, _ in versions]
+            placeholders = ', '.join('?' * len(stored_ids))
+            
+            cursor.execute(f'''
+            SELECT embedding_id FROM papers WHERE id IN ({placeholders}) AND embedding_id IS NOT NULL
+            ORDER BY id = ? DESC LIMIT 1
+            ''', stored_ids + [keep_id])
+            embedding_row = cursor.fetchone()
+            
+            for table in ('summaries', 'embeddings'):
+                cursor.execute(f'''
+                UPDATE {table} SET paper_id = ? WHERE paper_id IN ({placeholders})
+                ''', [canonical_id] + stored_ids)
+            for table in ('work_leases', 'paper_signatures', 'paper_lsh', 'paper_duplicates'):
+                cursor.execute(f'''
+                DELETE FROM {table} WHERE paper_id IN ({placeholders})
+                ''', stored_ids)
+            cursor.execute(f'''
+            UPDATE paper_duplicates SET duplicate_of = ? WHERE duplicate_of IN ({placeholders})
+            ''', [canonical_id] + stored_ids)
+            cursor.execute(f'''
+            DELETE FROM papers WHERE id IN ({placeholders}) AND id != ?
+            ''', stored_ids + [keep_id])
+            cursor.execute('''
+            UPDATE papers SET id = ?, embedding_id = ? WHERE id = ?
+            ''', (canonical_id, embedding_row[0] if embedding_row else None, keep_id))
+            for table in ('related_papers', 'paper_topics'):
+                cursor.execute(f'''
+                DELETE FROM {table} WHERE paper_id IN ({placeholders}) AND paper_id != ?
+                ''', stored_ids + [keep_id])
+                cursor.execute(f'''
+                UPDATE {table} SET paper_id = ? WHERE paper_id = ?
+                ''', (canonical_id, keep_id))
+            cursor.execute(f'''
+            UPDATE OR IGNORE paper_versions SET paper_id = ? WHERE paper_id IN ({placeholders})
+            ''', [canonical_id] + stored_ids)
+            cursor.execute(f'''
+            DELETE FROM paper_versions WHERE paper_id IN ({placeholders}) AND paper_id != ?
+            ''', stored_ids + [canonical_id])
+            old_ids.extend((paper_id, canonical_id) for paper_id in stored_ids if paper_id != canonical_id)
+            moved += sum(1 for paper_id in stored_ids if paper_id != canonical_id)
+        
+        if old_ids:
+            _redirect_paper_references(cursor, old_ids)
+        
+        conn.commit()
+        return moved
+    except Exception as e:
+        print(f"Error renaming paper ids: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_versioned_paper_ids")
+def get_versioned_paper_ids():
+    """Get stored paper ids that still carry an arXiv version suffix.
+    
+    Returns:
+        list: Paper ids like 2401.01234v2
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT id FROM papers WHERE id GLOB '*v[0-9]*'")
+        return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error retrieving versioned paper ids: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_unindexed_papers")
+def get_unindexed_papers(limit=500):
+    """Get papers that have no near-duplicate signature yet, oldest first.
+    
+    Args:
+        limit (int): Maximum number of papers to return
+        
+    Returns:
+        list: Dicts with id, title and abstract
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT p.id, p.title, p.abstract FROM papers p
+        WHERE NOT EXISTS (SELECT 1 FROM paper_signatures s WHERE s.paper_id = p.id)
+        ORDER BY p.published_date, p.retrieved_date
+        LIMIT ?
+        ''', (limit,))
+        return [dict(row) for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error retrieving unindexed papers: {e}")
+        return []
+    finally:
+        conn.close()
+
+def _set_job_state(cursor, job, state):
+    """Write the state of a background job in the current transaction."""
+    cursor.execute('''
+    INSERT OR REPLACE INTO job_state (job, state, updated_date) VALUES (?, ?, ?)
+    ''', (job, json.dumps(state), datetime.now().isoformat()))
+
+@timed(DB_QUERY_SECONDS, operation="get_job_state")
+def get_job_state(job):
+    """Get the saved state of a background job.
+    
+    Args:
+        job (str): Job name
+        
+    Returns:
+        dict: The state, or None if the job hasn't saved one
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT state, updated_date FROM job_state WHERE job = ?", (job,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        state = json.loads(row[0])
+        state['updated_date'] = row[1]
+        return state
+    except Exception as e:
+        print(f"Error reading job state: {e}")
+        return None
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="set_job_state")
+def set_job_state(job, state):
+    """Save the state of a background job.
+    
+    Args:
+        job (str): Job name
+        state (dict): JSON-serializable state
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        _set_job_state(cursor, job, state)
+        
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error saving job state: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+def _bump_generation(cursor):
+    """Advance the generation counter for writes to tables without generation triggers."""
+    cursor.execute('''
+    UPDATE db_meta
+    SET generation = generation + 1,
+        updated_date = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+    WHERE id = 1
+    ''')
+
+@timed(DB_QUERY_SECONDS, operation="get_related_papers")
+def get_related_papers(paper_id, limit=10):
+    """Get the precomputed related papers of a paper.
+    
+    Near-duplicates get the list of the paper they duplicate.
+    
+    Args:
+        paper_id (str): Paper id
+        limit (int): Maximum number of related papers
+        
+    Returns:
+        list: Related papers (id, title, authors, url, published_date, similarity), most similar first
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT p.id, p.title, p.authors, p.url, p.published_date, r.similarity
+        FROM related_papers r JOIN papers p ON p.id = r.related_id
+        WHERE r.paper_id = COALESCE(
+            (SELECT duplicate_of FROM paper_duplicates WHERE paper_id = ?), ?
+        )
+        ORDER BY r.rank
+        LIMIT ?
+        ''', (paper_id, paper_id, limit))
+        
+        related = []
+        for row in cursor.fetchall():
+            paper = dict(row)
+            if paper.get('authors'):
+                try:
+                    paper['authors'] = json.loads(paper['authors'])
+                except ValueError:
+                    pass
+            related.append(paper)
+        return related
+    except Exception as e:
+        print(f"Error retrieving related papers: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_related_thresholds")
+def get_related_thresholds(k):
+    """Get the similarity a paper must beat to enter each full related list.
+    
+    Args:
+        k (int): List length
+        
+    Returns:
+        dict: Paper id to the similarity of its k-th related paper; papers
+        with shorter lists are absent
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT paper_id, similarity FROM related_papers WHERE rank = ?", (k,))
+        return dict(cursor.fetchall())
+    except Exception as e:
+        print(f"Error retrieving related thresholds: {e}")
+        return {}
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="save_related_papers")
+def save_related_papers(lists=None, additions=None, k=10, job=None, job_state=None, clear=False):
+    """Write related paper lists in one transaction.
+    
+    Args:
+        lists (dict): Paper id to its complete list of (related_id,
+            similarity) pairs, replacing the stored list
+        additions (dict): Paper id to (related_id, similarity) pairs merged
+            into the stored list, which is cut back to the k most similar
+        k (int): List length
+        job (str): Job whose state is saved with the lists
+        job_state (dict): State saved for the job
+        clear (bool): Delete all stored lists first (full rebuild)
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        if clear:
+            cursor.execute("DELETE FROM related_papers")
+        
+        merged = dict(lists or {})
+        for paper_id, pairs in (additions or {}).items():
+            cursor.execute('''
+            SELECT related_id, similarity FROM related_papers WHERE paper_id = ?
+            ''', (paper_id,))
+            current = dict(merged.get(paper_id) or cursor.fetchall())
+            current.update(pairs)
+            merged[paper_id] = current.items()
+        
+        for paper_id, pairs in merged.items():
+            ranked = sorted(pairs, key=lambda pair: -pair[1])[:k]
+            cursor.execute("DELETE FROM related_papers WHERE paper_id = ?", (paper_id,))
+            cursor.executemany('''
+            INSERT INTO related_papers (paper_id, rank, related_id, similarity) VALUES (?, ?, ?, ?)
+            ''', [(paper_id, rank, related_id, float(similarity))
+                  for rank, (related_id, similarity) in enumerate(ranked, 1)])
+        
+        if job:
+            _set_job_state(cursor, job, job_state or {})
+        _bump_generation(cursor)
+        
+        cursor.execute("COMMIT")
+        invalidate_generation()
+        return True
+    except Exception as e:
+        print(f"Error saving related papers: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return False
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_topics")
+def get_topics(include_centroids=False):
+    """Get the topic clusters, largest first.
+    
+    Args:
+        include_centroids (bool): Include the centroid bytes and weights
+            (for clustering) and topics without papers
+        
+    Returns:
+        list: Topic dictionaries (id, label, keywords, size, updated_date)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        if include_centroids:
+            cursor.execute("SELECT * FROM topics ORDER BY id")
+        else:
+            cursor.execute('''
+            SELECT id, label, keywords, size, updated_date FROM topics
+            WHERE size > 0 ORDER BY size DESC, id
+            ''')
+        
+        topics = []
+        for row in cursor.fetchall():
+            topic = dict(row)
+            topic['keywords'] = json.loads(topic['keywords']) if topic['keywords'] else []
+            topics.append(topic)
+        return topics
+    except Exception as e:
+        print(f"Error retrieving topics: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_topic_papers")
+def get_topic_papers(topic_id, limit=20, offset=0):
+    """Get the papers of a topic, closest to its centroid first.
+    
+    Args:
+        topic_id (int): Topic id
+        limit (int): Maximum number of papers
+        offset (int): Number of papers to skip
+        
+    Returns:
+        list: Papers (id, title, authors, url, published_date, similarity)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT p.id, p.title, p.authors, p.url, p.published_date, t.similarity
+        FROM paper_topics t JOIN papers p ON p.id = t.paper_id
+        WHERE t.topic_id = ?
+        ORDER BY t.similarity DESC
+        LIMIT ? OFFSET ?
+        ''', (topic_id, limit, offset))
+        
+        papers = []
+        for row in cursor.fetchall():
+            paper = dict(row)
+            if paper.get('authors'):
+                try:
+                    paper['authors'] = json.loads(paper['authors'])
+                except ValueError:
+                    pass
+            papers.append(paper)
+        return papers
+    except Exception as e:
+        print(f"Error retrieving topic papers: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_topic_paper_ids")
+def get_topic_paper_ids(topic_ids):
+    """Get the ids of the papers assigned to some topics.
+    
+    Args:
+        topic_ids (list): Topic ids
+        
+    Returns:
+        frozenset: Paper ids
+    """
+    if not topic_ids:
+        return frozenset()
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        placeholders = ','.join('?' * len(topic_ids))
+        cursor.execute(f"SELECT paper_id FROM paper_topics WHERE topic_id IN ({placeholders})",
+                       [int(topic_id) for topic_id in topic_ids])
+        return frozenset(row[0] for row in cursor.fetchall())
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_paper_topic_assignments")
+def get_paper_topic_assignments():
+    """Get the topic of every clustered paper.
+    
+    Returns:
+        dict: Paper id -> (topic id, similarity to the topic centroid)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT paper_id, topic_id, similarity FROM paper_topics")
+        return {paper_id: (topic_id, similarity) for paper_id, topic_id, similarity in cursor.fetchall()}
+    except Exception as e:
+        print(f"Error retrieving paper topics: {e}")
+        return {}
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_paper_ids_embedded_since")
+def get_paper_ids_embedded_since(after_id):
+    """Get the papers whose current embedding is newer than an embedding id.
+    
+    Args:
+        after_id (int): Embedding id, such as the watermark of a job
+        
+    Returns:
+        frozenset: Paper ids
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT p.id FROM embeddings e
+        JOIN papers p ON p.embedding_id = CAST(e.id AS TEXT)
+        WHERE e.id > ?
+        ''', (after_id,))
+        return frozenset(row[0] for row in cursor.fetchall())
+    except Exception as e:
+        print(f"Error retrieving recently embedded papers: {e}")
+        return frozenset()
+    finally:
+        conn.close()
+
+def iter_paper_keywords(batch_size=1000):
+    """Stream the keywords of the latest summary of every paper.
+    
+    Args:
+        batch_size (int): Rows fetched from SQLite at a time
+        
+    Yields:
+        tuple: (paper id, list of keywords)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT l.paper_id, s.keywords FROM latest_summaries l
+        JOIN summaries s ON s.id = l.summary_id
+        WHERE s.keywords IS NOT NULL
+        ''')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for paper_id, keywords in rows:
+                try:
+                    yield paper_id, json.loads(keywords)
+                except (TypeError, ValueError):
+                    continue
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="save_topics")
+def save_topics(topics, assignments, job=None, job_state=None, clear=False):
+    """Write topic centroids and paper assignments in one transaction.
+    
+    Assignments of papers that no longer exist are dropped and the size of
+    every topic is recounted.
+    
+    Args:
+        topics (list): Topic dictionaries (id, centroid bytes, weight, label, keywords)
+        assignments (dict): Paper id -> (topic id, similarity), for papers
+            whose topic is new or changed
+        job (str): Job whose state is saved with the topics
+        job_state (dict): State saved for the job
+        clear (bool): Replace all topics and assignments (rebuild)
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    now = datetime.now().isoformat()
+    
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        if clear:
+            cursor.execute("DELETE FROM paper_topics")
+            cursor.execute("DELETE FROM topics")
+        
+        cursor.executemany('''
+        INSERT OR REPLACE INTO topics (id, label, keywords, weight, centroid, updated_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(topic['id'], topic.get('label'), json.dumps(topic.get('keywords') or []),
+               int(topic['weight']), topic['centroid'], now) for topic in topics])
+        cursor.executemany('''
+        INSERT OR REPLACE INTO paper_topics (paper_id, topic_id, similarity) VALUES (?, ?, ?)
+        ''', [(paper_id, int(topic_id), float(similarity))
+              for paper_id, (topic_id, similarity) in assignments.items()])
+        
+        cursor.execute("DELETE FROM paper_topics WHERE paper_id NOT IN (SELECT id FROM papers)")
+        cursor.execute('''
+        UPDATE topics SET size = (SELECT COUNT(*) FROM paper_topics WHERE topic_id = topics.id)
+        ''')
+        
+        if job:
+            _set_job_state(cursor, job, job_state or {})
+        _bump_generation(cursor)
+        
+        cursor.execute("COMMIT")
+        invalidate_generation()
+        return True
+    except Exception as e:
+        print(f"Error saving topics: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return False
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_recent_queries")
+def get_recent_queries(since):
+    """Get the logged user queries since a point in time.
+    
+    Args:
+        since (str): ISO timestamp
+        
+    Returns:
+        list: (query, timestamp) tuples, oldest first
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT query, timestamp FROM user_queries
+        WHERE timestamp >= ? AND query IS NOT NULL
+        ORDER BY timestamp
+        ''', (since,))
+        return cursor.fetchall()
+    except Exception as e:
+        print(f"Error retrieving user queries: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_query_embeddings")
+def get_query_embeddings(queries, model):
+    """Get cached embeddings of queries.
+    
+    Args:
+        queries (list): Normalized query texts
+        model (str): Embedding model
+        
+    Returns:
+        dict: Query -> embedding vector, for the queries that are cached
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    embeddings = {}
+    try:
+        queries = list(queries)
+        for start in range(0, len(queries), 500):
+            chunk = queries[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'''
+            SELECT query, embedding FROM query_embeddings
+            WHERE model = ? AND query IN ({placeholders})
+            ''', [model] + chunk)
+            for query, embedding in cursor.fetchall():
+                embeddings[query] = json.loads(embedding)
+        return embeddings
+    except Exception as e:
+        print(f"Error retrieving query embeddings: {e}")
+        return embeddings
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="save_query_embeddings")
+def save_query_embeddings(embeddings, model):
+    """Cache embeddings of queries.
+    
+    Args:
+        embeddings (dict): Normalized query text -> embedding vector
+        model (str): Embedding model
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    now = datetime.now().isoformat()
+    
+    try:
+        cursor.executemany('''
+        INSERT OR REPLACE INTO query_embeddings (query, model, embedding, created_date)
+        VALUES (?, ?, ?, ?)
+        ''', [(query, model, json.dumps(embedding), now) for query, embedding in embeddings.items()])
+        
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error saving query embeddings: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_recent_paper_ids")
+def get_recent_paper_ids(since):
+    """Get the embedded papers published since a date, without near-duplicates.
+    
+    Args:
+        since (str): ISO date
+        
+    Returns:
+        list: Paper ids
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f'''
+        SELECT p.id FROM papers p
+        WHERE p.published_date >= ? AND p.embedding_id IS NOT NULL AND {NOT_DUPLICATE}
+        ''', (since,))
+        return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error retrieving recent papers: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="save_paper_feed")
+def save_paper_feed(entries, job=None, job_state=None):
+    """Replace the paper feed in one transaction.
+    
+    Args:
+        entries (list): (paper_id, score, matched_query) tuples, best first
+        job (str): Job whose state is saved with the feed
+        job_state (dict): State saved for the job
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    now = datetime.now().isoformat()
+    
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("DELETE FROM paper_feed")
+        cursor.executemany('''
+        INSERT INTO paper_feed (rank, paper_id, score, matched_query, generated_date)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [(rank, paper_id, float(score), matched_query, now)
+              for rank, (paper_id, score, matched_query) in enumerate(entries, 1)])
+        
+        if job:
+            _set_job_state(cursor, job, job_state or {})
+        _bump_generation(cursor)
+        
+        cursor.execute("COMMIT")
+        invalidate_generation()
+        return True
+    except Exception as e:
+        print(f"Error saving paper feed: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return False
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_paper_feed")
+def get_paper_feed(limit=20, offset=0):
+    """Get a page of the precomputed paper feed.
+    
+    Args:
+        limit (int): Maximum number of papers
+        offset (int): Number of papers to skip
+        
+    Returns:
+        list: Papers (id, title, authors, url, published_date, summary,
+        esg_relevance_score, finance_relevance_score, score, matched_query),
+        best match first
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT p.id, p.title, p.authors, p.url, p.published_date,
+               s.summary, s.esg_relevance_score, s.finance_relevance_score,
+               f.score, f.matched_query
+        FROM paper_feed f
+        JOIN papers p ON p.id = f.paper_id
+        LEFT JOIN latest_summaries l ON l.paper_id = f.paper_id
+        LEFT JOIN summaries s ON s.id = l.summary_id
+        WHERE f.rank > ?
+        ORDER BY f.rank
+        LIMIT ?
+        ''', (offset, limit))
+        
+        papers = []
+        for row in cursor.fetchall():
+            paper = dict(row)
+            if paper.get('authors'):
+                try:
+                    paper['authors'] = json.loads(paper['authors'])
+                except ValueError:
+                    pass
+            papers.append(paper)
+        return papers
+    except Exception as e:
+        print(f"Error retrieving paper feed: {e}")
+        return []
+    finally:
+        conn.close()
+
+def _rollup_summary(row):
+    """Turn summed rollup columns into counts and averages."""
+    papers, summarized, embedded, esg_count, esg_sum, finance_count, finance_sum = row
+    return {
+        'papers': papers,
+        'summarized': summarized,
+        'unprocessed': papers - summarized,
+        'embedded': embedded,
+        'esg_avg': round(esg_sum / esg_count, 1) if esg_count else None,
+        'finance_avg': round(finance_sum / finance_count, 1) if finance_count else None
+    }
+
+@timed(DB_QUERY_SECONDS, operation="get_analytics")
+def get_analytics(month_from=None, month_to=None):
+    """Get score distributions and processing counts from the rollups.
+    
+    Near-duplicates are not counted, like in count_unprocessed_papers.
+    
+    Args:
+        month_from (str): First publication month (YYYY-MM), None for no bound
+        month_to (str): Last publication month (YYYY-MM), None for no bound
+        
+    Returns:
+        dict: 'totals', and 'by_category', 'by_source' and 'by_month' lists
+        (largest or latest first) with papers, summarized, unprocessed,
+        embedded, esg_avg and finance_avg, plus esg_histogram and
+        finance_histogram (bucket lower bound -> papers) per category and
+        source. None on error.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    conditions = ["1"]
+    params = []
+    if month_from:
+        conditions.append("month >= ?")
+        params.append(month_from)
+    if month_to:
+        conditions.append("month <= ?")
+        params.append(month_to)
+    where = " AND ".join(conditions)
+    sums = "SUM(papers), SUM(summarized), SUM(embedded), SUM(esg_count), TOTAL(esg_sum), SUM(finance_count), TOTAL(finance_sum)"
+    
+    try:
+        cursor.execute(f'''
+        SELECT dimension, value, {sums} FROM analytics_rollup
+        WHERE {where} AND dimension IN ('all', 'category', 'source')
+        GROUP BY dimension, value
+        HAVING SUM(papers) > 0
+        ORDER BY SUM(papers) DESC, value
+        ''', params)
+        groups = {'all': [], 'category': [], 'source': []}
+        for row in cursor.fetchall():
+            groups[row[0]].append(dict(value=row[1], **_rollup_summary(row[2:])))
+        
+        cursor.execute(f'''
+        SELECT dimension, value, metric, bucket, SUM(papers) FROM analytics_scores
+        WHERE {where} AND dimension IN ('category', 'source')
+        GROUP BY dimension, value, metric, bucket
+        HAVING SUM(papers) > 0
+        ''', params)
+        histograms = {}
+        for dimension, value, metric, bucket, papers in cursor.fetchall():
+            histogram = histograms.setdefault((dimension, value, metric), {})
+            histogram[bucket] = papers
+        for dimension in ('category', 'source'):
+            for group in groups[dimension]:
+                for metric in ('esg', 'finance'):
+                    histogram = histograms.get((dimension, group['value'], metric), {})
+                    group[f'{metric}_histogram'] = {bucket: histogram.get(bucket, 0) for bucket in range(0, 100, 10)}
+        
+        cursor.execute(f'''
+        SELECT month, {sums} FROM analytics_rollup
+        WHERE {where} AND dimension = 'all'
+        GROUP BY month
+        HAVING SUM(papers) > 0
+        ORDER BY month DESC
+        ''', params)
+        by_month = [dict(month=row[0], **_rollup_summary(row[1:])) for row in cursor.fetchall()]
+        
+        totals = groups['all'][0] if groups['all'] else _rollup_summary((0, 0, 0, 0, 0, 0, 0))
+        totals.pop('value', None)
+        return {
+            'totals': totals,
+            'by_category': groups['category'],
+            'by_source': groups['source'],
+            'by_month': by_month
+        }
+    except Exception as e:
+        print(f"Error retrieving analytics: {e}")
+        return None
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="rebuild_analytics")
+def rebuild_analytics():
+    """Recompute the analytics rollups from scratch.
+    
+    The triggers keep them exact; this repairs them after writes that
+    bypassed the triggers (for example with a different schema version).
+    
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        _analytics_backfill(cursor)
+        cursor.execute("COMMIT")
+        return True
+    except Exception as e:
+        print(f"Error rebuilding analytics: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return False
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_storage_stats")
+def get_storage_stats():
+    """Get the size of the database file and the space free inside it.
+    
+    Returns:
+        dict: page_size, pages, free_pages, bytes, free_bytes and
+        auto_vacuum (0 none, 1 full, 2 incremental), or None on failure
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        pages = cursor.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+        return {
+            'page_size': page_size,
+            'pages': pages,
+            'free_pages': free_pages,
+            'bytes': pages * page_size,
+            'free_bytes': free_pages * page_size,
+            'auto_vacuum': auto_vacuum
+        }
+    except Exception as e:
+        print(f"Error reading storage statistics: {e}")
+        return None
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_orphaned_embedding_ids")
+def get_orphaned_embedding_ids():
+    """Get the ids of embeddings no paper points to.
+    
+    Embedding a paper again leaves its previous embedding behind, as does
+    saving a changed paper, which clears its embedding_id.
+    
+    Returns:
+        list: Embedding ids in ascending order
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT id FROM embeddings e
+        WHERE NOT EXISTS (SELECT 1 FROM papers p WHERE p.embedding_id = CAST(e.id AS TEXT))
+        ORDER BY id
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error finding orphaned embeddings: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="get_superseded_summary_ids")
+def get_superseded_summary_ids(keep=None):
+    """Get the ids of summaries beyond the newest keep versions of their paper,
+    and of summaries whose paper is no longer stored.
+    
+    Args:
+        keep (int): Summaries kept per paper, SUMMARY_CONFIG['keep_versions'] if None (0 keeps all)
+        
+    Returns:
+        list: Summary ids in ascending order
+    """
+    keep = SUMMARY_CONFIG["keep_versions"] if keep is None else keep
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+        SELECT id FROM (
+            SELECT s.id, p.id AS stored, ROW_NUMBER() OVER (
+                PARTITION BY s.paper_id ORDER BY s.created_date DESC, s.id DESC
+            ) AS position
+            FROM summaries s
+            LEFT JOIN papers p ON p.id = s.paper_id
+        )
+        WHERE stored IS NULL OR (? > 0 AND position > ?)
+        ORDER BY id
+        ''', (keep, keep))
+        return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error finding superseded summaries: {e}")
+        return []
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="delete_orphaned_embeddings")
+def delete_orphaned_embeddings(embedding_ids):
+    """Delete embeddings that no paper points to.
+    
+    The references are checked again in the deleting transaction, so an
+    embedding a paper started pointing to since it was found is kept.
+    
+    Args:
+        embedding_ids (list): Candidate ids from get_orphaned_embedding_ids
+        
+    Returns:
+        int: Number of embeddings deleted, or None on failure
+    """
+    if not embedding_ids:
+        return 0
+    
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        placeholders = ', '.join('?' * len(embedding_ids))
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f'''
+        DELETE FROM embeddings
+        WHERE id IN ({placeholders})
+        AND NOT EXISTS (SELECT 1 FROM papers p WHERE p.embedding_id = CAST(embeddings.id AS TEXT))
+        ''', list(embedding_ids))
+        deleted = cursor.rowcount
+        cursor.execute("COMMIT")
+        if deleted:
+            invalidate_generation()
+        return deleted
+    except Exception as e:
+        print(f"Error deleting orphaned embeddings: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return None
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="delete_summaries")
+def delete_summaries(summary_ids):
+    """Delete summaries by id.
+    
+    The triggers move the latest summary pointer and the analytics of a
+    paper whose latest summary is deleted.
+    
+    Args:
+        summary_ids (list): Summary ids
+        
+    Returns:
+        int: Number of summaries deleted, or None on failure
+    """
+    if not summary_ids:
+        return 0
+    
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        placeholders = ', '.join('?' * len(summary_ids))
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f"DELETE FROM summaries WHERE id IN ({placeholders})", list(summary_ids))
+        deleted = cursor.rowcount
+        cursor.execute("COMMIT")
+        if deleted:
+            invalidate_generation()
+        return deleted
+    except Exception as e:
+        print(f"Error deleting summaries: {e}")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return None
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS, operation="vacuum_database")
+def vacuum_database(pages=None, full=False):
+    """Return free pages of the database file to the file system.
+    
+    An incremental vacuum moves at most `pages` pages in one short write
+    transaction, so readers and writers only wait for that step; it needs
+    auto_vacuum = INCREMENTAL. A full VACUUM rewrites the whole file
+    (switching it to incremental auto-vacuum) and blocks every other
+    connection while it runs. It may renumber the rowids of papers, so the
+    keyword index is rebuilt afterwards.
+    
+    Args:
+        pages (int): Pages freed by an incremental step (None frees all)
+        full (bool): Run a full VACUUM instead
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        if full:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        else:
+            # The pragma frees one page per step and returns no rows, so
+            # execute() would stop after the first page; executescript runs it to the end
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages or 0)})")
+    except Exception as e:
+        print(f"Error vacuuming database: {e}")
+        return False
+    finally:
+        conn.close()
+    
+    if full:
+        return rebuild_keyword_index() is not None
+    return True
+
+@timed(DB_QUERY_SECONDS, operation="analyze_database")
+def analyze_database(analysis_limit=None):
+    """Refresh the table statistics the query planner chooses indexes by.
+    
+    Args:
+        analysis_limit (int): Rows sampled per index (None or 0 reads every row)
+        
+    Returns:
+        bool: Success status
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f"PRAGMA analysis_limit = {int(analysis_limit or 0)}")
+        cursor.execute("ANALYZE")
+        return True
+    except Exception as e:
+        print(f"Error analyzing database: {e}")
+        return False
+    finally:
+        conn.close()
+
 # Initialize database when module is imported
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
@@ -0,0 +1,298 @@
+"""
+arXiv id normalization and near-duplicate detection.
+
+arXiv ids carry a version suffix (2401.01234v2). Papers are stored under
+the canonical id without it, with each version seen recorded in
+paper_versions, so a new version updates its paper instead of adding a row
+that is summarized and embedded again.
+
+Near-duplicates (the same work under different ids, such as a preprint
+posted twice or a paper from another source) are found with MinHash
+signatures over word shingles of the title and abstract. Signatures are
+split into LSH bands stored in paper_lsh, so candidates are looked up by
+band instead of comparing against every paper. A paper whose estimated
+Jaccard similarity to an earlier one reaches DEDUP_CONFIG['threshold'] is
+linked to it in paper_duplicates: it is not processed and shares the
+earlier paper's summary.
+
+Usage:
+    python src/main.py dedup
+"""
+
+import re
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import DEDUP_CONFIG
+from src.backend.database import (
+    get_stored_papers, add_paper_versions, find_signature_candidates, save_signature,
+    rename_paper_ids, get_versioned_paper_ids, get_unindexed_papers
+)
+
+# New-style (2401.01234) and old-style (hep-th/9901001, q-fin.GN/0601001) arXiv ids
+ARXIV_ID_PATTERN = re.compile(
+    r'(?P<id>\d{4}\.\d{4,5}|[a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v(?P<version>\d+))?$',
+    re.IGNORECASE
+)
+
+# Mersenne prime modulus of the MinHash permutations
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def canonical_arxiv_id(raw_id):
+    """Split an arXiv id or abs URL into its canonical id and version.
+
+    Args:
+        raw_id (str): Id such as 2401.01234v2 or http://arxiv.org/abs/2401.01234v2
+
+    Returns:
+        tuple: (canonical id, version or None); ids that are not arXiv ids
+        are returned unchanged
+    """
+    raw_id = (raw_id or '').strip()
+    match = ARXIV_ID_PATTERN.search(raw_id.split('/abs/')[-1])
+    if not match:
+        return raw_id, None
+    version = match.group('version')
+    return match.group('id'), int(version) if version else None
+
+
+class MinHasher:
+    """MinHash signatures and LSH band keys of paper texts."""
+
+    def __init__(self, num_perm=None, bands=None, shingle_size=None, seed=None):
+        """Initialize the hasher.
+
+        Args:
+            num_perm (int): Number of hash permutations
+            bands (int): LSH bands the signature is split into
+            shingle_size (int): Words per shingle
+            seed (int): Seed of the permutations; signatures are only
+                comparable between hashers with the same settings
+        """
+        self.num_perm = num_perm or DEDUP_CONFIG["num_perm"]
+        self.bands = bands or DEDUP_CONFIG["bands"]
+        self.shingle_size = shingle_size or DEDUP_CONFIG["shingle_size"]
+        self.rows = self.num_perm // self.bands
+
+        rng = np.random.RandomState(DEDUP_CONFIG["seed"] if seed is None else seed)
+        self._a = rng.randint(1, 1 << 32, self.num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, self.num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        """Get the word shingles of a text.
+
+        Args:
+            text (str): Text to shingle
+
+        Returns:
+            set: Shingles of shingle_size consecutive lower-cased words
+        """
+        words = re.findall(r'\w+', (text or '').lower())
+        if len(words) <= self.shingle_size:
+            return {' '.join(words)} if words else set()
+        return {' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, title, abstract):
+        """Compute the MinHash signature of a paper.
+
+        Args:
+            title (str): Paper title
+            abstract (str): Paper abstract
+
+        Returns:
+            np.ndarray: uint32 signature of num_perm values
+        """
+        shingles = self.shingles(f"{title or ''} {abstract or ''}")
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # Products wrap around at 2**64, which is fine for hashing
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature):
+        """Split a signature into its LSH band keys.
+
+        Args:
+            signature (np.ndarray): MinHash signature
+
+        Returns:
+            list: Bytes key of each band
+        """
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    @staticmethod
+    def similarity(signature_a, signature_b):
+        """Estimate the Jaccard similarity of two signatures.
+
+        Args:
+            signature_a (np.ndarray): MinHash signature
+            signature_b (np.ndarray): MinHash signature
+
+        Returns:
+            float: Fraction of matching values
+        """
+        return float(np.mean(signature_a == signature_b))
+
+
+# Hasher with the configured settings, created on first use
+_hasher = None
+
+def get_hasher():
+    """Get the MinHasher with the configured settings.
+
+    Returns:
+        MinHasher: Shared hasher
+    """
+    global _hasher
+    if _hasher is None:
+        _hasher = MinHasher()
+    return _hasher
+
+def merge_versions(papers):
+    """Collapse papers collected more than once into one per canonical id.
+
+    Cross-listed papers come back under several categories, and a listing
+    can contain more than one version. The highest version is kept, with
+    the categories of all copies.
+
+    Args:
+        papers (list): Paper dictionaries with canonical ids and 'version'
+
+    Returns:
+        list: One paper per id, in order of first appearance
+    """
+    merged = {}
+    for paper in papers:
+        current = merged.get(paper['id'])
+        if current is None:
+            merged[paper['id']] = paper
+            continue
+
+        categories = list(dict.fromkeys((current.get('categories') or []) + (paper.get('categories') or [])))
+        if (paper.get('version') or 0) > (current.get('version') or 0):
+            merged[paper['id']] = paper
+        merged[paper['id']]['categories'] = categories
+    return list(merged.values())
+
+def carry_over_embeddings(papers, threshold=None):
+    """Keep the embedding of stored papers whose new version barely changed.
+
+    Saving a paper again clears its embedding, so a new arXiv version would
+    be embedded again even if only a typo was fixed. Papers whose new text
+    is a near-duplicate of the stored text get the stored embedding_id.
+
+    Args:
+        papers (list): Changed paper dictionaries about to be saved
+        threshold (float): Minimum estimated similarity, DEDUP_CONFIG['threshold'] if None
+
+    Returns:
+        int: Number of papers keeping their embedding
+    """
+    threshold = threshold or DEDUP_CONFIG["threshold"]
+    hasher = get_hasher()
+    stored = get_stored_papers([paper['id'] for paper in papers])
+
+    kept = 0
+    for paper in papers:
+        previous = stored.get(paper['id'])
+        if not previous or not previous['embedding_id'] or paper.get('embedding_id'):
+            continue
+        similarity = hasher.similarity(hasher.signature(previous['title'], previous['abstract']),
+                                       hasher.signature(paper.get('title'), paper.get('abstract')))
+        if similarity >= threshold:
+            paper['embedding_id'] = previous['embedding_id']
+            kept += 1
+    return kept
+
+def register_papers(papers, threshold=None):
+    """Index saved papers and link the ones duplicating an earlier paper.
+
+    Papers are registered in order, so of two duplicates in the same batch
+    the first one is kept.
+
+    Args:
+        papers (list): Saved paper dictionaries (id, title, abstract)
+        threshold (float): Minimum estimated similarity, DEDUP_CONFIG['threshold'] if None
+
+    Returns:
+        dict: Paper id to the id of the paper it duplicates, for the
+        duplicates found
+    """
+    threshold = threshold or DEDUP_CONFIG["threshold"]
+    hasher = get_hasher()
+
+    duplicates = {}
+    for paper in papers:
+        signature = hasher.signature(paper.get('title'), paper.get('abstract'))
+        band_keys = hasher.band_keys(signature)
+
+        best_id, best_similarity = None, threshold
+        for candidate_id, candidate_signature in find_signature_candidates(band_keys, exclude_id=paper['id']):
+            similarity = hasher.similarity(signature, np.frombuffer(candidate_signature, dtype=np.uint32))
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate_id, similarity
+
+        if best_id:
+            duplicates[paper['id']] = best_id
+        save_signature(paper['id'], signature.tobytes(), band_keys,
+                       duplicate_of=best_id, similarity=best_similarity if best_id else None)
+    return duplicates
+
+def normalize_stored_ids():
+    """Move papers stored under versioned arXiv ids to their canonical ids.
+
+    Returns:
+        int: Number of stored ids renamed or merged
+    """
+    groups = {}
+    versions = []
+    for paper_id in get_versioned_paper_ids():
+        canonical_id, version = canonical_arxiv_id(paper_id)
+        if version is None:
+            continue
+        groups.setdefault(canonical_id, []).append((paper_id, version))
+        versions.append({'id': canonical_id, 'version': version, 'stored_id': paper_id})
+    if not groups:
+        return 0
+
+    # A row already stored under the canonical id counts as the oldest version
+    for canonical_id in get_stored_papers(groups):
+        groups[canonical_id].append((canonical_id, 0))
+
+    stored = get_stored_papers([version['stored_id'] for version in versions])
+    for version in versions:
+        version.update({key: stored.get(version['stored_id'], {}).get(key) for key in ('title', 'abstract')})
+    add_paper_versions(versions)
+    return rename_paper_ids(groups)
+
+def index_stored_papers(batch_size=500):
+    """Register every stored paper that has no signature yet, oldest first.
+
+    Args:
+        batch_size (int): Papers read per batch
+
+    Returns:
+        tuple: (papers indexed, duplicates found)
+    """
+    indexed = 0
+    duplicates = 0
+    while True:
+        papers = get_unindexed_papers(limit=batch_size)
+        if not papers:
+            break
+        duplicates += len(register_papers(papers))
+        indexed += len(papers)
+        if len(papers) < batch_size:
+            break
+    return indexed, duplicates
@@ -0,0 +1,725 @@
+"""
+Memory-mapped embedding matrix for similarity search.
+
+Embeddings are compacted from SQLite into an append-only float32 matrix of
+L2-normalized rows, with sidecars listing the paper and embedding id of
+every row. Search
+maps the matrix with np.memmap, so all API workers on a machine share one
+page-cached copy and a fresh worker can search without decoding any JSON.
+
+The first-pass scan can run on a smaller copy of the matrix: vectors cut to
+their leading scan_dimensions (text-embedding-3 vectors stay meaningful when
+shortened and re-normalized) and/or int8-quantized with one scale per row.
+The best rerank_candidates rows are then re-scored exactly against the full
+float32 rows, of which only those few pages are read.
+
+Files in the store directory:
+
+- vectors.<version>.f32: full row-major float32 matrix
+- scan.<version>.f32 / scan.<version>.i8: first-pass matrix, if configured
+- scales.<version>.f32: per-row scales of an int8 scan matrix
+- ids.<version>.txt: one paper id per line, line n describes row n
+- embedding_ids.<version>.i64: embedding id of every row
+- meta.json: current version, dimensions, row count and sync watermark
+
+Processing runs append the embeddings added since the last sync. A row is
+live while its paper points to its embedding, so a paper that is embedded
+again leaves a stale row behind and one whose embedding was cleared drops
+out of search as soon as the database changes; once
+too many rows are stale, the embedding dimension changes or the scan
+settings change, the store is rebuilt into a new version and meta.json is
+switched over atomically.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import DEFAULT_DB_PATH, EMBEDDING_STORE_CONFIG
+from src.backend import database
+from src.backend.metrics import DB_QUERY_SECONDS, timed
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process lock on Windows; run a single sync process there
+    fcntl = None
+
+BATCH_SIZE = 1000
+
+QUANTIZATIONS = ('none', 'int8')
+
+# Row sets of recent search filters kept per loaded store
+FILTER_CACHE_SIZE = 64
+
+# Filters keeping up to this share of rows gather them, larger ones mask a full scan
+FILTER_GATHER_FRACTION = 0.5
+
+
+def store_dir(db_path=None):
+    """Get the store directory for a database.
+
+    Args:
+        db_path (Path): Database file, defaults to the current database
+
+    Returns:
+        Path: Store directory
+    """
+    db_path = Path(db_path or database.DB_PATH)
+    if db_path.resolve() == Path(DEFAULT_DB_PATH).resolve():
+        return Path(EMBEDDING_STORE_CONFIG["dir"])
+    return db_path.parent / f"{db_path.stem}_embeddings"
+
+
+def _normalize(matrix):
+    """L2-normalize the rows of a matrix, leaving zero rows as zeros."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def scan_rows(full_rows, scan_dim, quantization):
+    """Build first-pass rows from normalized full rows.
+
+    Args:
+        full_rows (np.ndarray): Normalized float32 rows
+        scan_dim (int): Leading dimensions to keep
+        quantization (str): 'none' or 'int8'
+
+    Returns:
+        tuple: (scan rows, per-row scales or None)
+    """
+    rows = full_rows
+    if scan_dim < full_rows.shape[1]:
+        rows = _normalize(full_rows[:, :scan_dim])
+
+    if quantization == 'int8':
+        scales = np.abs(rows).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.round(rows / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    return rows, None
+
+
+def scan_query(query, scan_dim):
+    """Cut a normalized query to the scan dimensions and re-normalize it."""
+    if scan_dim < query.shape[0]:
+        query = query[:scan_dim]
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+    return query.astype(np.float32)
+
+
+class _VersionFiles:
+    """Open files of one store version, written in step."""
+
+    def __init__(self, store, version, meta_layout, mode):
+        """Open the files.
+
+        Args:
+            store (EmbeddingStore): Store the files belong to
+            version (int): Store version
+            meta_layout (dict): dim, scan_dim and quantization of the version
+            mode (str): 'wb' to create, 'ab' to append
+        """
+        self.layout = meta_layout
+        self.paths = store._paths(version, meta_layout)
+        self.files = {name: open(path, mode) for name, path in self.paths.items()}
+
+    def write(self, embedding_ids, paper_ids, vectors):
+        """Write rows with their embedding and paper ids."""
+        full = _normalize(np.asarray(vectors, dtype=np.float32))
+        self.files['vectors'].write(full.tobytes())
+        if 'scan' in self.files:
+            rows, scales = scan_rows(full, self.layout['scan_dim'], self.layout['quantization'])
+            self.files['scan'].write(rows.tobytes())
+            if scales is not None:
+                self.files['scales'].write(scales.tobytes())
+        self.files['ids'].write(''.join(f"{paper_id}\n" for paper_id in paper_ids).encode('utf-8'))
+        self.files['embedding_ids'].write(np.asarray(embedding_ids, dtype=np.int64).tobytes())
+
+    def close(self):
+        """Flush everything to disk and close.
+
+        Returns:
+            int: Size of the id sidecar in bytes
+        """
+        ids_bytes = self.files['ids'].tell()
+        for f in self.files.values():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        return ids_bytes
+
+
+class EmbeddingStore:
+    """Append-only memory-mapped embedding matrix with an id sidecar."""
+
+    def __init__(self, directory, scan_dimensions=None, quantization=None, rerank_candidates=None):
+        """Initialize the store.
+
+        Args:
+            directory (Path): Store directory
+            scan_dimensions (int): Dimensions of the first-pass scan, 0 for all
+            quantization (str): First-pass precision, 'none' or 'int8'
+            rerank_candidates (int): Rows re-scored with full vectors, 0 to disable
+
+        Arguments left as None take their value from EMBEDDING_STORE_CONFIG.
+        """
+        self.directory = Path(directory)
+        self.meta_path = self.directory / "meta.json"
+        self.scan_dimensions = scan_dimensions if scan_dimensions is not None else EMBEDDING_STORE_CONFIG["scan_dimensions"]
+        self.quantization = quantization or EMBEDDING_STORE_CONFIG["quantization"]
+        self.rerank_candidates = (rerank_candidates if rerank_candidates is not None
+                                  else EMBEDDING_STORE_CONFIG["rerank_candidates"])
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown embedding quantization: {self.quantization}")
+
+        self._lock = threading.Lock()
+        self._loaded_stamp = None
+        self._state = None
+
+    # Files
+
+    def _paths(self, version, layout):
+        """Paths of the files of a store version.
+
+        Args:
+            version (int): Store version
+            layout (dict): dim, scan_dim and quantization of the version
+
+        Returns:
+            dict: File name -> path
+        """
+        paths = {
+            'vectors': self.directory / f"vectors.{version}.f32",
+            'ids': self.directory / f"ids.{version}.txt",
+            'embedding_ids': self.directory / f"embedding_ids.{version}.i64"
+        }
+        if layout['scan_dim'] < layout['dim'] or layout['quantization'] != 'none':
+            suffix = 'i8' if layout['quantization'] == 'int8' else 'f32'
+            paths['scan'] = self.directory / f"scan.{version}.{suffix}"
+            if layout['quantization'] == 'int8':
+                paths['scales'] = self.directory / f"scales.{version}.f32"
+        return paths
+
+    def _layout(self, dim):
+        """The dim, scan_dim and quantization this store uses for a dimension."""
+        scan_dim = min(self.scan_dimensions or dim, dim) if dim else None
+        return {'dim': dim, 'scan_dim': scan_dim, 'quantization': self.quantization}
+
+    def read_meta(self):
+        """Read meta.json.
+
+        Returns:
+            dict: Store metadata, or None if the store has not been built
+        """
+        try:
+            with open(self.meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        """Replace meta.json atomically."""
+        tmp_path = self.meta_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    @contextmanager
+    def _write_lock(self):
+        """Hold an exclusive lock so that only one process syncs at a time."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def memory_usage(self, meta=None):
+        """Bytes of the store files, split into the first-pass scan and the rest.
+
+        Args:
+            meta (dict): Store metadata, read from meta.json if None
+
+        Returns:
+            dict: scan_bytes (read on every query) and full_bytes (read for re-ranking)
+        """
+        meta = meta or self.read_meta()
+        if meta is None:
+            return {'scan_bytes': 0, 'full_bytes': 0}
+
+        paths = self._paths(meta['version'], meta)
+        full_bytes = meta['rows'] * meta['dim'] * 4
+        if 'scan' in paths:
+            itemsize = 1 if meta['quantization'] == 'int8' else 4
+            scan_bytes = meta['rows'] * meta['scan_dim'] * itemsize
+            if 'scales' in paths:
+                scan_bytes += meta['rows'] * 4
+        else:
+            scan_bytes = full_bytes
+        return {'scan_bytes': scan_bytes, 'full_bytes': full_bytes}
+
+    # Writing
+
+    def sync(self, rebuild=False):
+        """Bring the store up to date with the embeddings table.
+
+        Args:
+            rebuild (bool): Rebuild from scratch instead of appending
+
+        Returns:
+            dict: Sync statistics
+        """
+        with self._write_lock():
+            meta = self.read_meta()
+            db_path = str(Path(database.DB_PATH).resolve())
+
+            if (meta is None or meta.get('db_path') != db_path or not meta['dim']
+                    or not all(path.exists() for path in self._paths(meta['version'], meta).values())):
+                # Also versions written before the embedding id sidecar
+                rebuild = True
+            elif self._layout(meta['dim']) != {key: meta.get(key) for key in ('dim', 'scan_dim', 'quantization')}:
+                # Scan settings changed
+                rebuild = True
+            elif meta['rows'] and meta['stale_rows'] / meta['rows'] > EMBEDDING_STORE_CONFIG["rebuild_stale_fraction"]:
+                rebuild = True
+
+            if not rebuild:
+                stats = self._append(meta)
+                if stats is not None:
+                    return stats
+            return self._rebuild(meta, db_path)
+
+    def _append(self, meta):
+        """Append embeddings added since the last sync.
+
+        Returns:
+            dict: Sync statistics, or None if a rebuild is needed instead
+        """
+        paths = self._paths(meta['version'], meta)
+
+        # Drop anything a crashed sync wrote past the recorded end
+        row_bytes = {
+            'vectors': meta['dim'] * 4,
+            'scan': meta['scan_dim'] * (1 if meta['quantization'] == 'int8' else 4),
+            'scales': 4,
+            'embedding_ids': 8
+        }
+        for name, path in paths.items():
+            size = meta['ids_bytes'] if name == 'ids' else meta['rows'] * row_bytes[name]
+            os.truncate(path, size)
+
+        with open(paths['ids'], 'r', encoding='utf-8') as f:
+            seen = set(f.read().splitlines())
+
+        appended = 0
+        stale_rows = meta['stale_rows']
+        last_id = meta['last_embedding_id']
+
+        files = _VersionFiles(self, meta['version'], meta, 'ab')
+        try:
+            batch_embedding_ids, batch_ids, batch_vectors = [], [], []
+            for embedding_id, paper_id, vector in database.iter_embeddings(after_id=last_id, batch_size=BATCH_SIZE):
+                if len(vector) != meta['dim']:
+                    # The embedding model or size changed; start a new matrix
+                    return None
+                if paper_id in seen:
+                    stale_rows += 1
+                seen.add(paper_id)
+                batch_embedding_ids.append(embedding_id)
+                batch_ids.append(paper_id)
+                batch_vectors.append(vector)
+                last_id = embedding_id
+
+                if len(batch_vectors) >= BATCH_SIZE:
+                    files.write(batch_embedding_ids, batch_ids, batch_vectors)
+                    appended += len(batch_vectors)
+                    batch_embedding_ids, batch_ids, batch_vectors = [], [], []
+
+            if batch_vectors:
+                files.write(batch_embedding_ids, batch_ids, batch_vectors)
+                appended += len(batch_vectors)
+        finally:
+            ids_bytes = files.close()
+
+        if appended:
+            meta.update(
+                rows=meta['rows'] + appended,
+                ids_bytes=ids_bytes,
+                stale_rows=stale_rows,
+                last_embedding_id=last_id
+            )
+            self._write_meta(meta)
+
+        return {'rebuilt': False, 'appended': appended, 'rows': meta['rows'], 'dim': meta['dim']}
+
+    def _rebuild(self, meta, db_path):
+        """Write a new version of the store from the current embeddings."""
+        version = (meta or {}).get('version', 0) + 1
+        layout = self._layout(database.get_embedding_dimension())
+        # Read before scanning: embeddings added during the rebuild are
+        # appended by the next sync (at worst twice, the later row wins)
+        last_id = database.get_max_embedding_id()
+
+        rows = 0
+        skipped = 0
+        if layout['dim']:
+            files = _VersionFiles(self, version, layout, 'wb')
+            try:
+                batch_embedding_ids, batch_ids, batch_vectors = [], [], []
+                for embedding_id, paper_id, vector in database.iter_embeddings(current_only=True,
+                                                                               batch_size=BATCH_SIZE):
+                    if len(vector) != layout['dim']:
+                        skipped += 1
+                        continue
+                    batch_embedding_ids.append(embedding_id)
+                    batch_ids.append(paper_id)
+                    batch_vectors.append(vector)
+                    if len(batch_vectors) >= BATCH_SIZE:
+                        files.write(batch_embedding_ids, batch_ids, batch_vectors)
+                        rows += len(batch_vectors)
+                        batch_embedding_ids, batch_ids, batch_vectors = [], [], []
+
+                if batch_vectors:
+                    files.write(batch_embedding_ids, batch_ids, batch_vectors)
+                    rows += len(batch_vectors)
+            finally:
+                ids_bytes = files.close()
+        else:
+            ids_bytes = 0
+
+        new_meta = dict(layout, version=version, db_path=db_path, rows=rows, ids_bytes=ids_bytes,
+                        stale_rows=0, last_embedding_id=last_id)
+        self._write_meta(new_meta)
+
+        # Readers that still map the old version keep their open files
+        if meta is not None and meta.get('dim'):
+            for old_path in self._paths(meta['version'], meta).values():
+                try:
+                    old_path.unlink()
+                except OSError:
+                    pass
+
+        stats = {'rebuilt': True, 'appended': rows, 'rows': rows, 'dim': layout['dim'], 'skipped': skipped}
+        stats.update(self.memory_usage(new_meta))
+        return stats
+
+    # Reading
+
+    def _load(self):
+        """Map the current version of the store, reloading it if meta.json changed.
+
+        The live rows are those papers currently point to; they are worked
+        out again whenever the database generation changes.
+
+        Returns:
+            dict: Mapped matrices and metadata, or None if the store can't be searched
+        """
+        try:
+            stat = self.meta_path.stat()
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if stamp != self._loaded_stamp:
+                self._loaded_stamp = stamp
+                self._state = self._map()
+            if self._state is None:
+                return None
+
+            generation = database.get_generation()
+            if 'live' not in self._state or self._state['generation'] != generation:
+                current = database.get_current_embedding_ids()
+                if current is None:
+                    return None
+                self._state = self._with_live_rows(self._state, current, generation)
+            return self._state
+
+    def _map(self):
+        """Map the files of the version in meta.json.
+
+        Returns:
+            dict: Mapped matrices, row ids and metadata, or None if the store can't be searched
+        """
+        meta = self.read_meta()
+        if meta is None or meta.get('db_path') != str(Path(database.DB_PATH).resolve()) or not meta['rows']:
+            return None
+
+        paths = self._paths(meta['version'], meta)
+        shape = (meta['rows'], meta['dim'])
+        try:
+            state = {'meta': meta}
+            state['vectors'] = np.memmap(paths['vectors'], dtype=np.float32, mode='r', shape=shape)
+            if 'scan' in paths:
+                dtype = np.int8 if meta['quantization'] == 'int8' else np.float32
+                state['scan'] = np.memmap(paths['scan'], dtype=dtype, mode='r',
+                                          shape=(meta['rows'], meta['scan_dim']))
+            if 'scales' in paths:
+                state['scales'] = np.memmap(paths['scales'], dtype=np.float32, mode='r',
+                                            shape=(meta['rows'],))
+            state['embedding_ids'] = np.memmap(paths['embedding_ids'], dtype=np.int64, mode='r',
+                                               shape=(meta['rows'],))
+            with open(paths['ids'], 'rb') as f:
+                ids = f.read(meta['ids_bytes']).decode('utf-8').splitlines()
+        except (OSError, ValueError) as e:
+            print(f"Error loading embedding store: {e}")
+            return None
+
+        if len(ids) != meta['rows']:
+            print("Error loading embedding store: row count does not match the id sidecar")
+            return None
+
+        state['ids'] = ids
+        return state
+
+    @staticmethod
+    def _with_live_rows(state, current, generation):
+        """A copy of a mapped store with the rows of current embeddings marked live.
+
+        Args:
+            state (dict): Mapped store
+            current (list): Embedding ids papers point to
+            generation (tuple): Database generation the ids were read at
+
+        Returns:
+            dict: The store with 'live', 'row_of' and an empty filter cache
+        """
+        rows = np.flatnonzero(np.isin(state['embedding_ids'], np.asarray(current, dtype=np.int64))).tolist()
+        # A rebuild racing a sync can store an embedding twice; the later row wins
+        row_of = {state['ids'][row]: row for row in rows}
+        live = np.zeros(len(state['ids']), dtype=bool)
+        live[list(row_of.values())] = True
+
+        state = dict(state, live=live, row_of=row_of, generation=generation)
+        state['filter_rows'] = OrderedDict()
+        state['live_count'] = len(row_of)
+        return state
+
+    def snapshot(self):
+        """The full vectors of the current store version, for whole-corpus jobs.
+
+        Returns:
+            dict: 'vectors' (mapped, normalized rows), 'ids' (paper id per
+            row), 'live' (mask of current rows), 'row_of' (paper id -> current
+            row) and 'meta', or None if the store can't be read
+        """
+        state = self._load()
+        if state is None:
+            return None
+        return {key: state[key] for key in ('vectors', 'ids', 'live', 'row_of', 'meta')}
+
+    def _filter_rows(self, state, paper_ids, filter_key):
+        """Live rows of a set of papers, cached per filter while the store is unchanged.
+
+        Args:
+            state (dict): Loaded store
+            paper_ids (set): Papers to keep
+            filter_key (tuple): Hashable description of the filter, None to skip the cache
+
+        Returns:
+            np.ndarray: Sorted row indices
+        """
+        cache = state['filter_rows']
+        with self._lock:
+            rows = cache.get(filter_key) if filter_key is not None else None
+            if rows is not None:
+                cache.move_to_end(filter_key)
+                return rows
+
+        row_of = state['row_of']
+        rows = np.fromiter((row_of[paper_id] for paper_id in paper_ids if paper_id in row_of), dtype=np.int64)
+        rows.sort()
+
+        if filter_key is not None:
+            with self._lock:
+                cache[filter_key] = rows
+                while len(cache) > FILTER_CACHE_SIZE:
+                    cache.popitem(last=False)
+        return rows
+
+    @timed(DB_QUERY_SECONDS, operation="embedding_store_search")
+    def search(self, query_vector, limit=5, paper_ids=None, filter_key=None):
+        """Find the rows most similar to a query vector.
+
+        With paper_ids, only the rows of those papers are scored. A selective
+        filter reads just those rows; one that keeps most of the store scans
+        everything and masks the rest out, which is faster than gathering.
+
+        Args:
+            query_vector (list): Query embedding
+            limit (int): Maximum number of results
+            paper_ids (set): Only consider these papers, None for all
+            filter_key (tuple): Cache key of paper_ids (see database.filter_paper_ids)
+
+        Returns:
+            tuple: (list of (paper_id, similarity) best first, last synced
+            embedding id), or None if the store can't serve this query
+        """
+        state = self._load()
+        if state is None:
+            return None
+        meta = state['meta']
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        if query.shape != (meta['dim'],):
+            return None
+
+        rows = None
+        available = state['live_count']
+        if paper_ids is not None:
+            rows = self._filter_rows(state, paper_ids, filter_key)
+            available = len(rows)
+
+        norm = np.linalg.norm(query)
+        limit = min(limit, available)
+        if norm == 0 or limit <= 0:
+            return [], meta['last_embedding_id']
+        query = query / norm
+
+        # First pass, on the reduced matrix if there is one
+        if 'scan' in state:
+            matrix, first_query = state['scan'], scan_query(query, meta['scan_dim'])
+        else:
+            matrix, first_query = state['vectors'], query
+
+        if rows is not None and len(rows) <= len(state['ids']) * FILTER_GATHER_FRACTION:
+            scores = self._score(matrix, first_query, state.get('scales'), rows=rows)
+            row_index = rows
+        else:
+            scores = self._score(matrix, first_query, state.get('scales'))
+            if rows is None:
+                scores[~state['live']] = -np.inf
+            else:
+                keep = np.zeros(len(scores), dtype=bool)
+                keep[rows] = True
+                scores[~keep] = -np.inf
+            row_index = None
+
+        def to_rows(positions):
+            return positions if row_index is None else row_index[positions]
+
+        if 'scan' not in state or not self.rerank_candidates:
+            top = _top_rows(scores, limit)
+            return [(state['ids'][row], float(scores[i])) for i, row in zip(top, to_rows(top))], meta['last_embedding_id']
+
+        # Exact re-rank of the candidates with their full rows
+        candidates = np.sort(to_rows(_top_rows(scores, min(max(limit, self.rerank_candidates), available))))
+        exact = state['vectors'][candidates] @ query
+        order = np.argsort(-exact)[:limit]
+        return [(state['ids'][candidates[i]], float(exact[i])) for i in order], meta['last_embedding_id']
+
+    @staticmethod
+    def _score(matrix, query, scales=None, rows=None):
+        """Dot products of rows with the query, computed in bounded chunks.
+
+        Args:
+            matrix (np.ndarray): Row matrix
+            query (np.ndarray): Query vector
+            scales (np.ndarray): Per-row scales of an int8 matrix
+            rows (np.ndarray): Sorted rows to score, None for all
+
+        Returns:
+            np.ndarray: One score per row (per entry of rows if given)
+        """
+        count = matrix.shape[0] if rows is None else len(rows)
+        chunk_rows = max(1024, EMBEDDING_STORE_CONFIG["chunk_mb"] * 1024 * 1024 // (matrix.shape[1] * 4))
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, chunk_rows):
+            if rows is None:
+                chunk = matrix[start:start + chunk_rows]
+            else:
+                chunk = matrix[rows[start:start + chunk_rows]]
+            if chunk.dtype != np.float32:
+                chunk = chunk.astype(np.float32)
+            scores[start:start + chunk_rows] = chunk @ query
+        if scales is not None:
+            scores *= scales if rows is None else scales[rows]
+        return scores
+
+
+def _top_rows(scores, count):
+    """Indices of the count highest scores, best first."""
+    top = np.argpartition(-scores, count - 1)[:count]
+    return top[np.argsort(-scores[top])]
+
+
+# Stores by directory, shared by all threads of a process
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store():
+    """Get the embedding store of the current database.
+
+    Returns:
+        EmbeddingStore: The store, or None if the store is disabled
+    """
+    if not EMBEDDING_STORE_CONFIG["enabled"]:
+        return None
+
+    directory = store_dir()
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = EmbeddingStore(directory)
+        return _stores[directory]
+
+
+def rows_embedded_since(snapshot, after_id):
+    """Store rows of the papers embedded after an embedding id.
+
+    Only embeddings the snapshot already holds are returned, so a job can
+    record snapshot['meta']['last_embedding_id'] as its new watermark.
+
+    Args:
+        snapshot (dict): Store snapshot (see EmbeddingStore.snapshot)
+        after_id (int): Watermark of the previous run
+
+    Returns:
+        tuple: (paper ids, numpy array of their current rows)
+    """
+    paper_ids = []
+    for embedding_id, paper_id, _ in database.iter_embeddings(after_id=after_id, current_only=True):
+        if embedding_id > snapshot['meta']['last_embedding_id']:
+            break
+        if paper_id in snapshot['row_of']:
+            paper_ids.append(paper_id)
+    paper_ids = list(dict.fromkeys(paper_ids))
+    return paper_ids, np.array([snapshot['row_of'][paper_id] for paper_id in paper_ids], dtype=np.int64)
+
+
+def sync_embedding_store(rebuild=False):
+    """Append new embeddings to the store, or rebuild it.
+
+    Args:
+        rebuild (bool): Rebuild from scratch
+
+    Returns:
+        dict: Sync statistics, or None if the store is disabled or the sync failed
+    """
+    store = get_embedding_store()
+    if store is None:
+        return None
+
+    try:
+        return store.sync(rebuild=rebuild)
+    except Exception as e:
+        print(f"Error syncing embedding store: {e}")
+        return None
@@ -0,0 +1,309 @@
+"""
+Event-driven processing for the ESG & Finance AI Research Assistant.
+
+Collection publishes the ids of the papers it inserted or changed, and a
+consumer thread processes them in micro-batches right away instead of
+leaving them for the next data_processing run. The periodic job remains as
+a sweep for papers whose events were lost (for example a process that
+stopped before its queue was drained).
+
+The queue is in-process by default, so only collections running in the
+process that hosts the consumer (the scheduler) are picked up. With
+EVENTS_CONFIG['backend'] = 'sqlite' events are stored in the paper_events
+table: `main.py collect` in one process then reaches the consumer in
+another, and queued events survive restarts.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import EVENTS_CONFIG
+from src.backend.database import add_paper_events, take_paper_events
+from src.backend.metrics import PAPER_EVENTS
+
+
+class MemoryEventQueue:
+    """In-process queue of paper ids."""
+
+    def __init__(self):
+        self._paper_ids = deque()
+        self._condition = threading.Condition()
+
+    def publish(self, paper_ids):
+        """Add paper ids to the queue.
+
+        Args:
+            paper_ids (list): Ids of new or changed papers
+
+        Returns:
+            int: Number of events added
+        """
+        with self._condition:
+            self._paper_ids.extend(paper_ids)
+            self._condition.notify_all()
+        return len(paper_ids)
+
+    def take(self, limit, timeout=None):
+        """Remove and return queued paper ids, waiting if there are none.
+
+        Args:
+            limit (int): Maximum number of ids to take
+            timeout (float): Seconds to wait for an event, None to wait until woken
+
+        Returns:
+            list: Paper ids, oldest first (empty on timeout or wake)
+        """
+        with self._condition:
+            if not self._paper_ids:
+                self._condition.wait(timeout)
+            return [self._paper_ids.popleft() for _ in range(min(limit, len(self._paper_ids)))]
+
+    def wake(self):
+        """Wake up consumers waiting in take."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def pending(self):
+        """Number of queued events."""
+        return len(self._paper_ids)
+
+
+class SQLiteEventQueue:
+    """Paper id queue stored in the paper_events table."""
+
+    def __init__(self, poll_interval=None):
+        """Initialize the queue.
+
+        Args:
+            poll_interval (float): Seconds between checks for events
+                published by other processes
+        """
+        self.poll_interval = poll_interval or EVENTS_CONFIG["poll_interval"]
+        self._published = threading.Event()
+
+    def publish(self, paper_ids):
+        """Add paper ids to the queue.
+
+        Args:
+            paper_ids (list): Ids of new or changed papers
+
+        Returns:
+            int: Number of events added
+        """
+        added = add_paper_events(paper_ids)
+        self._published.set()
+        return added
+
+    def take(self, limit, timeout=None):
+        """Remove and return queued paper ids, waiting if there are none.
+
+        Args:
+            limit (int): Maximum number of ids to take
+            timeout (float): Seconds to wait for an event, None to wait until woken
+
+        Returns:
+            list: Paper ids, oldest first (empty on timeout or wake)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Cleared before reading, so a publish in between is not missed
+            self._published.clear()
+            paper_ids = take_paper_events(limit)
+            if paper_ids:
+                return paper_ids
+
+            wait = self.poll_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return []
+            if self._published.wait(wait) and deadline is None:
+                # Woken without events (see wake)
+                return []
+
+    def wake(self):
+        """Wake up consumers waiting in take."""
+        self._published.set()
+
+    def pending(self):
+        """Number of queued events, not tracked for the shared table."""
+        return None
+
+
+class PaperEventConsumer:
+    """Background thread processing published papers in micro-batches."""
+
+    def __init__(self, event_queue, batch_size=None, max_wait=None):
+        """Initialize the consumer.
+
+        Args:
+            event_queue: Queue to consume (MemoryEventQueue or SQLiteEventQueue)
+            batch_size (int): Papers processed per micro-batch
+            max_wait (float): Seconds to wait for a started batch to fill
+        """
+        self.event_queue = event_queue
+        self.batch_size = batch_size or EVENTS_CONFIG["batch_size"]
+        self.max_wait = max_wait if max_wait is not None else EVENTS_CONFIG["max_wait"]
+        self.stats = {'batches': 0, 'papers': 0, 'summarized': 0, 'embedded': 0, 'errors': 0,
+                      'last_batch': None}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        """Whether the consumer thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start consuming in a daemon thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="paper-events", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop after the current batch.
+
+        Args:
+            timeout (float): Seconds to wait for the thread
+        """
+        self._stop.set()
+        self.event_queue.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def next_batch(self):
+        """Wait for events and collect a micro-batch.
+
+        The batch is handed over as soon as it is full or max_wait seconds
+        after its first event, whichever comes first.
+
+        Returns:
+            list: Unique paper ids, empty when woken without events
+        """
+        paper_ids = self.event_queue.take(self.batch_size)
+        if not paper_ids:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+        while len(paper_ids) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            paper_ids += self.event_queue.take(self.batch_size - len(paper_ids), timeout=remaining)
+        return list(dict.fromkeys(paper_ids))
+
+    def _run(self):
+        """Consume batches until stopped."""
+        from src.backend.ai_processing import process_new_papers
+        from src.backend.worker import make_worker_id
+
+        worker_id = make_worker_id()
+        while not self._stop.is_set():
+            paper_ids = self.next_batch()
+            if not paper_ids:
+                continue
+
+            PAPER_EVENTS.inc(len(paper_ids), action="consumed")
+            try:
+                stats = process_new_papers(limit=len(paper_ids), worker_id=worker_id, paper_ids=paper_ids)
+            except Exception as e:
+                # The papers stay unprocessed and are picked up by the next sweep
+                print(f"Error processing paper events: {e}")
+                stats = {'errors': len(paper_ids)}
+
+            self.stats['batches'] += 1
+            self.stats['papers'] += len(paper_ids)
+            for key in ('summarized', 'embedded', 'errors'):
+                self.stats[key] += stats.get(key, 0)
+            self.stats['last_batch'] = datetime.now().isoformat()
+
+
+# Queue and consumer of this process, created on first use
+_event_queue = None
+_consumer = None
+_lock = threading.Lock()
+
+def get_event_queue():
+    """Get the configured event queue.
+
+    Returns:
+        MemoryEventQueue or SQLiteEventQueue: Queue instance
+    """
+    global _event_queue
+    with _lock:
+        if _event_queue is None:
+            if EVENTS_CONFIG["backend"] == "sqlite":
+                _event_queue = SQLiteEventQueue()
+            else:
+                _event_queue = MemoryEventQueue()
+        return _event_queue
+
+def publish_papers(paper_ids):
+    """Publish new or changed papers for processing.
+
+    With the in-process queue, events are only kept while a consumer runs
+    in this process; otherwise the papers wait for the next sweep.
+
+    Args:
+        paper_ids (list): Ids of new or changed papers
+
+    Returns:
+        int: Number of events published
+    """
+    if not EVENTS_CONFIG["enabled"] or not paper_ids:
+        return 0
+    event_queue = get_event_queue()
+    if isinstance(event_queue, MemoryEventQueue) and not (_consumer and _consumer.running):
+        return 0
+
+    published = event_queue.publish(list(paper_ids))
+    PAPER_EVENTS.inc(published, action="published")
+    return published
+
+def start_consumer():
+    """Start this process's event consumer if events are enabled.
+
+    Returns:
+        PaperEventConsumer: The running consumer, or None if disabled
+    """
+    global _consumer
+    if not EVENTS_CONFIG["enabled"]:
+        return None
+    event_queue = get_event_queue()
+    with _lock:
+        if _consumer is None:
+            _consumer = PaperEventConsumer(event_queue)
+        _consumer.start()
+    return _consumer
+
+def stop_consumer():
+    """Stop this process's event consumer, if running."""
+    if _consumer is not None:
+        _consumer.stop()
+
+def get_consumer_status():
+    """Get statistics of this process's consumer.
+
+    Returns:
+        dict: Consumer statistics, including whether it runs and the number
+        of pending in-process events
+    """
+    if _consumer is None:
+        return {'enabled': EVENTS_CONFIG["enabled"], 'running': False}
+    status = dict(_consumer.stats)
+    status.update({
+        'enabled': EVENTS_CONFIG["enabled"],
+        'backend': EVENTS_CONFIG["backend"],
+        'running': _consumer.running,
+        'pending': _consumer.event_queue.pending()
+    })
+    return status
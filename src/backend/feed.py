@@ -0,0 +1,198 @@
+"""
+Personalized paper feed built from the logged user queries.
+
+A nightly job turns the queries of the last FEED_CONFIG['query_days'] into
+interest profiles and ranks the recently published papers against them, so
+the home page loads "new papers matching your interests" from the
+paper_feed table with one indexed query instead of searching per visit.
+
+Queries are normalized and weighted by recency (exponential decay with
+FEED_CONFIG['half_life_days']); their embeddings are cached in the
+query_embeddings table, so only queries not seen before are sent to
+OpenAI. Similar queries are merged into profiles (the weighted mean of
+their embeddings), and all candidate papers are scored against all
+profiles in one matrix product. Each paper is ranked by its best matching
+profile, whose most frequent query is stored to explain the match.
+
+Usage:
+    python src/main.py feed
+"""
+
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import EMBEDDING_MODEL, FEED_CONFIG
+from src.backend import database
+from src.backend.embedding_store import get_embedding_store
+
+# Name of the job in the job_state table
+JOB = "paper_feed"
+
+# Queries embedded per OpenAI request
+EMBED_BATCH_SIZE = 100
+
+
+def normalize_query(query):
+    """Lower-case a query and collapse its whitespace."""
+    return re.sub(r'\s+', ' ', (query or '').strip().lower())
+
+
+def weigh_queries(rows, now=None):
+    """Weigh distinct queries by how often and how recently they were asked.
+
+    Args:
+        rows (list): (query, ISO timestamp) tuples
+        now (datetime): Reference time, defaults to now
+
+    Returns:
+        dict: Normalized query -> weight (1.0 per query asked just now)
+    """
+    now = now or datetime.now()
+    half_life = FEED_CONFIG["half_life_days"] * 86400
+    weights = {}
+    for query, timestamp in rows:
+        query = normalize_query(query)
+        if not query:
+            continue
+        try:
+            age = max((now - datetime.fromisoformat(timestamp)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            continue
+        weights[query] = weights.get(query, 0.0) + 0.5 ** (age / half_life)
+    return weights
+
+
+def embed_queries(queries):
+    """Get the embeddings of queries, computing only the uncached ones.
+
+    Queries that can't be embedded (for example without an API key) are
+    left out.
+
+    Args:
+        queries (list): Normalized queries
+
+    Returns:
+        dict: Query -> embedding vector
+    """
+    embeddings = database.get_query_embeddings(queries, EMBEDDING_MODEL)
+    missing = [query for query in queries if query not in embeddings]
+    if not missing:
+        return embeddings
+
+    try:
+        # Imported here so feeds built from cached embeddings don't need OpenAI
+        from src.backend.ai_processing import get_agent
+        agent = get_agent()
+        for start in range(0, len(missing), EMBED_BATCH_SIZE):
+            batch = missing[start:start + EMBED_BATCH_SIZE]
+            computed = dict(zip(batch, agent.embed_queries(batch)))
+            database.save_query_embeddings(computed, EMBEDDING_MODEL)
+            embeddings.update(computed)
+    except Exception as e:
+        print(f"Error embedding queries for the feed: {e}")
+    return embeddings
+
+
+def build_profiles(weights, embeddings):
+    """Merge similar queries into weighted interest profiles.
+
+    Queries are visited by decreasing weight; each joins the first profile
+    it is at least FEED_CONFIG['merge_similarity'] similar to, or starts a
+    new one.
+
+    Args:
+        weights (dict): Query -> weight
+        embeddings (dict): Query -> embedding vector
+
+    Returns:
+        tuple: (profiles x dim matrix of normalized vectors, list of profile
+        dictionaries with 'query' (the heaviest query) and 'weight')
+    """
+    queries = [query for query in sorted(weights, key=weights.get, reverse=True) if query in embeddings]
+    if not queries:
+        return None, []
+
+    vectors = np.array([embeddings[query] for query in queries], dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    sums, profiles = [], []
+    for query, vector in zip(queries, vectors):
+        if sums:
+            centres = np.array(sums)
+            centres /= np.maximum(np.linalg.norm(centres, axis=1, keepdims=True), 1e-12)
+            similarities = centres @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= FEED_CONFIG["merge_similarity"]:
+                sums[best] += weights[query] * vector
+                profiles[best]['weight'] += weights[query]
+                continue
+        sums.append(weights[query] * vector)
+        profiles.append({'query': query, 'weight': weights[query]})
+
+    order = sorted(range(len(profiles)), key=lambda i: profiles[i]['weight'], reverse=True)
+    order = order[:FEED_CONFIG["max_profiles"]]
+    matrix = np.array([sums[i] for i in order], dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix, [profiles[i] for i in order]
+
+
+def generate_feed(now=None):
+    """Rebuild the paper feed from the recent queries and papers.
+
+    Args:
+        now (datetime): Reference time, defaults to now
+
+    Returns:
+        dict: Feed statistics, or None if the embedding store is unavailable
+        or the feed couldn't be saved
+    """
+    store = get_embedding_store()
+    snapshot = store.snapshot() if store is not None else None
+    if snapshot is None:
+        return None
+
+    start = time.perf_counter()
+    now = now or datetime.now()
+    rows = database.get_recent_queries((now - timedelta(days=FEED_CONFIG["query_days"])).isoformat())
+    weights = weigh_queries(rows, now=now)
+    weights = dict(sorted(weights.items(), key=lambda item: item[1], reverse=True)[:FEED_CONFIG["max_queries"]])
+
+    embeddings = {query: vector for query, vector in embed_queries(list(weights)).items()
+                  if len(vector) == snapshot['meta']['dim']}
+    profiles_matrix, profiles = build_profiles(weights, embeddings)
+
+    since = (now - timedelta(days=FEED_CONFIG["paper_days"])).date().isoformat()
+    candidates = [paper_id for paper_id in database.get_recent_paper_ids(since) if paper_id in snapshot['row_of']]
+    stats = {'queries': len(rows), 'profiles': len(profiles), 'candidates': len(candidates), 'papers': 0}
+
+    entries = []
+    if profiles and candidates:
+        rows_of = np.array([snapshot['row_of'][paper_id] for paper_id in candidates], dtype=np.int64)
+        # One pass: every candidate paper against every profile
+        scores = profiles_matrix @ np.asarray(snapshot['vectors'][np.sort(rows_of)]).T
+        order = np.argsort(rows_of)
+        best_profile = np.argmax(scores, axis=0)
+        best_score = scores[best_profile, np.arange(scores.shape[1])]
+
+        ranked = np.argsort(-best_score)[:FEED_CONFIG["size"]]
+        for column in ranked:
+            if best_score[column] < FEED_CONFIG["min_similarity"]:
+                break
+            entries.append((candidates[order[column]], float(best_score[column]),
+                            profiles[best_profile[column]]['query']))
+    stats['papers'] = len(entries)
+
+    job_state = {'profiles': [{'query': profile['query'], 'weight': round(profile['weight'], 3)}
+                              for profile in profiles]}
+    if not database.save_paper_feed(entries, job=JOB, job_state=job_state):
+        return None
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    return stats
@@ -0,0 +1,138 @@
+"""
+Storage compaction of the research database.
+
+Embedding a paper again adds a new embedding row and leaves the previous
+one behind, and summaries accumulate with every re-processing. With
+3072-dimensional vectors stored as JSON, these dead rows make up most of
+the file and slow every scan down. compact_storage deletes embeddings no
+paper points to, summaries beyond SUMMARY_CONFIG['keep_versions'] per
+paper and summaries of papers no longer stored, returns the freed pages
+to the file system and refreshes the query planner statistics.
+
+It runs while the API is serving: rows are deleted in short write
+transactions of COMPACTION_CONFIG['batch_size'] rows with a pause in
+between, and freed pages are returned by incremental vacuum steps. Only
+files created with auto_vacuum = INCREMENTAL (every database initialized
+since this module was added) can shrink in steps; older files keep their
+free pages for reuse until one full compaction (`--full`) rewrites them.
+The full VACUUM blocks other connections while it runs, so it is never
+scheduled.
+
+Usage:
+    python src/main.py compact
+    python src/main.py compact --full
+    python src/main.py prune-summaries --keep 3
+"""
+
+import time
+from pathlib import Path
+import sys
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import COMPACTION_CONFIG
+from src.backend import database
+
+# Name of the job in the job_state table
+JOB = "storage_compaction"
+
+# PRAGMA auto_vacuum value of files that can be vacuumed incrementally
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _delete_in_batches(delete, ids):
+    """Delete rows by id in batches, pausing between the write transactions.
+
+    Returns:
+        int: Number of rows deleted, or None if a batch failed
+    """
+    deleted = 0
+    batch_size = COMPACTION_CONFIG["batch_size"]
+    for start in range(0, len(ids), batch_size):
+        if start:
+            time.sleep(COMPACTION_CONFIG["pause"])
+        count = delete(ids[start:start + batch_size])
+        if count is None:
+            return None
+        deleted += count
+    return deleted
+
+
+def prune_summaries(keep=None):
+    """Delete superseded summaries, and summaries of papers no longer stored, in batches.
+
+    Args:
+        keep (int): Summaries kept per paper, SUMMARY_CONFIG['keep_versions']
+            if None (0 keeps all, summaries of deleted papers are still removed)
+
+    Returns:
+        int: Number of summaries deleted, or None if a batch failed
+    """
+    return _delete_in_batches(database.delete_summaries, database.get_superseded_summary_ids(keep))
+
+
+def _vacuum_incrementally():
+    """Return free pages in steps until none are left or a step frees nothing.
+
+    Returns:
+        bool: Success status
+    """
+    free_pages = None
+    while True:
+        stats = database.get_storage_stats()
+        if stats is None:
+            return False
+        if not stats['free_pages'] or stats['free_pages'] == free_pages:
+            return True
+        free_pages = stats['free_pages']
+        if not database.vacuum_database(pages=COMPACTION_CONFIG["vacuum_pages"]):
+            return False
+        time.sleep(COMPACTION_CONFIG["pause"])
+
+
+def compact_storage(full=False, keep=None):
+    """Delete orphaned embeddings and superseded summaries and shrink the file.
+
+    Args:
+        full (bool): Rewrite the file with a full VACUUM, which blocks other
+            connections while it runs
+        keep (int): Summaries kept per paper, SUMMARY_CONFIG['keep_versions']
+            if None (0 keeps all, summaries of deleted papers are still removed)
+
+    Returns:
+        dict: Compaction statistics, or None if the database couldn't be compacted
+    """
+    start = time.perf_counter()
+    before = database.get_storage_stats()
+    if before is None:
+        return None
+
+    stats = {'mode': 'full' if full else 'incremental', 'bytes_before': before['bytes']}
+    stats['embeddings_deleted'] = _delete_in_batches(database.delete_orphaned_embeddings,
+                                                     database.get_orphaned_embedding_ids())
+    stats['summaries_deleted'] = prune_summaries(keep)
+    if stats['embeddings_deleted'] is None or stats['summaries_deleted'] is None:
+        return None
+
+    if full and not database.vacuum_database(full=True):
+        return None
+    if not database.analyze_database(COMPACTION_CONFIG["analysis_limit"]):
+        return None
+    # Also returns the pages freed by the keyword index rebuild after a full VACUUM;
+    # files without incremental auto-vacuum reuse their free pages for later writes
+    if (full or before['auto_vacuum'] == AUTO_VACUUM_INCREMENTAL) and not _vacuum_incrementally():
+        return None
+
+    after = database.get_storage_stats()
+    if after is None:
+        return None
+    stats['bytes_after'] = after['bytes']
+    # ANALYZE may add a page or two of statistics to a file that had nothing to reclaim
+    stats['bytes_reclaimed'] = max(before['bytes'] - after['bytes'], 0)
+    stats['free_bytes'] = after['free_bytes']
+    stats['incremental_vacuum'] = after['auto_vacuum'] == AUTO_VACUUM_INCREMENTAL
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+
+    database.set_job_state(JOB, stats)
+    return stats
@@ -0,0 +1,437 @@
+"""
+In-process metrics registry for the ESG & Finance AI Research Assistant.
+
+Counters, gauges and histograms are kept in memory and rendered in the
+Prometheus text exposition format by the /api/metrics endpoint. Recording a
+value is a dictionary lookup and a few additions under a lock; all
+formatting work happens only when the endpoint is scraped.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    """Format a label set as {name="value",...}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    """Format a sample value."""
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """Initialize the metric.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """Build the label tuple for a set of keyword labels."""
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        """Render the metric in the text exposition format.
+
+        Returns:
+            list: Output lines
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        """Render one labelled sample."""
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        """Increment the counter.
+
+        Args:
+            amount (float): Amount to add
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Gauge that is either set directly or computed when scraped."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        """Initialize the gauge.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Names of the labels
+            callback (callable): Optional function returning the current value,
+                called only when the registry is rendered
+        """
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        """Set the gauge value.
+
+        Args:
+            value (float): New value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, callback):
+        """Compute the (unlabelled) value with a callback at scrape time."""
+        self.callback = callback
+
+    def render(self):
+        """Render the gauge, evaluating the callback if one is set."""
+        if self.callback is not None:
+            try:
+                self.set(self.callback())
+            except Exception as e:
+                print(f"Error computing metric {self.name}: {e}")
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Histogram with fixed bucket boundaries."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Initialize the histogram.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Names of the labels
+            buckets (tuple): Upper bounds of the buckets, ascending
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """Record one observation.
+
+        Args:
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (plus +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager that observes the duration of its block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, state):
+        """Render the bucket, sum and count series for one label set."""
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of named metrics."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        """Register a metric, returning the existing one if the name is taken."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Create or get a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        """Create or get a gauge."""
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Create or get a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "esg_http_request_duration_seconds",
+    "API request latency by route",
+    ("method", "route", "status")
+)
+
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "esg_db_query_duration_seconds",
+    "SQLite operation latency by database function",
+    ("operation",)
+)
+
+OPENAI_REQUEST_SECONDS = REGISTRY.histogram(
+    "esg_openai_request_duration_seconds",
+    "OpenAI call latency by operation",
+    ("operation",)
+)
+
+OPENAI_TOKENS = REGISTRY.counter(
+    "esg_openai_tokens_total",
+    "OpenAI tokens used by operation and kind (prompt, completion)",
+    ("operation", "kind")
+)
+
+PROMPT_TOKENS = REGISTRY.counter(
+    "esg_prompt_tokens_total",
+    "Prompt tokens assembled by operation, counted locally before the call",
+    ("operation",)
+)
+
+PROMPT_TOKENS_SAVED = REGISTRY.counter(
+    "esg_prompt_tokens_saved_total",
+    "Prompt tokens saved by compaction and trimming by operation",
+    ("operation",)
+)
+
+OPENAI_ERRORS = REGISTRY.counter(
+    "esg_openai_errors_total",
+    "Failed OpenAI calls by operation",
+    ("operation",)
+)
+
+COLLECTOR_SECONDS = REGISTRY.histogram(
+    "esg_collector_duration_seconds",
+    "Collector time by source and phase (fetch, parse)",
+    ("source", "phase")
+)
+
+COLLECTED_PAPERS = REGISTRY.counter(
+    "esg_collected_papers_total",
+    "Papers parsed from sources",
+    ("source",)
+)
+
+SCHEDULER_JOB_SECONDS = REGISTRY.histogram(
+    "esg_scheduler_job_duration_seconds",
+    "Scheduler job run time by job",
+    ("job",),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+)
+
+SCHEDULER_JOB_RUNS = REGISTRY.counter(
+    "esg_scheduler_job_runs_total",
+    "Scheduler job runs by job and result (ok, error, skipped)",
+    ("job", "result")
+)
+
+PAPER_EVENTS = REGISTRY.counter(
+    "esg_paper_events_total",
+    "Paper events by action (published, consumed)",
+    ("action",)
+)
+
+RESPONSE_CACHE_REQUESTS = REGISTRY.counter(
+    "esg_response_cache_requests_total",
+    "Cached GET route requests by result (hit, miss, not_modified)",
+    ("route", "result")
+)
+
+UNPROCESSED_PAPERS = REGISTRY.gauge(
+    "esg_unprocessed_papers",
+    "Papers waiting for a summary"
+)
+
+
+def timed(histogram, **labels):
+    """Decorator observing the duration of every call to a function.
+
+    Args:
+        histogram (Histogram): Histogram to record into
+        **labels: Label values for the observations
+
+    Returns:
+        callable: Decorator
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+def record_token_usage(operation, usage):
+    """Record token usage reported by an OpenAI response.
+
+    Accepts both the chat/embeddings (prompt_tokens, completion_tokens) and
+    the responses API (input_tokens, output_tokens) field names.
+
+    Args:
+        operation (str): Operation label
+        usage: Usage object or dictionary, may be None
+    """
+    if usage is None:
+        return
+
+    def field(name):
+        if isinstance(usage, dict):
+            return usage.get(name)
+        return getattr(usage, name, None)
+
+    prompt = field('prompt_tokens') or field('input_tokens') or 0
+    completion = field('completion_tokens') or field('output_tokens') or 0
+    if prompt:
+        OPENAI_TOKENS.inc(prompt, operation=operation, kind="prompt")
+    if completion:
+        OPENAI_TOKENS.inc(completion, operation=operation, kind="completion")
+
+
+def track_openai_call(operation, func, *args, **kwargs):
+    """Call an OpenAI-backed function, recording latency, tokens and errors.
+
+    Args:
+        operation (str): Operation label (summarize, embed, embed_query, brief)
+        func (callable): Function making the call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The return value of func
+    """
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except Exception:
+        OPENAI_ERRORS.inc(operation=operation)
+        raise
+    finally:
+        OPENAI_REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation)
+    record_token_usage(operation, getattr(result, 'usage', None))
+    return result
+
+
+async def track_openai_call_async(operation, func, *args, **kwargs):
+    """Await an async OpenAI-backed call, recording latency, tokens and errors.
+
+    Args:
+        operation (str): Operation label
+        func (callable): Coroutine function making the call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The result of func
+    """
+    start = time.perf_counter()
+    try:
+        result = await func(*args, **kwargs)
+    except Exception:
+        OPENAI_ERRORS.inc(operation=operation)
+        raise
+    finally:
+        OPENAI_REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation)
+    record_token_usage(operation, getattr(result, 'usage', None))
+    return result
+
+
+def render_metrics():
+    """Render the global registry.
+
+    Returns:
+        str: Prometheus exposition text
+    """
+    return REGISTRY.render()
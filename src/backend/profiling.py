@@ -0,0 +1,211 @@
+"""
+Opt-in per-request profiling for the ESG & Finance AI Research Assistant API.
+
+A request is profiled when profiling is enabled with API_PROFILE=1 and its
+route is listed in PROFILING_CONFIG['routes'] (subject to sampling), or when
+it carries an X-Profile-Token header matching API_PROFILE_TOKEN. Each
+profiled request leaves a cProfile dump and a JSON sidecar with timing and
+a tracemalloc allocation diff in data/profiles/.
+"""
+
+import cProfile
+import hmac
+import json
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import PROFILING_CONFIG
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+
+# Only one request is profiled at a time: cProfile and tracemalloc are
+# process-wide on recent Python versions, and overlapping captures would
+# attribute other requests' work to the profiled one.
+_profile_lock = threading.Lock()
+
+
+def should_profile(route, headers):
+    """Decide whether a request should be profiled.
+
+    Args:
+        route (str): Matched route rule, e.g. /api/search
+        headers (Mapping): Request headers
+
+    Returns:
+        bool: True if the request should be profiled
+    """
+    token = PROFILING_CONFIG["token"]
+    header_token = headers.get(PROFILE_TOKEN_HEADER)
+    # compare_digest only accepts ASCII strings, so compare the encoded bytes
+    if token and header_token and hmac.compare_digest(
+            token.encode(), header_token.encode('utf-8', 'surrogateescape')):
+        return True
+
+    if not PROFILING_CONFIG["enabled"] or route not in PROFILING_CONFIG["routes"]:
+        return False
+
+    return random.random() < PROFILING_CONFIG["sample_rate"]
+
+
+class RequestProfiler:
+    """Captures a cProfile profile and a tracemalloc diff for one request."""
+
+    def __init__(self):
+        """Initialize the profiler."""
+        self.profiler = cProfile.Profile()
+        self.start_time = None
+        self.duration_ms = None
+        self.peak_memory = 0
+        self._snapshot = None
+        self._started_tracemalloc = False
+        self._active = False
+
+    def start(self):
+        """Start profiling.
+
+        Returns:
+            bool: False if another request is already being profiled
+        """
+        if not _profile_lock.acquire(blocking=False):
+            return False
+
+        self._active = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._snapshot = tracemalloc.take_snapshot()
+
+        self.start_time = time.perf_counter()
+        self.profiler.enable()
+        return True
+
+    def stop(self):
+        """Stop profiling.
+
+        Returns:
+            list: Top allocation differences as dictionaries
+        """
+        if not self._active:
+            return []
+
+        try:
+            self.profiler.disable()
+            self.duration_ms = (time.perf_counter() - self.start_time) * 1000
+
+            snapshot = tracemalloc.take_snapshot()
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            stats = snapshot.compare_to(self._snapshot, 'lineno')
+            memory_diff = [
+                {
+                    'location': str(stat.traceback),
+                    'size_diff_kb': round(stat.size_diff / 1024, 2),
+                    'count_diff': stat.count_diff
+                }
+                for stat in stats[:PROFILING_CONFIG["tracemalloc_top"]]
+            ]
+
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        finally:
+            self._active = False
+            _profile_lock.release()
+
+        return memory_diff
+
+    def save(self, route, method, path, status, memory_diff):
+        """Write the profile and its JSON sidecar to the profiles directory.
+
+        Args:
+            route (str): Matched route rule
+            method (str): HTTP method
+            path (str): Full request path including query string
+            status (int): Response status code
+            memory_diff (list): Allocation differences from stop()
+
+        Returns:
+            Path: Path of the .prof file, or None if the request was too fast
+        """
+        if self.duration_ms is None or self.duration_ms < PROFILING_CONFIG["min_duration_ms"]:
+            return None
+
+        profile_dir = Path(PROFILING_CONFIG["dir"])
+        profile_dir.mkdir(parents=True, exist_ok=True)
+
+        timestamp = datetime.now()
+        route_slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        stem = f"{timestamp.strftime('%Y%m%d_%H%M%S_%f')}_{route_slug}_{int(self.duration_ms)}ms"
+        profile_path = profile_dir / f"{stem}.prof"
+
+        try:
+            self.profiler.dump_stats(str(profile_path))
+            with open(profile_dir / f"{stem}.json", 'w') as f:
+                json.dump({
+                    'route': route,
+                    'method': method,
+                    'path': path,
+                    'status': status,
+                    'duration_ms': round(self.duration_ms, 2),
+                    'timestamp': timestamp.isoformat(),
+                    'peak_traced_memory_kb': round(self.peak_memory / 1024, 2),
+                    'memory_diff': memory_diff,
+                    'profile': profile_path.name
+                }, f, indent=2)
+        except Exception as e:
+            print(f"Error saving request profile: {e}")
+            return None
+
+        return profile_path
+
+
+def list_profiles(route=None):
+    """List captured profiles, slowest first.
+
+    Args:
+        route (str): Optional route filter
+
+    Returns:
+        list: Profile metadata dictionaries with a 'profile_path' key
+    """
+    profile_dir = Path(PROFILING_CONFIG["dir"])
+    if not profile_dir.exists():
+        return []
+
+    profiles = []
+    for meta_file in profile_dir.glob("*.json"):
+        try:
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+        except Exception as e:
+            print(f"Error reading profile metadata {meta_file}: {e}")
+            continue
+        if route and meta.get('route') != route:
+            continue
+        meta['profile_path'] = str(profile_dir / meta['profile'])
+        profiles.append(meta)
+
+    profiles.sort(key=lambda meta: meta.get('duration_ms', 0), reverse=True)
+    return profiles
+
+
+def print_profile_stats(profile_path, top=20, sort='cumulative'):
+    """Print the top functions of a captured profile.
+
+    Args:
+        profile_path (str): Path of a .prof file
+        top (int): Number of functions to print
+        sort (str): pstats sort key
+    """
+    stats = pstats.Stats(str(profile_path))
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
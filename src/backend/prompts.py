@@ -0,0 +1,286 @@
+"""
+Token-budgeted prompt assembly for the OpenAI calls.
+
+Prompts start with the fixed task instructions and end with the per-call
+content (the paper, or the query and its papers). Together with the system
+instructions holding the ESG term list, every call of a task then shares a
+long identical prefix that the provider can serve from its prompt cache.
+
+The variable part is compacted (plain text instead of indented JSON, a
+limited number of authors and key findings) and trimmed to a token budget:
+abstracts and summaries are cut at a word boundary, and the lowest ranked
+papers of a brief are dropped when even a shortened entry would not fit.
+Each builder reports its token count and the tokens saved compared to the
+untrimmed prompt.
+
+Tokens are counted with tiktoken when it is installed and its encoding is
+available; otherwise they are estimated from words and punctuation, which
+is close enough for budgeting.
+"""
+
+import json
+import math
+import re
+import sys
+import textwrap
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import PROMPT_CONFIG
+from src.backend.metrics import PROMPT_TOKENS, PROMPT_TOKENS_SAVED
+
+# Task instructions, sent before the variable content so they are part of the cached prefix
+SUMMARY_INSTRUCTIONS = textwrap.dedent("""\
+    # Paper Analysis Task
+
+    ## Analysis Instructions
+    Analyze the academic paper below from an ESG and Finance perspective.
+
+    Please provide:
+    1. A concise summary (3-5 sentences)
+    2. ESG relevance score (0-100)
+    3. Finance relevance score (0-100)
+    4. 3-5 key findings or contributions
+    5. 5-8 relevant keywords
+
+    Format your response as a JSON object with these keys:
+    - summary: string
+    - esg_relevance_score: number
+    - finance_relevance_score: number
+    - key_findings: list of strings
+    - keywords: list of strings
+
+    Consider these ESG focus areas:
+    - Environmental: Climate change, resource use, pollution, biodiversity
+    - Social: Human capital, product liability, stakeholder opposition
+    - Governance: Corporate governance, corporate behavior
+
+    And these Finance focus areas:
+    - Asset pricing, portfolio management, risk management
+    - Corporate finance, sustainable investing, green bonds
+    - Financial markets, ESG investing, impact measurement
+    """)
+
+BRIEF_INSTRUCTIONS = textwrap.dedent("""\
+    # Research Brief Generation Task
+
+    ## Instructions
+    Generate a comprehensive research brief based on the user's query and the relevant papers provided below.
+
+    Your brief should include:
+    1. An executive summary (2-3 paragraphs)
+    2. Key themes and findings across the papers
+    3. Research gaps or opportunities
+    4. Practical implications for ESG and Finance professionals
+    5. Recommended next steps or areas for further research
+
+    Format your response as a well-structured research brief with these sections clearly labeled.
+    Keep the focus on ESG and Finance implications.
+    """)
+
+# Words, punctuation and line breaks, for the token estimate
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]|\n\s*")
+
+# tiktoken encoding, loaded on first use (False once it turned out to be unavailable)
+_encoding = None
+
+
+def _get_encoding():
+    """Get the tiktoken encoding, or None if it can't be loaded."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(PROMPT_CONFIG["encoding"])
+        except Exception:
+            # Not installed, or the encoding file can't be downloaded
+            _encoding = False
+    return _encoding or None
+
+
+def _piece_tokens(piece):
+    """Estimated tokens of a word, punctuation mark or line break."""
+    if piece[0].isalnum() or piece[0] == '_':
+        return math.ceil(len(piece) / 4)
+    return 1
+
+
+def count_tokens(text):
+    """Count the tokens of a text.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Number of tokens (estimated if tiktoken is unavailable)
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(_piece_tokens(piece) for piece in _PIECE_PATTERN.findall(text))
+
+
+def truncate_tokens(text, max_tokens):
+    """Cut a text to a number of tokens at a word boundary.
+
+    Args:
+        text (str): Text to cut
+        max_tokens (int): Maximum number of tokens to keep
+
+    Returns:
+        str: The text, or its beginning followed by an ellipsis
+    """
+    text = text or ''
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens - 1])
+        # Drop a partial last word
+        if len(cut) < len(text) and text[len(cut)].isalnum() and ' ' in cut:
+            cut = cut[:cut.rindex(' ')]
+    else:
+        used = 0
+        end = 0
+        for match in _PIECE_PATTERN.finditer(text):
+            used += _piece_tokens(match.group(0))
+            if used > max_tokens - 1:
+                break
+            end = match.end()
+        cut = text[:end]
+    return cut.rstrip(' ,;:') + '…'
+
+
+def _format_authors(authors):
+    """Format an author list, shortened to max_authors."""
+    if isinstance(authors, str):
+        try:
+            authors = json.loads(authors)
+        except ValueError:
+            return authors
+    authors = authors or []
+    shown = ", ".join(authors[:PROMPT_CONFIG["max_authors"]])
+    return shown + (" et al." if len(authors) > PROMPT_CONFIG["max_authors"] else "")
+
+
+def _report(operation, tokens, untrimmed_tokens, budget, **extra):
+    """Record and return the token statistics of a prompt."""
+    saved = max(untrimmed_tokens - tokens, 0)
+    PROMPT_TOKENS.inc(tokens, operation=operation)
+    PROMPT_TOKENS_SAVED.inc(saved, operation=operation)
+    stats = {'tokens': tokens, 'untrimmed_tokens': untrimmed_tokens, 'saved_tokens': saved, 'budget': budget}
+    stats.update(extra)
+    return stats
+
+
+def build_summary_prompt(paper, budget=None):
+    """Build the prompt summarizing a paper.
+
+    Args:
+        paper (dict): Paper data (title, authors, abstract)
+        budget (int): Maximum prompt tokens, PROMPT_CONFIG['summary_budget'] if None
+
+    Returns:
+        tuple: (prompt text, token statistics dict)
+    """
+    budget = budget or PROMPT_CONFIG["summary_budget"]
+    header = f"{SUMMARY_INSTRUCTIONS}\n## Paper Information\nTitle: {paper['title']}\n"
+    authors = paper.get('authors')
+    all_authors = ", ".join(authors) if isinstance(authors, list) else (authors or '')
+    abstract = paper.get('abstract') or ''
+
+    untrimmed = f"{header}Authors: {all_authors}\nAbstract: {abstract}\n"
+    header += f"Authors: {_format_authors(authors)}\nAbstract: "
+    abstract_budget = budget - count_tokens(header) - 1
+    shortened = truncate_tokens(abstract, abstract_budget)
+    prompt = f"{header}{shortened}\n"
+
+    stats = _report("summarize", count_tokens(prompt), count_tokens(untrimmed), budget,
+                    truncated=shortened != abstract)
+    return prompt, stats
+
+
+def _paper_entry(index, paper, summary_tokens=None, max_findings=None):
+    """Format one paper of a research brief.
+
+    Args:
+        index (int): Position of the paper, starting at 1
+        paper (dict): Paper information (title, authors, summary, key_findings, url)
+        summary_tokens (int): Tokens the summary is cut to, None for no limit
+        max_findings (int): Key findings included, PROMPT_CONFIG['max_key_findings'] if None
+
+    Returns:
+        str: Paper entry text
+    """
+    max_findings = PROMPT_CONFIG["max_key_findings"] if max_findings is None else max_findings
+    summary = paper.get('summary') or ''
+    if summary_tokens is not None:
+        summary = truncate_tokens(summary, summary_tokens)
+
+    lines = [f"[{index}] {paper.get('title')}", f"Authors: {_format_authors(paper.get('authors'))}"]
+    if paper.get('url'):
+        lines.append(f"URL: {paper['url']}")
+    if summary:
+        lines.append(f"Summary: {summary}")
+    findings = (paper.get('key_findings') or [])[:max_findings]
+    if findings:
+        lines.append("Key findings:")
+        lines.extend(f"- {finding}" for finding in findings)
+    return "\n".join(lines) + "\n\n"
+
+
+def build_brief_prompt(query, paper_info, budget=None):
+    """Build the research brief prompt.
+
+    Papers are added in rank order. A paper that doesn't fit the remaining
+    budget is added with a shortened summary and without key findings if
+    at least PROMPT_CONFIG['min_paper_tokens'] remain; otherwise it and all
+    lower ranked papers are left out.
+
+    Args:
+        query (str): User's research query
+        paper_info (list): Paper information dictionaries, best match first
+        budget (int): Maximum prompt tokens, PROMPT_CONFIG['brief_budget'] if None
+
+    Returns:
+        tuple: (prompt text, token statistics dict)
+    """
+    budget = budget or PROMPT_CONFIG["brief_budget"]
+    header = f"{BRIEF_INSTRUCTIONS}\n## Query\n\"{query}\"\n\n## Relevant Papers\n"
+    untrimmed = f"{header}{json.dumps(paper_info, indent=2)}\n"
+
+    remaining = budget - count_tokens(header)
+    entries = []
+    shortened = 0
+    for index, paper in enumerate(paper_info, 1):
+        entry = _paper_entry(index, paper)
+        tokens = count_tokens(entry)
+        if tokens > remaining:
+            # Shorten the summary to what is left after the rest of the entry
+            overhead = count_tokens(_paper_entry(index, dict(paper, summary=''), max_findings=0))
+            summary_tokens = remaining - overhead - 2
+            if remaining < PROMPT_CONFIG["min_paper_tokens"] or summary_tokens <= 0:
+                break
+            entry = _paper_entry(index, paper, summary_tokens=summary_tokens, max_findings=0)
+            tokens = count_tokens(entry)
+            if tokens > remaining:
+                # Token counts of the parts don't add up exactly; take off the difference
+                entry = _paper_entry(index, paper, summary_tokens=summary_tokens - (tokens - remaining),
+                                     max_findings=0)
+                tokens = count_tokens(entry)
+            shortened += 1
+        entries.append(entry)
+        remaining -= tokens
+
+    prompt = header + "".join(entries)
+    stats = _report("brief", count_tokens(prompt), count_tokens(untrimmed), budget,
+                    papers=len(entries), papers_dropped=len(paper_info) - len(entries),
+                    papers_shortened=shortened)
+    return prompt, stats
@@ -0,0 +1,147 @@
+"""
+Precomputed related papers.
+
+Every paper keeps its RELATED_CONFIG['k'] most similar papers (cosine
+similarity of the embeddings) in the related_papers table, so the related
+papers endpoint is a single indexed read instead of a similarity search.
+
+The graph is built from the memory-mapped embedding store. A full build
+scores the whole corpus in chunks of papers. Afterwards only the papers
+embedded since the last run are scored against the corpus: their own lists
+are replaced, and each of them is merged into the list of every existing
+paper whose k-th neighbour it beats. Lists of papers pointing to a paper
+whose embedding changed keep the old similarity until the next rebuild
+(`main.py related --rebuild`).
+
+Usage:
+    python src/main.py related
+    python src/main.py related --rebuild
+"""
+
+import time
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import RELATED_CONFIG
+from src.backend import database
+from src.backend.embedding_store import get_embedding_store, rows_embedded_since
+
+# Name of the job in the job_state table
+JOB = "related_papers"
+
+
+def _top_neighbours(scores, count):
+    """Columns of the count highest finite scores of each row, best first."""
+    count = min(count, scores.shape[1])
+    if count <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _neighbour_lists(snapshot, rows, k):
+    """Score papers against the corpus and return their k nearest neighbours.
+
+    Args:
+        snapshot (dict): Embedding store snapshot
+        rows (numpy.ndarray): Store rows of the papers to score
+        k (int): Neighbours per paper
+
+    Returns:
+        tuple: (dict of paper id -> [(related id, similarity)], similarity matrix of the rows)
+    """
+    vectors, ids, live = snapshot['vectors'], snapshot['ids'], snapshot['live']
+    scores = np.asarray(vectors[rows]) @ np.asarray(vectors).T
+    scores[:, ~live] = -np.inf
+    scores[np.arange(len(rows)), rows] = -np.inf
+
+    lists = {}
+    for i, top in enumerate(_top_neighbours(scores, k)):
+        lists[ids[rows[i]]] = [(ids[column], float(scores[i, column]))
+                               for column in top if np.isfinite(scores[i, column])]
+    return lists, scores
+
+
+def rebuild_related_papers(snapshot, k):
+    """Compute the related papers of every paper.
+
+    Args:
+        snapshot (dict): Embedding store snapshot
+        k (int): Neighbours per paper
+
+    Returns:
+        dict: Paper id -> [(related id, similarity)]
+    """
+    live_rows = np.flatnonzero(snapshot['live'])
+    chunk_rows = RELATED_CONFIG["chunk_rows"]
+
+    lists = {}
+    for start in range(0, len(live_rows), chunk_rows):
+        chunk, _ = _neighbour_lists(snapshot, live_rows[start:start + chunk_rows], k)
+        lists.update(chunk)
+    return lists
+
+
+def update_related_papers(rebuild=False):
+    """Bring the related papers up to date with the embedding store.
+
+    Args:
+        rebuild (bool): Recompute every list instead of only the affected ones
+
+    Returns:
+        dict: Update statistics, or None if the embedding store is unavailable
+    """
+    store = get_embedding_store()
+    snapshot = store.snapshot() if store is not None else None
+    if snapshot is None:
+        return None
+
+    start = time.perf_counter()
+    k = RELATED_CONFIG["k"]
+    watermark = snapshot['meta']['last_embedding_id']
+    state = database.get_job_state(JOB)
+    stats = {'mode': 'incremental', 'papers': 0, 'updated': 0, 'watermark': watermark}
+
+    if rebuild or not state or state.get('k') != k:
+        stats['mode'] = 'rebuild'
+        lists = rebuild_related_papers(snapshot, k)
+        stats['papers'] = stats['updated'] = len(lists)
+        saved = database.save_related_papers(lists=lists, k=k, job=JOB,
+                                             job_state={'k': k, 'last_embedding_id': watermark}, clear=True)
+    elif state['last_embedding_id'] >= watermark:
+        saved = True
+    else:
+        new_ids, rows = rows_embedded_since(snapshot, state['last_embedding_id'])
+
+        lists, additions = {}, {}
+        if len(rows):
+            # Existing papers whose k-th neighbour a new paper beats (all of them if the list isn't full)
+            thresholds = database.get_related_thresholds(k)
+            ids = snapshot['ids']
+            bar = np.array([thresholds.get(paper_id, -np.inf) for paper_id in ids])
+            new_columns = [snapshot['row_of'][paper_id] for paper_id in new_ids]
+
+            # Scored in chunks like a rebuild, so a bulk import doesn't need a new papers x corpus matrix
+            chunk_rows = RELATED_CONFIG["chunk_rows"]
+            for offset in range(0, len(rows), chunk_rows):
+                chunk, scores = _neighbour_lists(snapshot, rows[offset:offset + chunk_rows], k)
+                lists.update(chunk)
+                scores[:, new_columns] = -np.inf
+                for i, column in zip(*np.nonzero(scores > bar)):
+                    additions.setdefault(ids[column], []).append((new_ids[offset + i], float(scores[i, column])))
+
+        stats['papers'] = len(lists)
+        stats['updated'] = len(lists) + len(additions)
+        saved = database.save_related_papers(lists=lists, additions=additions, k=k, job=JOB,
+                                             job_state={'k': k, 'last_embedding_id': watermark})
+
+    if not saved:
+        return None
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    return stats
@@ -0,0 +1,130 @@
+"""
+Server-side cache of serialized API responses.
+
+Entries are tagged with the database generation they were built from (see
+database.get_generation). A lookup with a newer generation is a miss, so a
+write to the paper tables invalidates every cached response at once without
+having to track which responses it affected.
+"""
+
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+import sys
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import RESPONSE_CACHE_CONFIG
+
+# encoded maps a content encoding to the compressed body, filled on first use
+CachedResponse = namedtuple('CachedResponse', ['generation', 'body', 'status', 'mimetype', 'encoded'])
+
+
+def make_etag(generation, key):
+    """Build the entity tag for a response.
+
+    Responses for the same key and generation are identical, so the tag is
+    derived from those two values and the body never has to be hashed.
+
+    Args:
+        generation (int): Database generation
+        key (str): Cache key (request path and query string)
+
+    Returns:
+        str: Unquoted entity tag
+    """
+    return f"{generation}-{zlib.crc32(key.encode('utf-8')):08x}"
+
+
+class ResponseCache:
+    """Bounded LRU cache of response bodies keyed by request path and query."""
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        """Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached responses
+            max_bytes (int): Maximum total size of cached bodies
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        """Get a cached response built from the given generation.
+
+        Args:
+            key (str): Cache key
+            generation (int): Current database generation
+
+        Returns:
+            CachedResponse: The cached response, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.generation != generation:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, generation, body, status=200, mimetype='application/json'):
+        """Store a response body.
+
+        Args:
+            key (str): Cache key
+            generation (int): Database generation the body was built from
+            body (bytes): Serialized response body
+            status (int): Response status code
+            mimetype (str): Response mimetype
+
+        Returns:
+            CachedResponse: The stored entry, or None if the body is too large
+        """
+        if len(body) > self.max_bytes:
+            return None
+
+        entry = CachedResponse(generation, body, status, mimetype, {})
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+        return entry
+
+    def _remove(self, key):
+        """Remove an entry. The caller must hold the lock."""
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Get the cache size.
+
+        Returns:
+            dict: Number of entries and total body size in bytes
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes}
+
+
+# Global response cache
+RESPONSE_CACHE = ResponseCache(
+    max_entries=RESPONSE_CACHE_CONFIG["max_entries"],
+    max_bytes=RESPONSE_CACHE_CONFIG["max_bytes"]
+)
@@ -1,11 +1,18 @@
 """
 Scheduler for periodic tasks in the ESG & Finance AI Research Assistant.
+
+The scheduler loop only dispatches due jobs to a small worker pool, so a
+long processing run never delays collection. Every job type has a lock:
+scheduled and manual runs of the same job never overlap, and a run that
+finds its job busy is skipped or queued according to
+SCHEDULER_CONFIG['overlap_policy'].
 """
 
 import sys
 import time
 import threading
 import schedule
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import json
@@ -14,10 +21,9 @@ import os
 # Add the project root to Python path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from config.config import SCHEDULE, DATA_DIR
-from src.backend.data_collectors import collect_new_papers
-from src.backend.ai_processing import process_new_papers
+from config.config import SCHEDULE, SCHEDULER_CONFIG, DATA_DIR
 from src.backend.database import init_db
+from src.backend.metrics import SCHEDULER_JOB_SECONDS, SCHEDULER_JOB_RUNS, timed
 
 # File to store the scheduler's status
 SCHEDULER_STATUS_FILE = DATA_DIR / "scheduler_status.json"
@@ -34,9 +40,17 @@ class TaskScheduler:
             'last_collection': None,
             'last_processing': None,
             'collection_stats': {},
-            'processing_stats': {}
+            'processing_stats': {},
+            'jobs': {}
         }
         
+        # Per-job locks and the runs currently in progress
+        self._job_locks = {job: threading.Lock() for job in SCHEDULE}
+        self._running = {}
+        self._queued = set()
+        self._state_lock = threading.Lock()
+        self._executor = None
+        
         # Load status if it exists
         self._load_status()
         
@@ -51,11 +65,39 @@ class TaskScheduler:
             
         print("Starting scheduler")
         
+        self.stop_event.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=SCHEDULER_CONFIG["workers"], thread_name_prefix="scheduler-job"
+        )
+        
         # Schedule data collection
-        schedule.every(SCHEDULE['data_collection']).minutes.do(self._run_data_collection)
+        schedule.every(SCHEDULE['data_collection']).minutes.do(
+            self._dispatch, 'data_collection', self._run_data_collection
+        )
         
         # Schedule data processing
-        schedule.every(SCHEDULE['data_processing']).minutes.do(self._run_data_processing)
+        schedule.every(SCHEDULE['data_processing']).minutes.do(
+            self._dispatch, 'data_processing', self._run_data_processing
+        )
+        
+        # Schedule topic clustering
+        schedule.every(SCHEDULE['topic_clustering']).minutes.do(
+            self._dispatch, 'topic_clustering', self._run_topic_clustering
+        )
+        
+        # Schedule feed generation
+        schedule.every(SCHEDULE['feed_generation']).minutes.do(
+            self._dispatch, 'feed_generation', self._run_feed_generation
+        )
+        
+        # Schedule storage compaction
+        schedule.every(SCHEDULE['storage_compaction']).minutes.do(
+            self._dispatch, 'storage_compaction', self._run_storage_compaction
+        )
+        
+        # Process newly collected papers as soon as they are published
+        from src.backend.events import start_consumer
+        start_consumer()
         
         # Set status to running
         self.status['running'] = True
@@ -91,6 +133,14 @@ class TaskScheduler:
         # Clear threads list
         self.threads = []
         
+        from src.backend.events import stop_consumer
+        stop_consumer()
+        
+        # Jobs already running finish in the background
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        
         # Set status to not running
         self.status['running'] = False
         self._save_status()
@@ -100,18 +150,49 @@ class TaskScheduler:
     def get_status(self):
         """Get the current status of the scheduler.
         
+        Each job reports whether it is running, since when, whether it has
+        run longer than its stuck_after limit, whether a run is queued
+        behind it, and the outcome and duration of its last run. Running
+        jobs are recorded in the status file, so other processes (such as
+        `main.py status`) see them too, including a job whose process died.
+        
         Returns:
             dict: Status information
         """
-        return self.status
+        now = time.time()
+        with self._state_lock:
+            status = dict(self.status)
+            jobs = {}
+            for job in SCHEDULE:
+                info = dict(self.status['jobs'].get(job, {}))
+                running_since = info.pop('running_since', None)
+                started = self._running.get(job)
+                if started is None and running_since:
+                    started = datetime.fromisoformat(running_since).timestamp()
+                info['running'] = started is not None
+                info['queued'] = job in self._queued
+                if started is not None:
+                    running_seconds = now - started
+                    info['started'] = datetime.fromtimestamp(started).isoformat()
+                    info['running_seconds'] = round(running_seconds, 1)
+                    info['stuck'] = running_seconds > SCHEDULER_CONFIG["stuck_after"].get(job, float('inf'))
+                else:
+                    info['stuck'] = False
+                jobs[job] = info
+            status['jobs'] = jobs
+        
+        from src.backend.events import get_consumer_status
+        status['events'] = get_consumer_status()
+        return status
     
     def run_collection_now(self):
         """Run data collection immediately.
         
         Returns:
-            dict: Collection statistics
+            dict: Collection statistics, or {'skipped': True, ...} if a
+            collection is already running
         """
-        stats = self._run_data_collection()
+        stats = self._run_job('data_collection', self._run_data_collection)
         return stats
     
     def run_processing_now(self, limit=10):
@@ -121,9 +202,10 @@ class TaskScheduler:
             limit (int): Maximum number of papers to process
             
         Returns:
-            dict: Processing statistics
+            dict: Processing statistics, or {'skipped': True, ...} if a
+            processing run is already running (and another one is queued)
         """
-        stats = self._run_data_processing(limit=limit)
+        stats = self._run_job('data_processing', self._run_data_processing, limit=limit)
         return stats
     
     def _run_scheduler(self):
@@ -132,6 +214,79 @@ class TaskScheduler:
             schedule.run_pending()
             time.sleep(1)
     
+    def _dispatch(self, job, func):
+        """Hand a due job to the worker pool so the scheduler loop never blocks."""
+        if self._executor is not None:
+            self._executor.submit(self._run_job, job, func)
+    
+    def _run_job(self, job, func, **kwargs):
+        """Run a job under its lock.
+        
+        Args:
+            job (str): Job name (a key of SCHEDULE)
+            func (callable): Job function
+            **kwargs: Arguments for func
+            
+        Returns:
+            dict: Job statistics, or {'skipped': True, ...} if the run was skipped
+        """
+        lock = self._job_locks[job]
+        if not lock.acquire(blocking=False):
+            with self._state_lock:
+                queue = SCHEDULER_CONFIG["overlap_policy"].get(job, 'skip') == 'queue' and job not in self._queued
+                if queue:
+                    self._queued.add(job)
+            if not queue:
+                return self._skip(job)
+            
+            print(f"{job} is already running, queued this run")
+            lock.acquire()
+            with self._state_lock:
+                self._queued.discard(job)
+        
+        started = time.time()
+        with self._state_lock:
+            self._running[job] = started
+            info = self.status['jobs'].setdefault(job, {'runs': 0, 'skipped': 0})
+            info['running_since'] = datetime.fromtimestamp(started).isoformat()
+        self._save_status()
+        try:
+            stats = func(**kwargs)
+        finally:
+            finished = time.time()
+            with self._state_lock:
+                del self._running[job]
+                info = self.status['jobs'].setdefault(job, {'runs': 0, 'skipped': 0})
+                info.pop('running_since', None)
+                info['runs'] = info.get('runs', 0) + 1
+                info['last_started'] = datetime.fromtimestamp(started).isoformat()
+                info['last_finished'] = datetime.fromtimestamp(finished).isoformat()
+                info['last_duration_seconds'] = round(finished - started, 3)
+            lock.release()
+        
+        result = 'error' if isinstance(stats, dict) and 'error' in stats else 'ok'
+        with self._state_lock:
+            self.status['jobs'][job]['last_result'] = result
+        SCHEDULER_JOB_RUNS.inc(job=job, result=result)
+        self._save_status()
+        return stats
+    
+    def _skip(self, job):
+        """Record a run skipped because its job was already running."""
+        with self._state_lock:
+            started = self._running.get(job)
+            info = self.status['jobs'].setdefault(job, {'runs': 0, 'skipped': 0})
+            info['skipped'] = info.get('skipped', 0) + 1
+        SCHEDULER_JOB_RUNS.inc(job=job, result='skipped')
+        print(f"Skipping {job}: already running")
+        return {
+            'skipped': True,
+            'job': job,
+            'reason': 'already running',
+            'running_since': datetime.fromtimestamp(started).isoformat() if started else None
+        }
+    
+    @timed(SCHEDULER_JOB_SECONDS, job="data_collection")
     def _run_data_collection(self):
         """Run data collection task.
         
@@ -141,6 +296,9 @@ class TaskScheduler:
         print(f"Running data collection at {datetime.now().isoformat()}")
         
         try:
+            # Imported here so status checks don't pay for the collector imports
+            from src.backend.data_collectors import collect_new_papers
+            
             # Collect new papers
             stats = collect_new_papers()
             
@@ -155,6 +313,7 @@ class TaskScheduler:
             print(f"Error in data collection: {e}")
             return {'error': str(e)}
     
+    @timed(SCHEDULER_JOB_SECONDS, job="data_processing")
     def _run_data_processing(self, limit=10):
         """Run data processing task.
         
@@ -167,6 +326,9 @@ class TaskScheduler:
         print(f"Running data processing at {datetime.now().isoformat()}")
         
         try:
+            # Imported here so status checks don't pay for the OpenAI imports
+            from src.backend.ai_processing import process_new_papers
+            
             # Process new papers
             stats = process_new_papers(limit=limit)
             
@@ -181,11 +343,80 @@ class TaskScheduler:
             print(f"Error in data processing: {e}")
             return {'error': str(e)}
     
+    @timed(SCHEDULER_JOB_SECONDS, job="topic_clustering")
+    def _run_topic_clustering(self):
+        """Run topic clustering task.
+        
+        Returns:
+            dict: Clustering statistics
+        """
+        print(f"Running topic clustering at {datetime.now().isoformat()}")
+        
+        try:
+            # Imported here so status checks don't pay for the numpy import
+            from src.backend.topics import update_topics
+            
+            stats = update_topics()
+            if stats is None:
+                return {'error': 'embedding store unavailable'}
+            
+            print(f"Topic clustering completed: {stats}")
+            return stats
+        except Exception as e:
+            print(f"Error in topic clustering: {e}")
+            return {'error': str(e)}
+    
+    @timed(SCHEDULER_JOB_SECONDS, job="feed_generation")
+    def _run_feed_generation(self):
+        """Run feed generation task.
+        
+        Returns:
+            dict: Feed statistics
+        """
+        print(f"Running feed generation at {datetime.now().isoformat()}")
+        
+        try:
+            # Imported here so status checks don't pay for the numpy import
+            from src.backend.feed import generate_feed
+            
+            stats = generate_feed()
+            if stats is None:
+                return {'error': 'embedding store unavailable or feed not saved'}
+            
+            print(f"Feed generation completed: {stats}")
+            return stats
+        except Exception as e:
+            print(f"Error in feed generation: {e}")
+            return {'error': str(e)}
+    
+    @timed(SCHEDULER_JOB_SECONDS, job="storage_compaction")
+    def _run_storage_compaction(self):
+        """Run storage compaction task.
+        
+        Returns:
+            dict: Compaction statistics
+        """
+        print(f"Running storage compaction at {datetime.now().isoformat()}")
+        
+        try:
+            from src.backend.maintenance import compact_storage
+            
+            stats = compact_storage()
+            if stats is None:
+                return {'error': 'database could not be compacted'}
+            
+            print(f"Storage compaction completed: {stats}")
+            return stats
+        except Exception as e:
+            print(f"Error in storage compaction: {e}")
+            return {'error': str(e)}
+    
     def _save_status(self):
         """Save status to file."""
         try:
-            with open(SCHEDULER_STATUS_FILE, 'w') as f:
-                json.dump(self.status, f)
+            with self._state_lock:
+                with open(SCHEDULER_STATUS_FILE, 'w') as f:
+                    json.dump(self.status, f)
         except Exception as e:
             print(f"Error saving scheduler status: {e}")
     
@@ -0,0 +1,188 @@
+"""
+JSON serialization, field projection and response compression for the API.
+
+orjson and brotli are optional: without orjson responses are encoded with
+the standard json module, and without brotli only gzip is offered.
+"""
+
+import gzip
+import json
+import zlib
+from pathlib import Path
+import sys
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import COMPRESSION_CONFIG
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content types worth compressing
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'application/x-ndjson'}
+
+
+def dumps(obj):
+    """Serialize an object to JSON.
+
+    Args:
+        obj: JSON-serializable object (dates are written as ISO 8601 strings)
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Parse JSON.
+
+    Args:
+        data (bytes or str): JSON document
+
+    Returns:
+        The parsed object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_fields(value):
+    """Parse a fields= projection parameter.
+
+    Args:
+        value (str or list): Comma-separated field names or a list of them
+
+    Returns:
+        list: Field names, or None if no projection was requested
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = [str(field).strip() for field in value if str(field).strip()]
+    return fields or None
+
+
+def project_fields(records, fields, always=('id',)):
+    """Keep only the requested top-level fields of each record.
+
+    Args:
+        records (list): Dictionaries to project
+        fields (list): Field names to keep, or None to keep everything
+        always (tuple): Fields that are kept even if not requested
+
+    Returns:
+        list: Projected dictionaries
+    """
+    if not fields:
+        return records
+    keep = set(fields) | set(always)
+    return [{key: value for key, value in record.items() if key in keep} for record in records]
+
+
+def _accepted_encodings(accept_encoding):
+    """Parse an Accept-Encoding header into {encoding: quality}."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def accepts_encoding(accept_encoding, encoding):
+    """Check whether a client accepts a content encoding.
+
+    Args:
+        accept_encoding (str): Accept-Encoding request header
+        encoding (str): Content encoding, e.g. 'gzip'
+
+    Returns:
+        bool: True if the encoding is accepted
+    """
+    return _accepted_encodings(accept_encoding).get(encoding, 0) > 0
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick the content encoding to use for a client.
+
+    Args:
+        accept_encoding (str): Accept-Encoding request header
+
+    Returns:
+        str: 'br', 'gzip' or None
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def should_compress(body_size, mimetype, status):
+    """Decide whether a response body is worth compressing.
+
+    Args:
+        body_size (int): Uncompressed body size in bytes
+        mimetype (str): Response mimetype without parameters
+        status (int): Response status code
+
+    Returns:
+        bool: True if the body should be compressed
+    """
+    return (
+        status == 200
+        and mimetype in COMPRESSIBLE_MIMETYPES
+        and body_size >= COMPRESSION_CONFIG["min_size"]
+    )
+
+
+def compress(body, encoding):
+    """Compress a response body.
+
+    Args:
+        body (bytes): Uncompressed body
+        encoding (str): 'br' or 'gzip'
+
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESSION_CONFIG["brotli_quality"])
+    return gzip.compress(body, compresslevel=COMPRESSION_CONFIG["gzip_level"])
+
+
+def gzip_stream(chunks):
+    """Gzip-compress a streamed response body.
+
+    Args:
+        chunks (iterable): Uncompressed body chunks (bytes)
+
+    Yields:
+        bytes: Compressed chunks
+    """
+    compressor = zlib.compressobj(COMPRESSION_CONFIG["gzip_level"], zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,325 @@
+"""
+Topic clustering of the paper embeddings.
+
+Papers are grouped into TOPICS_CONFIG['num_topics'] topics with mini-batch
+spherical k-means over the memory-mapped embedding store: every batch of
+papers is assigned to its most similar centroid, and each centroid moves to
+the running mean of all papers averaged into it so far (then re-normalized).
+Centroids and their running counts are stored in the topics table, so a
+run only has to feed in the papers embedded since the previous one before
+re-assigning every paper to its nearest centroid.
+
+Topics are labelled with the summary keywords that are frequent among their
+papers but rare in other topics.
+
+Search can scan only the papers of the SEARCH_CONFIG['topic_probes'] topics
+nearest to the query instead of the whole corpus (see probe_topics), plus
+the papers embedded since the last clustering run, which have no topic yet.
+
+Usage:
+    python src/main.py topics
+    python src/main.py topics --rebuild
+"""
+
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import TOPICS_CONFIG
+from src.backend import database
+from src.backend.embedding_store import get_embedding_store, rows_embedded_since
+
+# Name of the job in the job_state table
+JOB = "topics"
+
+# Papers assigned per matrix product
+ASSIGN_CHUNK_ROWS = 8192
+
+# Papers sampled for k-means++ seeding, per topic
+SEED_SAMPLE_PER_TOPIC = 50
+
+# A paper's stored similarity is only rewritten once it moved by more than this
+SIMILARITY_TOLERANCE = 0.01
+
+# Topic paper id sets of recent searches, per database generation
+PROBE_CACHE_SIZE = 64
+
+
+def _normalize(matrix):
+    """L2-normalize the rows of a matrix, leaving zero rows as zeros."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _seed_centroids(vectors, k, rng):
+    """Pick k initial centroids with greedy k-means++ seeding on cosine distance.
+
+    Each step draws a few candidates with probability proportional to their
+    distance from the centroids so far and keeps the one that reduces the
+    total distance most.
+
+    Args:
+        vectors (numpy.ndarray): Normalized sample of papers
+        k (int): Number of centroids
+        rng (numpy.random.Generator): Random generator
+
+    Returns:
+        numpy.ndarray: k x dim centroids
+    """
+    candidates = 2 + int(math.log(k))
+    centroids = np.empty((k, vectors.shape[1]), dtype=np.float32)
+    centroids[0] = vectors[rng.integers(len(vectors))]
+    distance = np.clip(1.0 - vectors @ centroids[0], 0.0, None)
+    for i in range(1, k):
+        total = distance.sum()
+        if total > 0:
+            choices = rng.choice(len(vectors), size=candidates, p=distance / total)
+        else:
+            choices = rng.integers(len(vectors), size=candidates)
+        distances = np.minimum(distance, np.clip(1.0 - vectors[choices] @ vectors.T, 0.0, None))
+        best = np.argmin(distances.sum(axis=1))
+        centroids[i] = vectors[choices[best]]
+        distance = distances[best]
+    return centroids
+
+
+def _update_centroids(centroids, weights, batch):
+    """Apply one mini-batch k-means step in place.
+
+    Each centroid becomes the mean of the weights[j] papers it already
+    represents and the batch papers nearest to it, which is the per-paper
+    learning rate 1 / count of mini-batch k-means applied to the batch.
+
+    Args:
+        centroids (numpy.ndarray): k x dim normalized centroids
+        weights (numpy.ndarray): Papers averaged into each centroid so far
+        batch (numpy.ndarray): Normalized papers
+    """
+    nearest = np.argmax(batch @ centroids.T, axis=1)
+    counts = np.bincount(nearest, minlength=len(centroids))
+    sums = np.zeros_like(centroids)
+    np.add.at(sums, nearest, batch)
+
+    moved = counts > 0
+    total = (weights[moved] + counts[moved])[:, None]
+    centroids[moved] = _normalize((centroids[moved] * weights[moved][:, None] + sums[moved]) / total)
+    weights += counts
+
+
+def _train(snapshot, rows, centroids, weights, rng):
+    """Feed papers to the centroids in shuffled mini-batches."""
+    batch_size = TOPICS_CONFIG["batch_size"]
+    order = rng.permutation(rows)
+    for start in range(0, len(order), batch_size):
+        batch_rows = np.sort(order[start:start + batch_size])
+        _update_centroids(centroids, weights, np.asarray(snapshot['vectors'][batch_rows]))
+
+
+def _assign(snapshot, rows, centroids):
+    """Nearest centroid of every paper.
+
+    Returns:
+        tuple: (centroid index per row, similarity to it)
+    """
+    nearest = np.empty(len(rows), dtype=np.int64)
+    similarity = np.empty(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), ASSIGN_CHUNK_ROWS):
+        scores = np.asarray(snapshot['vectors'][rows[start:start + ASSIGN_CHUNK_ROWS]]) @ centroids.T
+        nearest[start:start + len(scores)] = np.argmax(scores, axis=1)
+        similarity[start:start + len(scores)] = scores[np.arange(len(scores)), nearest[start:start + len(scores)]]
+    return nearest, similarity
+
+
+def label_topics(assignments, count=None):
+    """Pick the characteristic summary keywords of each topic.
+
+    Keywords are scored by their frequency in the topic times the log of
+    the inverse share of topics they occur in (c-TF-IDF).
+
+    Args:
+        assignments (dict): Paper id -> topic id
+        count (int): Keywords per topic, TOPICS_CONFIG['label_keywords'] if None
+
+    Returns:
+        dict: Topic id -> keywords, most characteristic first
+    """
+    count = count or TOPICS_CONFIG["label_keywords"]
+    counts = {}
+    spelling = {}
+    for paper_id, keywords in database.iter_paper_keywords():
+        topic_id = assignments.get(paper_id)
+        if topic_id is None or not isinstance(keywords, list):
+            continue
+        topic_counts = counts.setdefault(topic_id, Counter())
+        # Counted once per paper, case-insensitively; shown as first spelled
+        for keyword in keywords:
+            spelling.setdefault(str(keyword).strip().lower(), str(keyword).strip())
+        for keyword in {str(keyword).strip().lower() for keyword in keywords} - {''}:
+            topic_counts[keyword] += 1
+
+    topic_frequency = Counter()
+    for topic_counts in counts.values():
+        topic_frequency.update(topic_counts.keys())
+
+    labels = {}
+    for topic_id, topic_counts in counts.items():
+        scored = sorted(topic_counts.items(),
+                        key=lambda item: (-item[1] * math.log(1 + len(counts) / topic_frequency[item[0]]), item[0]))
+        labels[topic_id] = [spelling[keyword] for keyword, _ in scored[:count]]
+    return labels
+
+
+def update_topics(rebuild=False):
+    """Cluster the papers embedded since the last run and re-assign all papers.
+
+    Args:
+        rebuild (bool): Cluster from freshly seeded centroids over all papers
+
+    Returns:
+        dict: Clustering statistics, or None if the embedding store is unavailable
+    """
+    store = get_embedding_store()
+    snapshot = store.snapshot() if store is not None else None
+    if snapshot is None:
+        return None
+
+    start = time.perf_counter()
+    live_rows = np.flatnonzero(snapshot['live'])
+    watermark = snapshot['meta']['last_embedding_id']
+    dim = snapshot['meta']['dim']
+    k = min(TOPICS_CONFIG["num_topics"], len(live_rows))
+    rng = np.random.default_rng(TOPICS_CONFIG["seed"])
+
+    state = database.get_job_state(JOB)
+    stored = database.get_topics(include_centroids=True)
+    # A corpus smaller than num_topics got fewer topics; rebuild once it has grown
+    rebuild = (rebuild or not state or not stored or state.get('num_topics') != TOPICS_CONFIG["num_topics"]
+               or state.get('dim') != dim or state.get('k', len(stored)) < k)
+    stats = {'mode': 'rebuild' if rebuild else 'incremental', 'topics': k, 'papers': len(live_rows),
+             'trained': 0, 'reassigned': 0, 'watermark': watermark}
+
+    if rebuild:
+        sample_size = min(len(live_rows), k * SEED_SAMPLE_PER_TOPIC)
+        sample = np.sort(rng.choice(live_rows, size=sample_size, replace=False))
+        centroids = _seed_centroids(np.asarray(snapshot['vectors'][sample]), k, rng)
+        weights = np.zeros(k, dtype=np.int64)
+        for _ in range(TOPICS_CONFIG["rebuild_passes"]):
+            _train(snapshot, live_rows, centroids, weights, rng)
+        stats['trained'] = len(live_rows)
+        topic_ids = list(range(1, k + 1))
+    else:
+        centroids = np.stack([np.frombuffer(topic['centroid'], dtype=np.float32) for topic in stored])
+        weights = np.array([topic['weight'] for topic in stored], dtype=np.int64)
+        topic_ids = [topic['id'] for topic in stored]
+        _, new_rows = rows_embedded_since(snapshot, state['last_embedding_id'])
+        _train(snapshot, new_rows, centroids, weights, rng)
+        stats['topics'] = len(topic_ids)
+        stats['trained'] = len(new_rows)
+
+    # Re-assign every paper, but only write the ones that moved
+    nearest, similarity = _assign(snapshot, live_rows, centroids)
+    current = {} if rebuild else database.get_paper_topic_assignments()
+    assignments = {}
+    paper_topics = {}
+    for row, index, score in zip(live_rows, nearest, similarity):
+        paper_id = snapshot['ids'][row]
+        topic_id = topic_ids[index]
+        paper_topics[paper_id] = topic_id
+        previous = current.get(paper_id)
+        if previous is None or previous[0] != topic_id or abs(previous[1] - score) > SIMILARITY_TOLERANCE:
+            assignments[paper_id] = (topic_id, float(score))
+    stats['reassigned'] = len(assignments)
+
+    labels = label_topics(paper_topics)
+    topics = [{
+        'id': topic_id,
+        'centroid': centroids[index].astype(np.float32).tobytes(),
+        'weight': int(weights[index]),
+        'keywords': labels.get(topic_id, []),
+        'label': ", ".join(labels.get(topic_id, [])[:3]) or None
+    } for index, topic_id in enumerate(topic_ids)]
+
+    job_state = {'num_topics': TOPICS_CONFIG["num_topics"], 'k': len(topic_ids), 'dim': dim,
+                 'last_embedding_id': watermark}
+    if not database.save_topics(topics, assignments, job=JOB, job_state=job_state, clear=rebuild):
+        return None
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+# Centroids of the current database generation, and the paper ids of recently probed topics
+_centroid_cache = {}
+_probe_cache = OrderedDict()
+_probe_lock = threading.Lock()
+
+
+def _load_centroids(generation):
+    """Topic ids and centroids of the non-empty topics, and the ids of the papers
+    embedded since they were computed, cached per generation."""
+    key = (str(database.DB_PATH), generation)
+    with _probe_lock:
+        if key in _centroid_cache:
+            return _centroid_cache[key]
+
+    topics = [topic for topic in database.get_topics(include_centroids=True) if topic['size'] > 0]
+    state = database.get_job_state(JOB)
+    loaded = None
+    if topics and state:
+        loaded = ([topic['id'] for topic in topics],
+                  np.stack([np.frombuffer(topic['centroid'], dtype=np.float32) for topic in topics]),
+                  database.get_paper_ids_embedded_since(state['last_embedding_id']))
+    if generation is not None:
+        with _probe_lock:
+            _centroid_cache.clear()
+            _centroid_cache[key] = loaded
+    return loaded
+
+
+def probe_topics(embedding_vector, probes):
+    """Paper ids of the topics nearest to a query vector.
+
+    Papers embedded since the last clustering run are always included, so
+    they can be found before they are assigned to a topic.
+
+    Args:
+        embedding_vector (list): Query embedding
+        probes (int): Number of topics
+
+    Returns:
+        tuple: (frozenset of paper ids, cache key of the set), or (None, None)
+        if there are no topics of the query's dimension
+    """
+    generation = database.get_generation()
+    loaded = _load_centroids(generation)
+    if loaded is None or loaded[1].shape[1] != len(embedding_vector):
+        return None, None
+
+    topic_ids, centroids, unclustered = loaded
+    scores = centroids @ np.asarray(embedding_vector, dtype=np.float32)
+    nearest = tuple(sorted(topic_ids[i] for i in np.argsort(-scores)[:probes]))
+
+    key = None
+    if generation is not None:
+        key = ('topics', str(database.DB_PATH), generation, nearest)
+        with _probe_lock:
+            paper_ids = _probe_cache.get(key)
+            if paper_ids is not None:
+                _probe_cache.move_to_end(key)
+                return paper_ids, key
+
+    paper_ids = database.get_topic_paper_ids(nearest) | unclustered
+    if key is not None:
+        with _probe_lock:
+            _probe_cache[key] = paper_ids
+            while len(_probe_cache) > PROBE_CACHE_SIZE:
+                _probe_cache.popitem(last=False)
+    return paper_ids, key
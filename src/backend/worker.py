@@ -0,0 +1,113 @@
+"""
+Processing worker for the ESG & Finance AI Research Assistant.
+
+Any number of workers, in one or more processes or machines, can process
+papers from the same database. Each worker claims batches of papers per
+stage through the work_leases table (see database.claim_work), keeps its
+leases alive with a heartbeat thread while it works, and releases each
+paper when it is done. If a worker crashes its leases expire and other
+workers claim the papers again.
+
+Usage:
+    python src/main.py worker
+    python src/main.py worker --batch-size 20 --once
+"""
+
+import os
+import socket
+import threading
+import uuid
+from pathlib import Path
+import sys
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from config.config import WORKER_CONFIG
+from src.backend.database import heartbeat_leases, release_worker_leases
+
+
+def make_worker_id():
+    """Build an id that is unique across processes and machines.
+
+    Returns:
+        str: host:pid:random
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseHeartbeat:
+    """Context manager renewing a worker's leases in a background thread."""
+
+    def __init__(self, worker_id, lease_seconds=None, interval=None):
+        """Initialize the heartbeat.
+
+        Args:
+            worker_id (str): Worker holding the leases
+            lease_seconds (float): Lease duration set on every renewal
+            interval (float): Seconds between renewals
+        """
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds or WORKER_CONFIG["lease_seconds"]
+        self.interval = interval or min(WORKER_CONFIG["heartbeat_interval"], self.lease_seconds / 3)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        """Renew the leases until stopped."""
+        while not self._stop.wait(self.interval):
+            heartbeat_leases(self.worker_id, self.lease_seconds)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_worker(batch_size=None, poll_interval=None, once=False, stop_event=None):
+    """Claim and process papers until stopped.
+
+    Args:
+        batch_size (int): Papers claimed per stage and batch
+        poll_interval (float): Seconds to wait when there is no work
+        once (bool): Process a single batch and return
+        stop_event (threading.Event): Set to stop after the current batch
+
+    Returns:
+        dict: Totals over all batches
+    """
+    from src.backend.ai_processing import process_new_papers
+
+    batch_size = batch_size or WORKER_CONFIG["batch_size"]
+    poll_interval = poll_interval if poll_interval is not None else WORKER_CONFIG["poll_interval"]
+    stop_event = stop_event or threading.Event()
+    worker_id = make_worker_id()
+    totals = {'worker_id': worker_id, 'batches': 0, 'summarized': 0, 'embedded': 0, 'errors': 0}
+
+    print(f"Worker {worker_id} started (batch size {batch_size})")
+    try:
+        while not stop_event.is_set():
+            stats = process_new_papers(limit=batch_size, worker_id=worker_id)
+            totals['batches'] += 1
+            for key in ('summarized', 'embedded', 'errors'):
+                totals[key] += stats.get(key, 0)
+
+            if once:
+                break
+            if not stats.get('claimed'):
+                stop_event.wait(poll_interval)
+    except KeyboardInterrupt:
+        print("Stopping worker...")
+    finally:
+        # Hand back anything still claimed so other workers don't wait for expiry
+        released = release_worker_leases(worker_id)
+        if released:
+            print(f"Released {released} unfinished leases")
+
+    print(f"Worker {worker_id} stopped: {totals}")
+    return totals
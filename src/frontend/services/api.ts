@@ -3,7 +3,7 @@
  */
 
 import { 
-  Paper, PaperFilterParams, ResearchBrief, 
+  Paper, FeedPaper, PaginationParams, PaperFilterParams, ResearchBrief, 
   SystemStatus, CollectionStats, ProcessingStats,
   SearchQuery
 } from '../types/types';
@@ -85,6 +85,23 @@ export const getPaperById = async (paperId: string): Promise<Paper> => {
   return await response.json();
 };
 
+/**
+ * Get new papers matching the interests of past searches
+ * @param params Pagination parameters
+ * @returns Promise with array of feed papers, best match first
+ */
+export const getFeed = async (params: PaginationParams): Promise<FeedPaper[]> => {
+  const queryParams = new URLSearchParams();
+  if (params.limit) queryParams.append('limit', params.limit.toString());
+  if (params.offset) queryParams.append('offset', params.offset.toString());
+  
+  const response = await fetch(`${API_BASE_URL}/feed?${queryParams}`);
+  if (!response.ok) {
+    throw new Error(`Failed to get feed: ${response.statusText}`);
+  }
+  return await response.json();
+};
+
 /**
  * Collect papers from sources
  * @returns Promise with collection statistics
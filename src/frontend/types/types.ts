@@ -31,6 +31,20 @@ export interface PaperSummary {
   created_date: string;
 }
 
+// Paper of the personalized feed
+export interface FeedPaper {
+  id: string;
+  title: string;
+  authors: string[];
+  url: string;
+  published_date: string;
+  summary: string | null;
+  esg_relevance_score: number | null;
+  finance_relevance_score: number | null;
+  score: number;
+  matched_query: string;
+}
+
 // Research Brief interface
 export interface ResearchBrief {
   query: string;
@@ -13,22 +13,27 @@ from datetime import datetime
 import json
 import os
 
-from config.config import DATA_DIR, OPENAI_API_KEY
-from src.backend.scheduler import get_scheduler
-from src.backend.data_collectors import collect_new_papers
-from src.backend.ai_processing import process_new_papers, PaperProcessingAgent
+from config.config import DATA_DIR, OPENAI_API_KEY, ensure_data_dirs
 from src.backend.database import get_papers, get_paper_with_summary, log_user_query
 
-def init_app():
-    """Initialize the application."""
+# Heavy modules (scheduler, collectors, OpenAI processing, profiling) are
+# imported inside the commands that use them, so that commands like
+# `list` and `status` start quickly.
+
+# Commands that call the OpenAI API
+OPENAI_COMMANDS = {'start', 'process', 'brief', 'worker', 'feed'}
+
+def init_app(require_api_key=True):
+    """Initialize the application.
+    
+    Args:
+        require_api_key (bool): Whether the command needs the OpenAI API key
+    """
     # Ensure data directories exist
-    DATA_DIR.mkdir(exist_ok=True)
-    (DATA_DIR / "papers").mkdir(exist_ok=True)
-    (DATA_DIR / "embeddings").mkdir(exist_ok=True)
-    (DATA_DIR / "db").mkdir(exist_ok=True)
+    ensure_data_dirs()
     
     # Check if OpenAI API key is set
-    if not OPENAI_API_KEY:
+    if require_api_key and not OPENAI_API_KEY:
         print("Warning: OPENAI_API_KEY environment variable is not set.")
         print("Set it with: export OPENAI_API_KEY=your-api-key")
         return False
@@ -37,6 +42,8 @@ def init_app():
 
 def start_scheduler():
     """Start the scheduler."""
+    from src.backend.scheduler import get_scheduler
+    
     scheduler = get_scheduler()
     success = scheduler.start()
     
@@ -50,6 +57,8 @@ def start_scheduler():
 
 def stop_scheduler():
     """Stop the scheduler."""
+    from src.backend.scheduler import get_scheduler
+    
     scheduler = get_scheduler()
     success = scheduler.stop()
     
@@ -62,6 +71,8 @@ def stop_scheduler():
 
 def scheduler_status():
     """Get the scheduler status."""
+    from src.backend.scheduler import get_scheduler
+    
     scheduler = get_scheduler()
     status = scheduler.get_status()
     
@@ -77,10 +88,20 @@ def scheduler_status():
             print(f"  Summarized: {status['processing_stats'].get('summarized', 0)} papers")
             print(f"  Embedded: {status['processing_stats'].get('embedded', 0)} papers")
     
+    for job, info in status.get('jobs', {}).items():
+        if info.get('running'):
+            state = "STUCK" if info.get('stuck') else "running"
+            print(f"{job}: {state} for {info['running_seconds']:.0f}s (since {info['started']})")
+        elif info.get('last_duration_seconds') is not None:
+            print(f"{job}: last run {info.get('last_result', 'ok')} in {info['last_duration_seconds']:.1f}s, "
+                  f"{info.get('runs', 0)} runs, {info.get('skipped', 0)} skipped")
+    
     return status
 
 def collect_papers():
     """Collect papers immediately."""
+    from src.backend.data_collectors import collect_new_papers
+    
     print("Starting paper collection...")
     stats = collect_new_papers()
     
@@ -93,6 +114,8 @@ def collect_papers():
 
 def process_papers(limit=10):
     """Process papers immediately."""
+    from src.backend.ai_processing import process_new_papers
+    
     print(f"Starting paper processing (limit: {limit})...")
     stats = process_new_papers(limit=limit)
     
@@ -103,6 +126,12 @@ def process_papers(limit=10):
     
     return stats
 
+def run_worker(batch_size=None, poll_interval=None, once=False):
+    """Claim and process papers until interrupted."""
+    from src.backend.worker import run_worker as run_processing_worker
+    
+    return run_processing_worker(batch_size=batch_size, poll_interval=poll_interval, once=once)
+
 def list_papers(limit=10, category=None, query=None):
     """List papers from the database."""
     papers = get_papers(limit=limit, category=category, query=query)
@@ -117,8 +146,13 @@ def list_papers(limit=10, category=None, query=None):
     
     return papers
 
-def generate_research_brief(query):
-    """Generate a research brief for a query."""
+def generate_research_brief(query, mode=None):
+    """Generate a research brief for a query.
+    
+    Args:
+        query (str): Research query
+        mode (str): Search mode used to find papers ('vector', 'keyword' or 'hybrid')
+    """
     if not query:
         print("Error: Query is required")
         return None
@@ -128,9 +162,10 @@ def generate_research_brief(query):
     # Log the user query
     log_user_query(query)
     
-    # Create an agent and generate a brief
-    agent = PaperProcessingAgent()
-    brief = agent.generate_research_brief(query)
+    # Generate a brief with the shared agent
+    from src.backend.ai_processing import get_agent
+    agent = get_agent()
+    brief = agent.generate_research_brief(query, mode=mode)
     
     if 'brief' in brief:
         print("\n--- Research Brief ---\n")
@@ -157,6 +192,215 @@ def generate_research_brief(query):
     
     return brief
 
+def summarize_profiles(limit=10, route=None, top=20):
+    """Summarize the slowest captured API request profiles."""
+    from src.backend.profiling import list_profiles, print_profile_stats
+    
+    profiles = list_profiles(route=route)
+    
+    if not profiles:
+        print("No request profiles found. Enable profiling with API_PROFILE=1 or API_PROFILE_TOKEN.")
+        return profiles
+    
+    print(f"Slowest {min(limit, len(profiles))} of {len(profiles)} profiled requests:")
+    for i, profile in enumerate(profiles[:limit]):
+        print(f"{i+1}. {profile['duration_ms']:.1f} ms  {profile['method']} {profile['path']}  "
+              f"(status {profile['status']}, {profile['timestamp']})")
+        print(f"   Peak traced memory: {profile['peak_traced_memory_kb']:.1f} KB")
+        for diff in profile['memory_diff'][:3]:
+            print(f"   {diff['size_diff_kb']:+.1f} KB  {diff['location']}")
+        print(f"   Profile: {profile['profile_path']}")
+        print()
+    
+    print(f"--- Top {top} functions of the slowest request ---")
+    print_profile_stats(profiles[0]['profile_path'], top=top)
+    
+    return profiles
+
+def export_corpus_file(path, fmt=None, include_embeddings=True, batch_size=1000):
+    """Export the corpus to an NDJSON, Parquet or Arrow file."""
+    from src.backend.corpus_io import export_corpus
+    
+    print(f"Exporting corpus to {path}...")
+    try:
+        stats = export_corpus(path, fmt=fmt, batch_size=batch_size, include_embeddings=include_embeddings)
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return None
+    
+    print(f"Export completed ({stats['format']}, {stats['bytes'] / 1024 / 1024:.1f} MB):")
+    print(f"  Papers: {stats['papers']}")
+    print(f"  Summaries: {stats['summaries']}")
+    print(f"  Embeddings: {stats['embeddings']}")
+    if stats['skipped_embeddings']:
+        print(f"  Skipped embeddings with a different dimension: {stats['skipped_embeddings']}")
+    
+    return stats
+
+def import_corpus_file(path, fmt=None, batch_size=1000):
+    """Import a corpus file exported by export_corpus_file."""
+    from src.backend.corpus_io import import_corpus
+    from src.backend.database import init_db
+    
+    init_db()
+    
+    print(f"Importing corpus from {path}...")
+    try:
+        stats = import_corpus(path, fmt=fmt, batch_size=batch_size)
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return None
+    
+    print("Import completed:")
+    print(f"  Papers: {stats['papers']}")
+    print(f"  Summaries: {stats['summaries']}")
+    print(f"  Embeddings: {stats['embeddings']}")
+    print(f"  Errors: {stats['errors']}")
+    
+    if stats['embeddings']:
+        sync_embeddings()
+    
+    return stats
+
+def sync_embeddings(rebuild=False):
+    """Append new embeddings to the memory-mapped embedding store, or rebuild it."""
+    from src.backend.embedding_store import sync_embedding_store, store_dir
+    
+    print(f"{'Rebuilding' if rebuild else 'Syncing'} embedding store in {store_dir()}...")
+    stats = sync_embedding_store(rebuild=rebuild)
+    
+    if stats is None:
+        print("Embedding store is disabled or the sync failed")
+        return None
+    
+    action = "Rebuilt" if stats['rebuilt'] else "Appended"
+    print(f"{action} {stats['appended']} embeddings ({stats['rows']} rows, {stats['dim']} dimensions)")
+    
+    update_related(rebuild=rebuild)
+    return stats
+
+def cluster_topics(rebuild=False):
+    """Update the topic clusters and list the largest topics."""
+    from src.backend.topics import update_topics
+    from src.backend.database import get_topics
+    
+    stats = update_topics(rebuild=rebuild)
+    
+    if stats is None:
+        print("Topics could not be updated (embedding store disabled or empty)")
+        return None
+    
+    print(f"Topics ({stats['mode']}): {stats['topics']} topics, {stats['trained']} papers clustered, "
+          f"{stats['reassigned']} assignments written in {stats['seconds']}s")
+    for topic in get_topics()[:10]:
+        print(f"  [{topic['id']}] {topic['label'] or '(no keywords)'} - {topic['size']} papers")
+    return stats
+
+def build_feed():
+    """Rebuild the personalized paper feed and show its top papers."""
+    from src.backend.feed import generate_feed
+    from src.backend.database import get_paper_feed
+    
+    stats = generate_feed()
+    
+    if stats is None:
+        print("Feed could not be generated (embedding store disabled or empty)")
+        return None
+    
+    print(f"Feed: {stats['papers']} papers from {stats['candidates']} candidates, "
+          f"{stats['profiles']} interest profiles from {stats['queries']} queries in {stats['seconds']}s")
+    for paper in get_paper_feed(limit=10):
+        print(f"  {paper['score']:.3f} {paper['title']} (matches \"{paper['matched_query']}\")")
+    return stats
+
+def show_analytics(rebuild=False):
+    """Print the score and processing rollups."""
+    from src.backend.database import get_analytics, rebuild_analytics
+    
+    if rebuild:
+        print("Rebuilt analytics rollups" if rebuild_analytics() else "Analytics rollups could not be rebuilt")
+    
+    analytics = get_analytics()
+    if analytics is None:
+        return None
+    
+    def describe(row):
+        return (f"{row['papers']} papers, {row['summarized']} summarized, {row['unprocessed']} unprocessed, "
+                f"ESG {row['esg_avg']}, finance {row['finance_avg']}")
+    
+    print(f"All papers: {describe(analytics['totals'])}")
+    for title, rows in (('Categories', analytics['by_category'][:10]), ('Sources', analytics['by_source']),
+                        ('Months', analytics['by_month'][:12])):
+        print(f"{title}:")
+        for row in rows:
+            print(f"  {row.get('value') or row.get('month')}: {describe(row)}")
+    return analytics
+
+def compact_storage(full=False, keep=None):
+    """Delete orphaned embeddings and superseded summaries and shrink the database."""
+    from src.backend.database import init_db
+    from src.backend.maintenance import compact_storage as compact
+    
+    # Orphan lookups use the embedding reference index of the latest schema
+    init_db()
+    stats = compact(full=full, keep=keep)
+    
+    if stats is None:
+        print("Database could not be compacted")
+        return None
+    
+    print(f"Deleted {stats['embeddings_deleted']} orphaned embeddings and {stats['summaries_deleted']} "
+          f"superseded summaries in {stats['seconds']}s")
+    print(f"Database: {stats['bytes_before'] / 1e6:.1f} MB -> {stats['bytes_after'] / 1e6:.1f} MB "
+          f"({stats['bytes_reclaimed'] / 1e6:.1f} MB reclaimed)")
+    if stats['free_bytes'] and not stats['incremental_vacuum']:
+        print(f"{stats['free_bytes'] / 1e6:.1f} MB free inside the file is reused by new rows; "
+              f"run 'compact --full' once to return it and compact incrementally from then on")
+    return stats
+
+def update_related(rebuild=False):
+    """Update the precomputed related papers from the embedding store."""
+    from src.backend.related import update_related_papers
+    
+    stats = update_related_papers(rebuild=rebuild)
+    
+    if stats is None:
+        print("Related papers could not be updated (embedding store disabled or empty)")
+        return None
+    
+    print(f"Related papers ({stats['mode']}): {stats['papers']} papers scored, "
+          f"{stats['updated']} lists updated in {stats['seconds']}s")
+    return stats
+
+def prune_summary_history(keep=None):
+    """Delete superseded summaries beyond the newest versions of each paper."""
+    from src.backend.maintenance import prune_summaries
+    
+    deleted = prune_summaries(keep=keep)
+    
+    if deleted is None:
+        print("Superseded summaries could not be deleted")
+        return None
+    
+    print(f"Deleted {deleted} superseded summaries")
+    return deleted
+
+def deduplicate_papers():
+    """Move versioned arXiv ids to canonical ids and detect near-duplicates."""
+    from src.backend.dedup import normalize_stored_ids, index_stored_papers
+    
+    renamed = normalize_stored_ids()
+    print(f"Moved {renamed} versioned paper ids to canonical ids")
+    
+    indexed, duplicates = index_stored_papers()
+    print(f"Indexed {indexed} papers, found {duplicates} near-duplicates")
+    
+    # The embedding store is keyed by paper id
+    if renamed:
+        sync_embeddings(rebuild=True)
+    
+    return {'renamed': renamed, 'indexed': indexed, 'duplicates': duplicates}
+
 def main():
     """Main function."""
     parser = argparse.ArgumentParser(description='ESG & Finance AI Research Assistant')
@@ -180,6 +424,12 @@ def main():
     process_parser = subparsers.add_parser('process', help='Process papers immediately')
     process_parser.add_argument('--limit', type=int, default=10, help='Maximum number of papers to process')
     
+    # worker command
+    worker_parser = subparsers.add_parser('worker', help='Run a processing worker sharing the database with others')
+    worker_parser.add_argument('--batch-size', type=int, help='Papers claimed per stage and batch')
+    worker_parser.add_argument('--poll-interval', type=float, help='Seconds to wait when there is no work')
+    worker_parser.add_argument('--once', action='store_true', help='Process a single batch and exit')
+    
     # list command
     list_parser = subparsers.add_parser('list', help='List papers')
     list_parser.add_argument('--limit', type=int, default=10, help='Maximum number of papers to list')
@@ -189,12 +439,64 @@ def main():
     # brief command
     brief_parser = subparsers.add_parser('brief', help='Generate a research brief')
     brief_parser.add_argument('query', type=str, help='Research query')
+    brief_parser.add_argument('--mode', choices=['vector', 'keyword', 'hybrid'], help='Search mode used to find papers')
+    
+    # profile command
+    profile_parser = subparsers.add_parser('profile', help='Summarize the slowest profiled API requests')
+    profile_parser.add_argument('--limit', type=int, default=10, help='Number of requests to show')
+    profile_parser.add_argument('--route', type=str, help='Only show this route, e.g. /api/search')
+    profile_parser.add_argument('--top', type=int, default=20, help='Functions to show for the slowest request')
+    
+    # export command
+    export_parser = subparsers.add_parser('export', help='Export the corpus (papers, summaries, embeddings)')
+    export_parser.add_argument('path', type=str, help='Output file (.ndjson[.gz], .parquet or .arrow)')
+    export_parser.add_argument('--format', choices=['ndjson', 'parquet', 'arrow'], help='Override the format inferred from the file name')
+    export_parser.add_argument('--no-embeddings', action='store_true', help='Leave out embeddings')
+    export_parser.add_argument('--batch-size', type=int, default=1000, help='Rows read and written at a time')
+    
+    # import command
+    import_parser = subparsers.add_parser('import', help='Import a corpus file')
+    import_parser.add_argument('path', type=str, help='Input file (.ndjson[.gz], .parquet or .arrow)')
+    import_parser.add_argument('--format', choices=['ndjson', 'parquet', 'arrow'], help='Override the format inferred from the file name')
+    import_parser.add_argument('--batch-size', type=int, default=1000, help='Records written per transaction')
+    
+    # embeddings command
+    embeddings_parser = subparsers.add_parser('embeddings', help='Sync the memory-mapped embedding store')
+    embeddings_parser.add_argument('--rebuild', action='store_true', help='Rebuild the store from scratch')
+    
+    # prune-summaries command
+    prune_parser = subparsers.add_parser('prune-summaries', help='Delete superseded summaries')
+    prune_parser.add_argument('--keep', type=int, help='Summaries kept per paper (default: SUMMARY_KEEP_VERSIONS)')
+    
+    # dedup command
+    subparsers.add_parser('dedup', help='Normalize arXiv ids and detect near-duplicate papers')
+    
+    # related command
+    related_parser = subparsers.add_parser('related', help='Update the precomputed related papers')
+    related_parser.add_argument('--rebuild', action='store_true', help='Recompute the lists of all papers')
+    
+    # topics command
+    topics_parser = subparsers.add_parser('topics', help='Update the topic clusters of the embeddings')
+    topics_parser.add_argument('--rebuild', action='store_true', help='Cluster all papers from new centroids')
+    
+    # feed command
+    subparsers.add_parser('feed', help='Rebuild the personalized paper feed from the logged queries')
+    
+    # analytics command
+    analytics_parser = subparsers.add_parser('analytics', help='Show score distributions and processing counts')
+    analytics_parser.add_argument('--rebuild', action='store_true', help='Recompute the rollups from scratch first')
+    
+    # compact command
+    compact_parser = subparsers.add_parser('compact', help='Delete orphaned embeddings and superseded summaries')
+    compact_parser.add_argument('--full', action='store_true',
+                                help='Rewrite the file with VACUUM (blocks the API while it runs)')
+    compact_parser.add_argument('--keep', type=int, help='Summaries kept per paper (default: SUMMARY_KEEP_VERSIONS)')
     
     # Parse arguments
     args = parser.parse_args()
     
     # Initialize the application
-    if not init_app():
+    if not init_app(require_api_key=args.command in OPENAI_COMMANDS):
         return 1
     
     # Run the appropriate command
@@ -208,10 +510,35 @@ def main():
         collect_papers()
     elif args.command == 'process':
         process_papers(limit=args.limit)
+    elif args.command == 'worker':
+        run_worker(batch_size=args.batch_size, poll_interval=args.poll_interval, once=args.once)
     elif args.command == 'list':
         list_papers(limit=args.limit, category=args.category, query=args.query)
     elif args.command == 'brief':
-        generate_research_brief(args.query)
+        generate_research_brief(args.query, mode=args.mode)
+    elif args.command == 'profile':
+        summarize_profiles(limit=args.limit, route=args.route, top=args.top)
+    elif args.command == 'export':
+        export_corpus_file(args.path, fmt=args.format, include_embeddings=not args.no_embeddings,
+                           batch_size=args.batch_size)
+    elif args.command == 'import':
+        import_corpus_file(args.path, fmt=args.format, batch_size=args.batch_size)
+    elif args.command == 'embeddings':
+        sync_embeddings(rebuild=args.rebuild)
+    elif args.command == 'prune-summaries':
+        prune_summary_history(keep=args.keep)
+    elif args.command == 'dedup':
+        deduplicate_papers()
+    elif args.command == 'related':
+        update_related(rebuild=args.rebuild)
+    elif args.command == 'topics':
+        cluster_topics(rebuild=args.rebuild)
+    elif args.command == 'feed':
+        build_feed()
+    elif args.command == 'analytics':
+        show_analytics(rebuild=args.rebuild)
+    elif args.command == 'compact':
+        compact_storage(full=args.full, keep=args.keep)
     else:
         parser.print_help()
     